@@ -1,7 +1,11 @@
 # Placeholder for CardGrid addon 
 
 from __future__ import annotations
-import math
+import html
+import json
+import os
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any
 
@@ -16,26 +20,107 @@ from aqt.gui_hooks import (
     webview_did_receive_js_message,
     profile_will_close,
     sync_will_start,
-    collection_will_temporarily_close
+    collection_will_temporarily_close,
+    reviewer_did_answer_card,
+    operation_did_execute
 )
+from aqt.operations import QueryOp
 from aqt.overview import Overview, OverviewContent
 from aqt.deckbrowser import DeckBrowser, DeckBrowserContent
-from anki.cards import Card
 from aqt import dialogs
+from aqt.qt import QFileDialog
+from aqt.utils import showWarning, tooltip
 
-from .translations import tr
+from .card_filter import FILTER_STATES, CardFilter, combine_search, quote_search_text
+from .card_data import (
+    CardSnapshot, DeckIndex, load_card_snapshot, load_day_learning_cids, load_deck_index, load_last_review_map,
+)
+from .card_sections import SECTION_MODES, UNTAGGED_SECTION_KEY, load_section_rows
+from .mosaic_export import EXPORT_FORMATS, export_mosaic
+from .profiling import ProfileHistory, RenderProfile, append_profile_log
+from .render_engine import (
+    ERROR_SORT_VALUES, SORT_ORDER_KEYS, clear_review_error_stats, compute_render_model, section_tile_model,
+)
+from .revlog_replay import RevlogReplay, load_revlog_replay
+from .tile_engine import CATEGORY_COLOR_KEYS, classify_card, compute_tile_coloring, is_due_today, tile_color
+from .translations import formatter, invalidate_language, refresh_language, tr
 
 # Variáveis globais para controle de estado
 _memorymosaic_cached_config: dict | None = None
 _session_sort_order_override: str | None = None
 _session_view_mode_override: str | None = None
 _session_gradient_field_override: str | None = None
+_session_binning_override: str | None = None
+# Menus de estado e de tag da grade: None usa o filtro do config, "" mostra todos
+_session_state_filter_override: str | None = None
+_session_tag_filter_override: str | None = None
+# Visualização em seções ("none", "deck" ou "tag"): None usa o config; as chaves (did ou tag) das
+# seções abertas valem para as próximas páginas (None: abre as primeiras sections_open_count)
+_session_sections_override: str | None = None
+_session_open_section_keys: set | None = None
+# Seções abertas da primeira vez quando `sections_open_count` não é um inteiro (o padrão de config.json)
+_DEFAULT_SECTIONS_OPEN_COUNT = 1
 _is_syncing: bool = False
 _is_closing: bool = False
 
 # Novas variáveis de sessão para paginação
 _session_current_display_limit: int | None = None
-_session_last_filter_details: tuple | None = None # (filter_str, sort_order, view_mode, gradient_field)
+_session_last_filter_details: tuple | None = None # (filter_str, sort_order, view_mode, gradient_field, binning, drilldown, sections)
+
+# Cache dos scripts da pasta web/ (embutidos nas páginas)
+_web_asset_cache: dict[str, str] = {}
+
+# Tooltips sob demanda: contexto da última renderização e LRU dos textos já montados
+_TOOLTIP_LRU_MAX_ENTRIES = 2000
+_session_tooltip_context: dict | None = None
+_tooltip_lru: OrderedDict[int, list[str]] = OrderedDict()
+
+# Atualização incremental: cartões alterados desde a última renderização (respostas no revisor)
+# e o estado da última grade renderizada, usado para atualizar só esses tiles
+_session_dirty_cids: set[int] = set()
+_session_needs_full_rebuild: bool = False
+_session_last_render: dict | None = None
+
+# Renderização em segundo plano: cada pedido recebe uma geração nova e resultados de gerações
+# antigas (usuário já navegou ou mudou ordenação/modo) são descartados
+_render_generation: int = 0
+
+# Cache (LRU) das grades já calculadas, chaveado por filtro/visualização/config/estado da coleção
+_render_cache: OrderedDict[tuple, tuple[str, dict | None]] = OrderedDict()
+_render_cache_hits: int = 0
+_render_cache_misses: int = 0
+
+# Linha do tempo: replay do revlog da grade exibida (ver revlog_replay.py) e os tiles já enviados à página
+_timelapse: dict | None = None
+# Passo da reprodução quando `timelapse_step_days` não é um inteiro (o padrão de config.json)
+_DEFAULT_TIMELAPSE_STEP_DAYS = 7
+
+# Índice de decks (did -> nome / subárvore) da coleção aberta; refeito após operações em decks
+_deck_index: DeckIndex | None = None
+_deck_index_collection: tuple | None = None
+
+# Carregamento progressivo: tiles enviados por chamada de web.eval
+_STREAM_CHUNK_TILES = 2000
+
+# Modo agrupado: grupo aberto em resolução total (filtro, ordenação, primeira posição, posição final)
+_session_bin_drilldown: tuple[str, str, int, int] | None = None
+
+# Medição das renderizações (memorymosaic_profiling): últimas exibições da grade, para o painel
+# de diagnóstico; o log opcional fica na pasta user_files do addon
+_profile_history: ProfileHistory | None = None
+_PROFILE_LOG_FILENAME = "memorymosaic_profile.log"
+# Tamanho do histórico quando `profiling_history_size` não é um inteiro (o padrão de config.json)
+_DEFAULT_PROFILING_HISTORY_SIZE = 10
+
+# Rótulo de cada categoria (CATEGORY_*) no tooltip dos grupos
+_CATEGORY_LABEL_KEYS = (
+    "card_status_default",
+    "card_status_suspended",
+    "card_status_new",
+    "card_status_relearning",
+    "card_status_young",
+    "card_status_mature",
+)
 
 def _get_addon_config() -> dict:
     """Carrega a configuração do addon, utilizando um cache interno."""
@@ -51,45 +136,128 @@ def _get_addon_config() -> dict:
     _memorymosaic_cached_config = config if config is not None else {}
     return _memorymosaic_cached_config
 
-def _should_show_due_indicator(card: Card | None, config: dict, today_for_due_calc: int) -> bool:
-    if not config.get("show_due_indicator"):
-        return False
+def _build_tile_tooltip_parts(
+    snapshot: CardSnapshot,
+    row: int,
+    config: dict,
+    view_mode: str,
+    gradient_field: str,
+    today_for_due_calc: int,
+    last_review_timestamps_map: dict[int, int],
+    gradient_ivl_range: tuple[int | None, int | None, bool],
+) -> list[str]:
+    """Monta as linhas do tooltip de um tile a partir do instantâneo colunar.
+
+    `gradient_ivl_range` é (min, max, dinâmica) da escala de ivl exibida no modo gradiente.
+    """
+    cid = snapshot.cids[row]
+    tooltip_parts = [formatter("tooltip_card_id")(cid=cid)]
+    if not snapshot.present[row]:
+        return tooltip_parts
+
+    card_ivl = snapshot.ivl[row]
+    card_factor = snapshot.factor[row]
+    card_queue = snapshot.queue[row]
+    card_due = snapshot.due[row]
+
+    deck_name = _get_deck_index().name(snapshot.did[row]) or str(snapshot.did[row])
+    tooltip_parts.append(formatter("tooltip_deck")(deck=deck_name))
     
-    if not card:
-        return False
+    last_rev_timestamp_ms = last_review_timestamps_map.get(cid)
+    if last_rev_timestamp_ms:
+        last_rev_dt = datetime.fromtimestamp(last_rev_timestamp_ms / 1000)
+        tooltip_parts.append(formatter("tooltip_last_review")(date=last_rev_dt.strftime("%Y-%m-%d %H:%M")))
+    else:
+        tooltip_parts.append(formatter("tooltip_never_reviewed")())
+    tooltip_parts.append(formatter("tooltip_due")(due=card_due))
+    tooltip_parts.append(formatter("tooltip_queue")(queue=card_queue))
+    tooltip_parts.append(formatter("tooltip_type")(type=snapshot.type[row]))
+    tooltip_parts.append(formatter("tooltip_interval")(interval=card_ivl))
+    tooltip_parts.append(formatter("tooltip_factor")(factor=card_factor))
     
-    return card.queue in [1, 2, 3] and card.due <= today_for_due_calc
-
-def _get_tile_bg_color(card: Card | None, config: dict) -> str:
-    """Determina a cor de fundo do tile com base no status do cartão."""
-    if not mw or not mw.col or not config:
-        return config.get("color_default_bg")
-
-    if not card:
-        return config.get("color_default_bg")
-
-    # 1. Verificar estados que anulam outros (suspenso/enterrado)
-    if card.queue in [-1, -2, -3]:
-        return config.get("color_suspended_buried")
+    # Adicionar informações específicas do gradiente se no modo gradiente
+    if view_mode == "gradient":
+        if gradient_field == "factor":
+            tooltip_parts.append(formatter("gradient_tooltip_value")(value=card_factor))
+            tooltip_parts.append(formatter("gradient_tooltip_range")(min=config.get("gradient_factor_min"), max=config.get("gradient_factor_max")))
+        elif gradient_field == "ivl":
+            tooltip_parts.append(formatter("gradient_tooltip_value")(value=card_ivl))
+            range_min, range_max, range_is_dynamic = gradient_ivl_range
+            # Na escala dinâmica a faixa reflete o próprio conjunto de dados
+            tooltip_parts.append(formatter("gradient_tooltip_range")(min=range_min, max=range_max))
+            # Se o valor real do cartão estiver fora da faixa de config (e não estamos normalizando dinamicamente),
+            # adicionar uma nota com o valor real.
+            if not range_is_dynamic and (card_ivl < range_min or card_ivl > range_max):
+                tooltip_parts.append(formatter("gradient_normalized_value")(real=card_ivl))
+        elif gradient_field == "lapses":
+            tooltip_parts.append(formatter("gradient_tooltip_value")(value=snapshot.lapses[row]))
+            tooltip_parts.append(formatter("gradient_tooltip_range")(min=config.get("gradient_lapses_min"), max=config.get("gradient_lapses_max")))
+        elif gradient_field == "due" and card_queue == 2:
+            days_until_due = max(0, card_due - today_for_due_calc)
+            tooltip_parts.append(formatter("gradient_tooltip_value")(value=days_until_due))
+            tooltip_parts.append(formatter("gradient_tooltip_range")(min=config.get("gradient_due_min"), max=config.get("gradient_due_max")))
+
+    return tooltip_parts
+
+def _build_bin_tooltip_parts(context: dict, bin_index: int) -> list[str]:
+    """Monta as linhas do tooltip de um tile do modo agrupado (um grupo de cartões)."""
+    bin_accumulator = context["bins"]
+    if not 0 <= bin_index < bin_accumulator.bin_count:
+        return []
+    card_count = len(context["all_cids"])
+    start, end = bin_accumulator.bin_range(bin_index, card_count)
+    tooltip_parts = [formatter("bin_tooltip_range")(first=start + 1, last=end, total=card_count)]
+    for category, count in enumerate(bin_accumulator.bin_categories(bin_index)):
+        if count:
+            tooltip_parts.append(f"{tr(_CATEGORY_LABEL_KEYS[category])}: {count}")
+    if bin_accumulator.due_counts[bin_index]:
+        tooltip_parts.append(f'{tr("card_status_due")}: {bin_accumulator.due_counts[bin_index]}')
+    if context["view_mode"] == "gradient":
+        mean = bin_accumulator.bin_mean(bin_index)
+        if mean is not None:
+            tooltip_parts.append(formatter("bin_tooltip_mean")(value=f"{mean:.1f}"))
+    tooltip_parts.append(tr("bin_tooltip_click"))
+    return tooltip_parts
+
+def _set_tooltip_context(context: dict) -> None:
+    """Registra o contexto da renderização atual e descarta os tooltips montados para a anterior."""
+    global _session_tooltip_context
+    _session_tooltip_context = context
+    _tooltip_lru.clear()
+
+def _get_tile_tooltip_lines(cid: int) -> list[str]:
+    """Retorna as linhas do tooltip de um cartão, usando o LRU dos tooltips recentes."""
+    cached_lines = _tooltip_lru.get(cid)
+    if cached_lines is not None:
+        _tooltip_lru.move_to_end(cid)
+        return cached_lines
+
+    context = _session_tooltip_context
+    if context is None:
+        return [tr("tooltip_card_id", cid=cid)]
+    profile_history = _get_profile_history(context["config"])
+    started = time.perf_counter()
+    if context.get("bins") is not None:
+        # Modo agrupado: o "cid" do tile é o índice do grupo
+        lines = _build_bin_tooltip_parts(context, cid)
+    else:
+        snapshot = context["snapshot"]
+        row = snapshot.row_of(cid)
+        if row is None:
+            # Cartão fora do instantâneo (ex.: página desatualizada): lê só esta linha
+            snapshot = load_card_snapshot(mw.col.db, [cid])
+            row = 0
+        lines = _build_tile_tooltip_parts(
+            snapshot, row, context["config"], context["view_mode"], context["gradient_field"],
+            context["today"], context["last_review_timestamps_map"], context["gradient_ivl_range"],
+        )
 
-    # 2. Se não suspenso/enterrado, verificar tipo
-    if card.type == 0:
-        return config.get("color_new")
-    
-    # 3. Se não suspenso/enterrado/novo, verificar se está em reaprendizado
-    # Verifica tanto queue=3 quanto type=3 (cartões em reaprendizado/lapso)
-    if card.queue == 3 or card.type == 3:
-        return config.get("color_relearning_lapse")
-    
-    # 4. Se não ..., verificar se está em aprendizado
-    if card.type == 1:
-        return config.get("color_young_learn")
-        
-    # 5. Se não ..., verificar se é revisão
-    if card.type == 2:
-        return config.get("color_mature") if card.ivl >= 21 else config.get("color_young_learn")
-            
-    return config.get("color_default_bg")
+    _tooltip_lru[cid] = lines
+    if len(_tooltip_lru) > _TOOLTIP_LRU_MAX_ENTRIES:
+        _tooltip_lru.popitem(last=False)
+    if profile_history is not None:
+        profile_history.add_tooltip(time.perf_counter() - started)
+    return lines
 
 def _open_card_in_browser(cid: int) -> None:
     """Abre o cartão com o cid especificado no Navegador do Anki."""
@@ -104,18 +272,359 @@ def _open_card_in_browser(cid: int) -> None:
     except Exception as e:
         print(f"Memory Mosaic: Erro ao tentar abrir o cartão {cid} no navegador: {e}")
 
-def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str:
-    """Renderiza o HTML para a grade de tiles com base nos cartões da coleção, 
-       filtrados opcionalmente por MEMORYMOSAIC_DEFAULT_DECK_FILTER ou overview_deck_name."""
-    global _session_sort_order_override # Necessário para modificar a global
-    
-    # Variáveis de sessão para o modo de visualização e campo de gradiente
-    global _session_view_mode_override
-    global _session_gradient_field_override
-    
+def _read_web_asset(filename: str) -> str:
+    """Lê (com cache) um script da pasta web/ do addon para ser embutido na página."""
+    cached = _web_asset_cache.get(filename)
+    if cached is None:
+        asset_path = os.path.join(os.path.dirname(__file__), "web", filename)
+        with open(asset_path, encoding="utf-8") as asset_file:
+            cached = asset_file.read()
+        _web_asset_cache[filename] = cached
+    return cached
+
+def _json_for_script(value: Any) -> str:
+    """Serializa um valor como JSON compacto, seguro para ser embutido em <script>."""
+    return json.dumps(value, separators=(",", ":")).replace("</", "<\\/")
+
+def _get_collection_identity() -> tuple:
+    """Identifica a coleção aberta; muda quando o perfil/coleção é reaberto."""
+    return (id(mw.col), getattr(mw.col, "path", None))
+
+def _get_deck_index() -> DeckIndex:
+    """Retorna o índice de nomes e hierarquia dos decks, montando-o se necessário.
+
+    O índice é montado uma vez e reaproveitado pelas renderizações e tooltips até
+    uma operação em decks, uma sincronização ou a troca de coleção.
+    """
+    global _deck_index, _deck_index_collection
+    collection_identity = _get_collection_identity()
+    if _deck_index is None or _deck_index_collection != collection_identity:
+        _deck_index = load_deck_index(mw.col.decks)
+        _deck_index_collection = collection_identity
+    return _deck_index
+
+def _invalidate_deck_index() -> None:
+    global _deck_index, _deck_index_collection
+    _deck_index = None
+    _deck_index_collection = None
+
+def _commit_render_state(render_state: dict) -> None:
+    """Registra a última grade renderizada (contexto dos tooltips e base da atualização incremental)."""
+    global _session_last_render, _session_needs_full_rebuild
+    _set_tooltip_context(render_state)
+    _session_last_render = render_state
+    _session_needs_full_rebuild = False
+    _session_dirty_cids.clear()
+
+def _filter_membership_unchanged(last_render: dict) -> bool:
+    """Confere, com a busca da grade, se as respostas não tiraram cartões do filtro nem incluíram outros.
+
+    Só é necessário quando o filtro tem critérios que mudam com as respostas (estados ou
+    faixas de intervalo, facilidade e lapsos); a busca é restrita aos cartões alterados.
+    """
+    dirty_cids = sorted(_session_dirty_cids)
+    card_filter = last_render["card_filter"]
+    # Os cartões em aprendizado de vários dias só importam entre os alterados
+    day_learning_cids = load_day_learning_cids(mw.col.db, dirty_cids) if card_filter.uses_day_learning_cids() else ()
+    filter_search = combine_search(last_render["deck_search"], card_filter, day_learning_cids)
+    search = f"({filter_search}) cid:{','.join(str(cid) for cid in dirty_cids)}"
+    matching_cids = set(mw.col.find_cards(search))
+    snapshot = last_render["snapshot"]
+    is_paginated = len(snapshot) < len(last_render["all_cids"])
+    filter_cids = None
+    for cid in dirty_cids:
+        was_in_filter = snapshot.row_of(cid) is not None
+        if not was_in_filter and is_paginated:
+            if filter_cids is None:
+                filter_cids = set(last_render["all_cids"])
+            was_in_filter = cid in filter_cids
+        if was_in_filter != (cid in matching_cids):
+            return False
+    return True
+
+def _apply_dirty_cids_to_last_render(last_render: dict) -> bool:
+    """Relê os cartões alterados e atualiza o estado da última grade.
+
+    Retorna False quando a mudança não pode ser aplicada tile a tile (ex.: a escala
+    dinâmica de ivl mudou, surgiu um estado sem entrada no sumário, o cartão entrou no
+    filtro ou saiu dele, ou mudou um cartão do filtro que não está carregado na grade e
+    que o sumário conta); nesse caso o estado da grade não é alterado.
+    """
+    if last_render["filter_depends_on_card_state"] and not _filter_membership_unchanged(last_render):
+        _session_dirty_cids.clear()
+        return False # O cartão entrou no filtro ou saiu dele: a lista de tiles mudou
+    snapshot = last_render["snapshot"]
+    is_paginated = len(snapshot) < len(last_render["all_cids"])
+    filter_cids = None
+    dirty_rows = []
+    for cid in _session_dirty_cids:
+        row = snapshot.row_of(cid)
+        if row is not None:
+            dirty_rows.append((cid, row))
+        elif is_paginated:
+            if filter_cids is None:
+                filter_cids = set(last_render["all_cids"])
+            if cid in filter_cids:
+                _session_dirty_cids.clear()
+                return False # O estado anterior do cartão não é conhecido para corrigir o sumário
+    _session_dirty_cids.clear()
+    if not dirty_rows:
+        return True
+
+    fresh = load_card_snapshot(mw.col.db, [cid for cid, _ in dirty_rows])
+    config = last_render["config"]
+    view_mode = last_render["view_mode"]
+    gradient_field = last_render["gradient_field"]
+    today_val = last_render["today"]
+    ivl_color_limits = last_render["ivl_color_limits"]
+    gradient_lut = last_render["gradient_lut"]
+    color_counts = last_render["color_counts"]
+    patched_tiles = last_render["patched_tiles"]
+    sections = last_render["sections"]
+
+    # Todos os cartões são conferidos antes de alterar o estado: ele pode estar no cache de
+    # grades, e uma recusa no meio do caminho o deixaria com parte dos cartões aplicada
+    updates = []
+    for fresh_row, (cid, row) in enumerate(dirty_rows):
+        if not fresh.present[fresh_row]:
+            return False # Cartão apagado: a grade precisa ser refeita
+        if sections is not None and sections.mode == "deck" and fresh.did[fresh_row] != snapshot.did[row]:
+            return False # O cartão mudou de deck, isto é, de seção
+        if last_render["ivl_range_is_dynamic"]:
+            # Na escala dinâmica, um ivl novo fora da faixa (ou que era um dos extremos) muda todas as cores
+            range_min, range_max = ivl_color_limits
+            if snapshot.ivl[row] in (range_min, range_max) or not range_min <= fresh.ivl[fresh_row] <= range_max:
+                return False
+        new_color = tile_color(fresh, fresh_row, config, view_mode, gradient_field, today_val, gradient_lut)
+        if view_mode == "categorical" and new_color not in color_counts:
+            return False # O sumário não tem entrada para esta cor
+        updates.append((cid, row, fresh_row, new_color))
+    last_reviews = load_last_review_map(mw.col.db, [cid for cid, _ in dirty_rows])
+
+    for cid, row, fresh_row, new_color in updates:
+        old_color = tile_color(snapshot, row, config, view_mode, gradient_field, today_val, gradient_lut)
+        old_category = classify_card(snapshot.present[row], snapshot.type[row], snapshot.queue[row], snapshot.ivl[row])
+        was_due = is_due_today(snapshot, row, today_val)
+        snapshot.set_row(row, fresh.row_values(fresh_row))
+        if view_mode == "categorical":
+            color_counts[old_color] -= 1
+            color_counts[new_color] += 1
+        due_change = is_due_today(snapshot, row, today_val) - was_due
+        last_render["due_today_count"] += due_change
+        if sections is not None:
+            new_category = classify_card(snapshot.present[row], snapshot.type[row], snapshot.queue[row], snapshot.ivl[row])
+            sections.update_row(row, old_category, new_category, due_change)
+        patched_tiles[cid] = (new_color, bool(config.get("show_due_indicator")) and is_due_today(snapshot, row, today_val))
+        _tooltip_lru.pop(cid, None)
+
+    last_render["last_review_timestamps_map"].update(last_reviews)
+    return True
+
+def _get_config_fingerprint(config: dict) -> int:
+    """Hash do config atual, para invalidar o cache de grades quando ele muda."""
+    return hash(json.dumps(config, sort_keys=True, default=str))
+
+def _get_collection_watermark() -> tuple:
+    """Marca d'água de modificação da coleção: col.mod e o id da revisão mais recente."""
+    return (mw.col.mod, mw.col.db.scalar("SELECT MAX(id) FROM revlog"))
+
+def _render_cache_get(cache_key: tuple) -> tuple[str, dict | None] | None:
+    """Busca uma grade calculada no cache, atualizando os contadores de acerto/falha."""
+    global _render_cache_hits, _render_cache_misses
+    result = _render_cache.get(cache_key)
+    if result is None:
+        _render_cache_misses += 1
+        return None
+    _render_cache_hits += 1
+    _render_cache.move_to_end(cache_key)
+    return result
+
+def _render_cache_put(cache_key: tuple, result: tuple[str, dict | None]) -> None:
+    """Guarda uma grade calculada, descartando a entrada usada há mais tempo quando cheio."""
+    max_entries = _get_addon_config().get("render_cache_size")
+    if not isinstance(max_entries, int) or max_entries <= 0:
+        return
+    _render_cache[cache_key] = result
+    _render_cache.move_to_end(cache_key)
+    while len(_render_cache) > max_entries:
+        _render_cache.popitem(last=False)
+
+def _clear_render_cache() -> None:
+    _render_cache.clear()
+
+def get_render_cache_stats() -> dict:
+    """Contadores do cache de grades, para diagnóstico."""
+    lookups = _render_cache_hits + _render_cache_misses
+    return {
+        "hits": _render_cache_hits,
+        "misses": _render_cache_misses,
+        "hit_rate": (_render_cache_hits / lookups) if lookups else 0.0,
+        "entries": len(_render_cache),
+    }
+
+def _get_profile_history(config: dict) -> ProfileHistory | None:
+    """Histórico das renderizações medidas, ou None com memorymosaic_profiling desligado."""
+    global _profile_history
+    if not config.get("memorymosaic_profiling"):
+        return None
+    # O painel mostra ao menos a renderização mais recente (valores < 1 valem 1, como em ProfileHistory)
+    max_entries = config.get("profiling_history_size")
+    max_entries = max(1, max_entries) if isinstance(max_entries, int) else _DEFAULT_PROFILING_HISTORY_SIZE
+    if _profile_history is None or _profile_history.max_entries != max_entries:
+        _profile_history = ProfileHistory(max_entries, _profile_history)
+    return _profile_history
+
+def _write_profile_log(config: dict, record: dict) -> None:
+    """Acrescenta uma medição ao log em user_files, se `profiling_log_file` estiver ativo."""
+    if not config.get("profiling_log_file"):
+        return
+    try:
+        append_profile_log(os.path.join(os.path.dirname(__file__), "user_files", _PROFILE_LOG_FILENAME), record)
+    except OSError as error:
+        print(f"Memory Mosaic: Erro ao gravar o log de medições: {error}")
+
+def _record_render_profile(origin: str, started: float, render_state: dict | None, computed: bool = False) -> None:
+    """Registra no histórico de medições uma exibição da grade.
+
+    `origin` indica de onde veio o HTML ("computed", "background", "cache" ou "incremental").
+    Para uma grade calculada agora (`computed`), usa as fases medidas no cálculo; nos demais
+    casos só o tempo total é registrado.
+    """
+    config = _get_addon_config()
+    history = _get_profile_history(config)
+    if history is None:
+        return
+    profile = render_state.get("profile") if computed and render_state is not None else None
+    if profile is None:
+        profile = RenderProfile()
+        if render_state is not None:
+            bins = render_state["bins"]
+            profile.tiles = bins.bin_count if bins is not None else len(render_state["snapshot"].cids)
+    profile.origin = origin
+    profile.total = time.perf_counter() - started # No segundo plano inclui a espera na fila
+    history.add(profile)
+    _write_profile_log(config, dict(profile.as_dict(), cache=get_render_cache_stats()))
+
+def _record_page_profile(marks: dict) -> None:
+    """Associa à última exibição as medições enviadas pela página (web/mosaic_profile.js)."""
+    config = _get_addon_config()
+    history = _get_profile_history(config)
+    profile = history.attach_page_marks(marks) if history is not None else None
+    if profile is not None:
+        _write_profile_log(config, {"id": profile.profile_id, "page_ms": profile.page})
+
+def _get_profile_overlay_lines() -> list[str]:
+    """Linhas do painel de diagnóstico: cache de grades e as últimas renderizações, da mais recente."""
+    history = _get_profile_history(_get_addon_config())
+    if history is None:
+        return []
+    stats = get_render_cache_stats()
+    lines = [
+        tr("profile_overlay_title"),
+        tr("profile_overlay_cache", hits=stats["hits"], misses=stats["misses"], rate=stats["hit_rate"], entries=stats["entries"]),
+    ]
+    lines.extend(profile.summary_line() for profile in reversed(history.entries))
+    return lines
+
+def _use_render_result(result: tuple[str, dict | None]) -> str:
+    """Registra o estado de uma grade (calculada agora ou vinda do cache) e retorna o HTML."""
+    grid_html, render_state = result
+    if render_state is not None:
+        _commit_render_state(render_state)
+        if render_state["patched_tiles"]:
+            # Entrada do cache que já recebeu atualizações incrementais depois de gerada
+            _schedule_tile_patch(render_state)
+    return grid_html
+
+def _try_incremental_render(render_key: tuple) -> str | None:
+    """Reaproveita a última grade quando filtro, ordenação e coleção não mudaram.
+
+    Retorna o HTML anterior (os tiles alterados desde então são corrigidos por um
+    patch via web.eval) ou None quando é preciso reconstruir a grade.
+    """
+    last_render = _session_last_render
+    if _session_needs_full_rebuild or last_render is None or last_render["key"] != render_key:
+        return None
+    if last_render["html"] is None:
+        return None # Grade estendida por carregamento progressivo: o HTML guardado não a representa
+
+    if _session_dirty_cids and render_key[1] in ERROR_SORT_VALUES:
+        return None # Nas ordenações por erro, as respostas mudam a posição dos cartões na grade
+    if _session_dirty_cids and not _apply_dirty_cids_to_last_render(last_render):
+        return None
+
+    if last_render["patched_tiles"]:
+        _schedule_tile_patch(last_render)
+    return last_render["html"]
+
+def _schedule_tile_patch(last_render: dict) -> None:
+    """Envia à página os tiles alterados desde que o HTML da grade foi gerado.
+
+    O HTML reaproveitado ainda tem as cores antigas, por isso o patch é sempre cumulativo.
+    O web.eval é agendado para depois de a página ser carregada na webview.
+    """
+    patch = {
+        "tiles": [[cid, color, due] for cid, (color, due) in last_render["patched_tiles"].items()],
+        "counts": last_render["color_counts"] if last_render["view_mode"] == "categorical" else {},
+        "dueCount": last_render["due_today_count"],
+    }
+    sections = last_render["sections"]
+    if sections is not None:
+        # Mini-sumários das seções dos cartões alterados
+        snapshot = last_render["snapshot"]
+        changed_sections = sorted({
+            section for cid in last_render["patched_tiles"] for section in sections.sections_of(snapshot.row_of(cid))
+        })
+        patch["sections"] = [[section, sections.counts(section), sections.due_counts[section]] for section in changed_sections]
+    patch_js = f"MemoryMosaicLive.applyPatch({_json_for_script(patch)});"
+    try:
+        mw.progress.single_shot(0, lambda: mw.web.eval(patch_js) if _is_collection_usable() else None)
+    except Exception as e:
+        print(f"Memory Mosaic: Erro ao agendar a atualização dos tiles: {e}")
+
+def _filter_menu_value(values: tuple[str, ...]) -> str:
+    """Valor do menu de estado/tag para os valores do critério: "" (todos), o único valor ou "*" (vários, do config)."""
+    if not values:
+        return ""
+    return values[0] if len(values) == 1 else "*"
+
+def _filter_menu_html(element_id: str, label: str, on_change: str, current: str, options: list[tuple[str, str]]) -> str:
+    """Menu (select) de um critério do filtro; "*" aparece só quando o config usa vários valores."""
+    option_parts = [f'<option value=""{" selected" if current == "" else ""}>{tr("filter_all")}</option>']
+    if current == "*":
+        option_parts.append(f'<option value="*" selected>{tr("filter_from_config")}</option>')
+    for value, text in options:
+        selected = " selected" if value == current else ""
+        option_parts.append(f'<option value="{html.escape(value)}"{selected}>{html.escape(text)}</option>')
+    return f'''
+    <div style="margin-right: 15px;">
+        <label for="{element_id}" style="margin-right: 5px; font-weight: normal; font-size: 14px;">{label}:</label>
+        <select id="{element_id}" onchange="{on_change}(this.value)" style="padding: 5px; border-radius: 4px; border: 1px solid #ccc; max-width: 180px;">
+            {"".join(option_parts)}
+        </select>
+    </div>'''
+
+def _section_label(mode: str, key: Any, view_state: dict) -> str:
+    """Rótulo de uma seção: a tag ou o nome do deck, sem o prefixo do deck do filtro (só o subdeck)."""
+    if mode == "tag":
+        return key if key != UNTAGGED_SECTION_KEY else tr("sections_untagged")
+    deck_index = view_state["deck_index"]
+    name = deck_index.name(key) if deck_index is not None else None
+    if name is None:
+        return str(key)
+    root_deck = view_state["overview_deck_name"] or view_state["config"].get("memorymosaic_default_deck_filter")
+    if root_deck and name.startswith(root_deck + "::"):
+        return name[len(root_deck) + 2:]
+    return name
+
+def _resolve_render_view_state(overview_deck_name: str | None = None) -> dict | str:
+    """Resolve, na thread principal, o estado de visualização da grade (filtro, ordenação,
+       modo, campo de gradiente e paginação) a partir do config e das variáveis de sessão.
+       Retorna a mensagem HTML de espera se a coleção ainda não estiver pronta."""
     # Variáveis de sessão para paginação
     global _session_current_display_limit
     global _session_last_filter_details
+    global _session_bin_drilldown
 
     # Verificação crucial no início da função
     if not mw or not mw.col or not mw.col.sched or not mw.col.db or not mw.col.decks:
@@ -128,9 +637,10 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
             
     config = _get_addon_config()
     memorymosaic_default_deck_filter = config.get("memorymosaic_default_deck_filter")
+    initial_card_load_count = config.get("initial_card_load_count")
 
-    # Espaçamento para separar o addon do conteúdo acima
-    spacing_html = '<div style="margin-top: 25px; border-top: 1px solid #e0e0e0; padding-top: 15px;"></div>'
+    # Idioma resolvido uma vez por renderização; tr() e os formatadores usam o catálogo em cache
+    language = refresh_language()
 
     # >>> PASSO 1: Otimizar mw.col.sched.today <<<
     today_val = mw.col.sched.today
@@ -141,8 +651,7 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         current_sort_order_key = _session_sort_order_override
     else:
         configured_sort_order = config.get("memorymosaic_default_sort_order") # Não usa mais valor padrão aqui
-        valid_sort_keys = ["id_asc", "ivl_asc", "ivl_desc", "due_asc"]
-        if configured_sort_order in valid_sort_keys:
+        if configured_sort_order in SORT_ORDER_KEYS:
             current_sort_order_key = configured_sort_order
         else:
             current_sort_order_key = "id_asc" # Define explicitamente o padrão se ausente ou inválido
@@ -175,44 +684,65 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
             if configured_gradient_field is not None:
                 print(f"Memory Mosaic: Valor inválido '{configured_gradient_field}' para 'memorymosaic_default_gradient_field' no config.json. Usando padrão 'ivl'.")
 
-    # Mapeamento para a cláusula ORDER BY do banco de dados
-    sort_order_map = {
-        "id_asc": "c.id asc",      # Ordenar por ID do cartão (data de criação)
-        "ivl_asc": "c.ivl asc",    # Intervalo crescente
-        "ivl_desc": "c.ivl desc",  # Intervalo decrescente
-        "due_asc": "c.due asc"     # Data de vencimento mais próxima
-    }
-    db_sort_order = sort_order_map.get(current_sort_order_key) # Padrão para id_asc
-
-    # Carregar configurações de dimensionamento
-    tile_default_size_px = config.get("tile_default_size_px")
-    tile_default_gap_px = config.get("tile_default_gap_px")
-    tile_min_size_px = config.get("tile_min_size_px")
-    grid_max_width_px = config.get("grid_max_width_px")
-    grid_max_height_px = config.get("grid_max_height_px")
-    # tile_border_width_px = config.get("tile_border_width_px") # Esta linha foi comentada pois não é usada com fallback
-    grid_padding_px = config.get("grid_padding_px")
-    
-    # A largura da borda do tile está atualmente fixa em 1px no CSS.
-    # A lógica de cálculo precisa saber disso.
-    TILE_BORDER_WIDTH_FIXED_PX = 1 
+    # Leitura do modo agrupado ("auto" agrupa a partir de binning_auto_threshold cartões no filtro)
+    if _session_binning_override:
+        current_binning = _session_binning_override
+    else:
+        configured_binning = config.get("memorymosaic_binning")
+        if configured_binning in ("auto", "on", "off"):
+            current_binning = configured_binning
+        else:
+            current_binning = "auto"
+            if configured_binning is not None:
+                print(f"Memory Mosaic: Valor inválido '{configured_binning}' para 'memorymosaic_binning' no config.json. Usando padrão 'auto'.")
 
-    # Configurações de Paginação
-    initial_card_load_count = config.get("initial_card_load_count")
-    incremental_card_load_count = config.get("incremental_card_load_count")
+    # Leitura da visualização em seções (por deck ou tag)
+    if _session_sections_override:
+        current_sections = _session_sections_override
+    else:
+        configured_sections = config.get("memorymosaic_default_sections")
+        if configured_sections in SECTION_MODES:
+            current_sections = configured_sections
+        else:
+            current_sections = "none"
+            if configured_sections is not None:
+                print(f"Memory Mosaic: Valor inválido '{configured_sections}' para 'memorymosaic_default_sections' no config.json. Usando padrão 'none'.")
 
-    search_query_final = ""
+    deck_search = ""
     # Priorizar o deck do overview se estivermos nessa tela
     if overview_deck_name: 
-        search_query_final = f'deck:"{overview_deck_name}"'
+        deck_search = f'deck:{quote_search_text(overview_deck_name)}'
     # Caso contrário (Deck Browser), usar o filtro global se definido
     elif memorymosaic_default_deck_filter: 
-        search_query_final = f'deck:"{memorymosaic_default_deck_filter}"'
+        deck_search = f'deck:{quote_search_text(memorymosaic_default_deck_filter)}'
     # Se nenhum dos anteriores (estamos no Deck Browser e memorymosaic_default_deck_filter está vazio), 
-    # search_query_final permanece "" (todos os cartões), o que é o comportamento desejado.
+    # deck_search permanece "" (todos os cartões), o que é o comportamento desejado.
+
+    # Critérios do filtro (config e menus de estado/tag), compilados na mesma busca
+    card_filter = CardFilter.from_config(config)
+    if _session_state_filter_override is not None:
+        card_filter = card_filter.replace(states=(_session_state_filter_override,) if _session_state_filter_override else ())
+    if _session_tag_filter_override is not None:
+        card_filter = card_filter.replace(tags=(_session_tag_filter_override,) if _session_tag_filter_override else ())
+    filter_criteria = card_filter.to_search()
+    # Busca sem os ids dos cartões em aprendizado de vários dias: é a usada nas chaves da grade; a
+    # busca completa é montada no cálculo (render_engine.resolve_search_query), fora da thread principal
+    search_query_final = combine_search(deck_search, card_filter)
+
+    # Grupo aberto no modo agrupado: as posições só valem para o filtro e a ordenação em que foi escolhido
+    # (as seções mostram o filtro inteiro, sem grupos)
+    current_drilldown = None
+    if _session_bin_drilldown is not None:
+        if _session_bin_drilldown[:2] == (search_query_final, current_sort_order_key) and current_sections == "none":
+            current_drilldown = _session_bin_drilldown[2:]
+        else:
+            _session_bin_drilldown = None
 
     # Lógica de reset da paginação
-    current_filter_details = (search_query_final, current_sort_order_key, current_view_mode, current_gradient_field)
+    current_filter_details = (
+        search_query_final, current_sort_order_key, current_view_mode, current_gradient_field,
+        current_binning, current_drilldown, current_sections,
+    )
     if _session_last_filter_details != current_filter_details:
         _session_current_display_limit = None # Resetar ao mudar filtro/ordem
         _session_last_filter_details = current_filter_details
@@ -220,70 +750,160 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
     if _session_current_display_limit is None:
         _session_current_display_limit = initial_card_load_count
 
-    try:
-        # Aplicar a ordenação aqui
-        all_cids_full_list = mw.col.find_cards(search_query_final, order=db_sort_order)
-    except AttributeError: # Esta exceção já existia e é uma boa proteção
-        # Tenta usar tr() para a mensagem
-        try:
-            return f"<p>{tr('waiting_for_anki_collection_short')}</p>"
-        except Exception:
-            return "<p>Aguardando coleção do Anki...</p>"
+    render_key = (
+        search_query_final, current_sort_order_key, current_view_mode, current_gradient_field,
+        _session_current_display_limit, _get_collection_identity(), today_val, language,
+        current_binning, current_drilldown, current_sections,
+    )
+    return {
+        "overview_deck_name": overview_deck_name,
+        "config": config,
+        "today": today_val,
+        "day_cutoff": mw.col.sched.day_cutoff,
+        "sort_order_key": current_sort_order_key,
+        "view_mode": current_view_mode,
+        "gradient_field": current_gradient_field,
+        "binning": current_binning,
+        "drilldown": current_drilldown,
+        "sections": current_sections,
+        # Nomes dos decks, para ordenar as seções por deck
+        "deck_index": _get_deck_index() if current_sections == "deck" else None,
+        "search_query": search_query_final,
+        "deck_search": deck_search,
+        "card_filter": card_filter,
+        "filter_criteria": filter_criteria,
+        # Critérios que uma resposta ou uma edição de tags pode mudar (ver _filter_membership_unchanged)
+        "filter_depends_on_card_state": card_filter.depends_on_card_state(),
+        "filter_has_tags": bool(card_filter.tags),
+        "state_filter": _filter_menu_value(card_filter.states),
+        "tag_filter": _filter_menu_value(card_filter.tags),
+        "display_limit": _session_current_display_limit,
+        # Coleção aberta: chave do cache das estatísticas de erro (ordenações por erro)
+        "collection_identity": _get_collection_identity(),
+        "render_key": render_key,
+    }
 
-    total_cards_in_filter = len(all_cids_full_list)
+def _render_cache_key(view_state: dict) -> tuple:
+    """Chave do cache de grades: a chave da renderização, o config e a marca d'água da coleção.
 
-    # Aplicar o limite de exibição (paginação)
-    # Se _session_current_display_limit for float('inf'), significa mostrar todos
-    limit_for_slicing = _session_current_display_limit 
-    if limit_for_slicing == float('inf'):
-        # Não podemos fatiar com float('inf'), então usamos o tamanho total ou None para pegar tudo
-        limit_for_slicing = None 
-    
-    cids = all_cids_full_list[:limit_for_slicing] # Usa a lista fatiada para renderização
+    Calculada só quando a grade não pôde ser reaproveitada, evitando a consulta ao revlog
+    na volta do revisor.
+    """
+    return view_state["render_key"] + (_get_config_fingerprint(view_state["config"]), _get_collection_watermark())
 
-    card_count_displayed = len(cids) # Número de cartões realmente exibidos
+# Espaçamento para separar o addon do conteúdo acima
+_SPACING_HTML = '<div style="margin-top: 25px; border-top: 1px solid #e0e0e0; padding-top: 15px;"></div>'
 
-    # >>> PASSO 2: Otimizar busca da última data de revisão <<<
-    last_review_timestamps_map = {}
-    if cids:
-        # Busca todos os timestamps de uma vez
-        # O resultado é uma lista de tuplas (cid, timestamp_ms)
-        query_results = mw.col.db.all(
-            f"SELECT cid, MAX(id) FROM revlog WHERE cid IN ({ ', '.join(map(str, cids)) }) GROUP BY cid"
-        )
-        if query_results:
-            for cid_db, timestamp_ms in query_results:
-                if timestamp_ms:
-                    last_review_timestamps_map[cid_db] = timestamp_ms
-    # >>> FIM PASSO 2 <<<
 
+def _active_filter_description(view_state: dict) -> str:
+    """Descrição do filtro de baralho ativo, exibida no rodapé."""
+    overview_deck_name = view_state["overview_deck_name"]
+    memorymosaic_default_deck_filter = view_state["config"].get("memorymosaic_default_deck_filter")
+    if overview_deck_name:
+        return f'{tr("current_filter", filter=overview_deck_name)}'
+    if memorymosaic_default_deck_filter:
+        return f'{tr("current_filter", filter=memorymosaic_default_deck_filter)} ({tr("filter_subdecks")})'
+    return tr("all_decks")
+
+
+def _due_legend_item_html(config: dict, due_count_html: str) -> str:
+    """Item da legenda do indicador de vencidos hoje: um tile de amostra com o indicador no centro."""
+    tile_sample_size = 14
+    tile_border_color = config.get('tile_border_color')
+    due_dot_size = 6  # Tamanho menor para o indicador dentro do tile de amostra
+    due_indicator_color = config.get("due_indicator_color")
+
+    # Estilo do "cartão" de amostra (quadrado com borda)
+    tile_sample_style = f"display: inline-block; width: {tile_sample_size}px; height: {tile_sample_size}px; background-color: #EEEEEE; border: 1px solid {tile_border_color}; margin-right: 5px; vertical-align: middle; position: relative;"
+
+    # Estilo do indicador (ponto vermelho centralizado)
+    due_dot_style = f"position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); width: {due_dot_size}px; height: {due_dot_size}px; background-color: {due_indicator_color}; border-radius: 50%;"
+
+    return f'<span style="display: inline-flex; align-items: center; white-space: nowrap;"><span style="{tile_sample_style}"><span style="{due_dot_style}"></span></span>{tr("card_status_due")}: {due_count_html}</span>'
+
+
+def _grid_container_style(config: dict) -> str:
+    """Estilo do contêiner da grade (e de cada seção)."""
+    # Largura fixa para que o JS calcule as colunas; o padding é aplicado no posicionamento dos tiles
+    return (
+        f'position: relative; width: {config.get("grid_max_width_px")}px; max-width: 100%; box-sizing: border-box; '
+        f'overflow-x: hidden; overflow-y: auto; margin: 0px auto 15px auto;'
+    )
+
+
+def _filter_menus_html(view_state: dict, model: Any) -> str:
+    """Menus de estado e de tag (também sem cartões, para poder desfazer um filtro vazio)."""
+    return _filter_menu_html(
+        "memorymosaic-state-filter", tr("filter_state"), "onMemoryMosaicStateFilterChanged", view_state["state_filter"],
+        [(state, tr(f"card_status_{state}")) for state in FILTER_STATES],
+    ) + _filter_menu_html(
+        "memorymosaic-tag-filter", tr("filter_tag"), "onMemoryMosaicTagFilterChanged", view_state["tag_filter"],
+        [(tag, tag) for tag in model.all_tags],
+    )
+
+
+def _filter_criteria_html(view_state: dict) -> str:
+    """Critérios do filtro de cartões ativo, para o rodapé ("" sem filtro)."""
+    if not view_state["filter_criteria"]:
+        return ""
+    return f'<p style="margin: 3px 0;">{tr("filter_criteria", search=html.escape(view_state["filter_criteria"]))}</p>'
+
+
+def _drilldown_back_html(view_state: dict) -> str:
+    """Grupo aberto a partir do modo agrupado: botão para voltar aos grupos ("" fora do drill-down)."""
+    if view_state["drilldown"] is None:
+        return ""
+    return f'<button onclick="onMemoryMosaicCloseBin()" style="padding: 2px 10px; margin-left: 8px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;">{tr("bin_drilldown_back")}</button>'
+
+
+def _empty_grid_html(view_state: dict, model: Any, filter_menus_html: str, filter_criteria_html: str, drilldown_back_html: str) -> str:
+    """Página sem cartões exibidos: título, menus de filtro (se houver um filtro ativo), aviso e rodapé."""
+    grid_max_width_px = view_state["config"].get("grid_max_width_px")
+    display_limit = view_state["display_limit"]
+    total_cards_in_filter = model.total_cards
     title_html_no_cards = f'<h4 style="text-align: center; margin-bottom: 10px;">{tr("addon_title")}:</h4>' # Título para quando não há cards
+
+    # Mesmo se não há cartões exibidos, pode haver cartões no filtro total que seriam mostrados com "Mostrar Todos"
+    if total_cards_in_filter > 0 and display_limit != float('inf'):
+        message_no_cards = f'<p style="margin-top: 20px; margin-bottom: 15px; text-align: center;">{tr("no_cards_in_initial_load", count=total_cards_in_filter)}</p>'
+    else:
+        message_no_cards = f'<p style="margin-top: 20px; margin-bottom: 15px; text-align: center;">{tr("no_cards")}</p>'
     
-    if card_count_displayed == 0:
-        # Mesmo se não há cartões exibidos, pode haver cartões no filtro total que seriam mostrados com "Mostrar Todos"
-        if total_cards_in_filter > 0 and _session_current_display_limit != float('inf'):
-             message_no_cards = f'<p style="margin-top: 20px; margin-bottom: 15px; text-align: center;">{tr("no_cards_in_initial_load", count=total_cards_in_filter)}</p>'
-        else:
-            message_no_cards = f'<p style="margin-top: 20px; margin-bottom: 15px; text-align: center;">{tr("no_cards")}</p>'
-        
-        # Informações do filtro para o rodapé (mesmo sem cartões)
-        filter_info_footer_content_no_cards = ""
-        active_filter_description_no_cards = ""
-        if overview_deck_name:
-            active_filter_description_no_cards = f'{tr("current_filter", filter=overview_deck_name)}'
-        elif memorymosaic_default_deck_filter:
-            active_filter_description_no_cards = f'{tr("current_filter", filter=memorymosaic_default_deck_filter)} ({tr("filter_subdecks")})'
-        else:
-            active_filter_description_no_cards = tr("all_decks")
-        filter_info_footer_content_no_cards = f'<p style="margin: 3px 0;"><b>{tr("current_filter", filter="")}</b> {active_filter_description_no_cards}</p>'
-        
-        filter_info_footer_no_cards_html = f'''
+    # Informações do filtro para o rodapé (mesmo sem cartões)
+    filter_info_footer_content_no_cards = f'<p style="margin: 3px 0;"><b>{tr("current_filter", filter="")}</b> {_active_filter_description(view_state)}{drilldown_back_html}</p>'
+    filter_info_footer_content_no_cards += filter_criteria_html
+    
+    filter_info_footer_no_cards_html = f'''
 <div id="memorymosaic-filter-footer" style="text-align: center; margin-top: 0px; padding-top: 0px; font-size: 0.9em; max-width: {grid_max_width_px}px; margin-left: auto; margin-right: auto;">
     {filter_info_footer_content_no_cards}
 </div>
 '''
-        # Não há contagem de status se não há cartões
-        return spacing_html + title_html_no_cards + message_no_cards + filter_info_footer_no_cards_html
+    filter_controls_no_cards_html = ""
+    if view_state["filter_criteria"]:
+        filter_controls_no_cards_html = f'''
+<div style="display: flex; justify-content: center; align-items: center; flex-wrap: wrap; gap: 10px;">{filter_menus_html}
+</div>
+<script>
+    function onMemoryMosaicStateFilterChanged(value) {{
+        document.body.style.cursor = 'wait';
+        pycmd("memorymosaic_filter_state:" + value);
+    }}
+
+    function onMemoryMosaicTagFilterChanged(value) {{
+        document.body.style.cursor = 'wait';
+        pycmd("memorymosaic_filter_tag:" + value);
+    }}
+</script>
+'''
+    # Não há contagem de status se não há cartões
+    return _SPACING_HTML + title_html_no_cards + filter_controls_no_cards_html + message_no_cards + filter_info_footer_no_cards_html
+
+
+def _header_controls_html(view_state: dict, model: Any, filter_menus_html: str) -> str:
+    """Título e controles de ordenação, visualização, agrupamento, seções e filtros."""
+    config = view_state["config"]
+    current_view_mode = view_state["view_mode"]
+    sections = model.sections
 
     # Título e Controles de Ordenação e Visualização (agora com modo de visualização)
     title_and_controls_html = f'''
@@ -297,6 +917,9 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
             <option value="ivl_asc">{tr("sort_by_interval_asc")}</option>
             <option value="ivl_desc">{tr("sort_by_interval_desc")}</option>
             <option value="due_asc">{tr("sort_by_due_date")}</option>
+            <option value="failure_rate_desc">{tr("sort_by_failure_rate")}</option>
+            <option value="lapses_desc">{tr("sort_by_lapses")}</option>
+            <option value="recent_failures_desc">{tr("sort_by_recent_failures")}</option>
         </select>
     </div>
     
@@ -307,6 +930,25 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
             <option value="gradient">{tr("view_gradient")}</option>
         </select>
     </div>
+
+    <div style="margin-right: 15px;">
+        <label for="memorymosaic-binning" style="margin-right: 5px; font-weight: normal; font-size: 14px;">{tr("binning_mode")}:</label>
+        <select id="memorymosaic-binning" onchange="onMemoryMosaicBinningChanged(this.value)" style="padding: 5px; border-radius: 4px; border: 1px solid #ccc;"{" disabled" if sections is not None else ""}>
+            <option value="auto">{tr("binning_auto")}</option>
+            <option value="off">{tr("binning_off")}</option>
+            <option value="on">{tr("binning_on")}</option>
+        </select>
+    </div>
+
+    <div style="margin-right: 15px;">
+        <label for="memorymosaic-sections-mode" style="margin-right: 5px; font-weight: normal; font-size: 14px;">{tr("sections_mode")}:</label>
+        <select id="memorymosaic-sections-mode" onchange="onMemoryMosaicSectionsChanged(this.value)" style="padding: 5px; border-radius: 4px; border: 1px solid #ccc;">
+            <option value="none">{tr("sections_none")}</option>
+            <option value="deck">{tr("sections_deck")}</option>
+            <option value="tag">{tr("sections_tag")}</option>
+        </select>
+    </div>
+    {filter_menus_html}
     
     <div id="memorymosaic-gradient-field-container" style="display: {('block' if current_view_mode == 'gradient' else 'none')};">
         <label for="memorymosaic-gradient-field" style="margin-right: 5px; font-weight: normal; font-size: 14px;">{tr("gradient_field")}:</label>
@@ -319,238 +961,18 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
     </div>
 </div>
 '''
+    return title_and_controls_html
 
-    current_tile_size_px = tile_default_size_px 
-    current_tile_gap_px = tile_default_gap_px
-    
-    if card_count_displayed > 0:
-        ANKI_TABLE_CELL_PADDING_PX = 5 
-        TITLE_AREA_ESTIMATED_HEIGHT_PX = 35 
-
-        eff_grid_width = grid_max_width_px - (2 * ANKI_TABLE_CELL_PADDING_PX) - (2 * grid_padding_px)
-        eff_grid_height = (grid_max_height_px - 
-                           TITLE_AREA_ESTIMATED_HEIGHT_PX - 
-                           (2 * ANKI_TABLE_CELL_PADDING_PX) - 
-                           (2 * grid_padding_px))
 
-        eff_grid_height = max(eff_grid_height, tile_min_size_px) 
-
-        estimated_s_content = math.sqrt((eff_grid_width * eff_grid_height) / card_count_displayed) - (2 * TILE_BORDER_WIDTH_FIXED_PX + current_tile_gap_px)
-        estimated_s_content = math.floor(estimated_s_content)
-        
-        # Limitando o tamanho estimado entre o mínimo e o padrão
-        s_for_calc = min(tile_default_size_px, max(tile_min_size_px, estimated_s_content))
-        
-        final_s_content = s_for_calc  # Inicializa com o valor calculado, não com o mínimo
-        temp_s_content = s_for_calc
-        
-        while temp_s_content >= tile_min_size_px:
-            tile_visual_dim = temp_s_content + (2 * TILE_BORDER_WIDTH_FIXED_PX)
-            if (temp_s_content + current_tile_gap_px) <= 0: 
-                num_cols_css = 0
-            else:
-                num_cols_css = math.floor((eff_grid_width + current_tile_gap_px) / (temp_s_content + current_tile_gap_px))
-
-            if num_cols_css <= 0: 
-                temp_s_content -=1
-                continue
-
-            width_occupied_visual = num_cols_css * tile_visual_dim + max(0, num_cols_css - 1) * current_tile_gap_px
-            
-            if width_occupied_visual > eff_grid_width:
-                temp_s_content -= 1
-                continue 
-
-            num_rows_needed = math.ceil(card_count_displayed / num_cols_css)
-            height_occupied_visual = num_rows_needed * tile_visual_dim + max(0, num_rows_needed - 1) * current_tile_gap_px
-
-            if height_occupied_visual <= eff_grid_height:
-                final_s_content = temp_s_content 
-                break 
-            
-            temp_s_content -= 1
-        
-        current_tile_size_px = final_s_content
-    
-    due_indicator_color = config.get("due_indicator_color") # Padrão Vermelho
-    due_indicator_size_ratio = config.get("due_indicator_size_ratio") # Padrão 25%
-    calculated_due_indicator_size_px = max(1, math.floor(current_tile_size_px * due_indicator_size_ratio if due_indicator_size_ratio is not None and current_tile_size_px is not None else 1))
-
-    tile_size_px = current_tile_size_px
-    tile_gap_px = current_tile_gap_px 
-    due_indicator_size_px = calculated_due_indicator_size_px 
-
-    tiles_html_list = []
-    color_counts = {} # Inicializa o contador de cores
-    gradient_value_stats = {} # Estatísticas para o modo gradiente
-
-    # >>> INÍCIO DAS NOVAS ADIÇÕES PARA IVL DINÂMICO <<<
-    actual_min_ivl_for_norm: int | None = None
-    actual_max_ivl_for_norm: int | None = None
-    normalize_ivl_active = config.get("gradient_ivl_normalize") # Padrão True conforme config.md
-
-    if current_view_mode == "gradient" and current_gradient_field == "ivl" and normalize_ivl_active:
-        temp_min_ivl = float('inf')
-        temp_max_ivl = float('-inf')
-        found_any_ivl = False
-        for i_cid in cids: # Usar uma variável de loop diferente para não conflitar com 'cid' depois
-            card_obj = mw.col.get_card(i_cid)
-            if card_obj and card_obj.type != 0 and card_obj.queue not in [-1, -2, -3]:
-                # Considerar apenas cartões que efetivamente usarão o gradiente
-                temp_min_ivl = min(temp_min_ivl, card_obj.ivl)
-                temp_max_ivl = max(temp_max_ivl, card_obj.ivl)
-                found_any_ivl = True
-        
-        if found_any_ivl:
-            actual_min_ivl_for_norm = int(temp_min_ivl)
-            actual_max_ivl_for_norm = int(temp_max_ivl)
-        else:
-            # Fallback para config se nenhum cartão aplicável for encontrado
-            actual_min_ivl_for_norm = config.get("gradient_ivl_min")
-            actual_max_ivl_for_norm = config.get("gradient_ivl_max")
-        
-        # Garantir que min não seja maior que max, e que não sejam iguais para _get_gradient_color
-        if actual_min_ivl_for_norm is not None and actual_max_ivl_for_norm is not None:
-            if actual_min_ivl_for_norm > actual_max_ivl_for_norm: # Caso raro, mas possível se houver apenas um valor e ele for usado para ambos
-                 actual_max_ivl_for_norm = actual_min_ivl_for_norm 
-            # _get_gradient_color já trata min_val == max_val retornando a cor média
-    # >>> FIM DAS NOVAS ADIÇÕES PARA IVL DINÂMICO <<<
-
-    # >>> PASSO 3: Otimizar leitura de config para tooltip IVL (modo gradiente, campo ivl, normalização desligada) <<<
-    tooltip_config_min_ivl_for_gradient_tooltip: int | None = None
-    tooltip_config_max_ivl_for_gradient_tooltip: int | None = None
-    if current_view_mode == "gradient" and current_gradient_field == "ivl" and not (normalize_ivl_active and actual_min_ivl_for_norm is not None and actual_max_ivl_for_norm is not None):
-        tooltip_config_min_ivl_for_gradient_tooltip = config.get("gradient_ivl_min")
-        tooltip_config_max_ivl_for_gradient_tooltip = config.get("gradient_ivl_max")
-    # >>> FIM PASSO 3 <<<
-
-    for cid in cids: 
-        card = mw.col.get_card(cid)
-        
-        # Determinar a cor com base no modo de visualização
-        if current_view_mode == "gradient":
-            bg_color = "" # Inicializa bg_color
-            if current_gradient_field == "ivl":
-                min_limit_for_color = config.get("gradient_ivl_min")
-                max_limit_for_color = config.get("gradient_ivl_max")
-                if normalize_ivl_active and actual_min_ivl_for_norm is not None and actual_max_ivl_for_norm is not None:
-                    min_limit_for_color = actual_min_ivl_for_norm
-                    max_limit_for_color = actual_max_ivl_for_norm
-                
-                bg_color = _get_gradient_tile_color(card, current_gradient_field, config, today_val, ivl_min_override=min_limit_for_color, ivl_max_override=max_limit_for_color)
-            else:
-                # Para outros campos, não há overrides de ivl
-                bg_color = _get_gradient_tile_color(card, current_gradient_field, config, today_val)
-            
-            # Coletar estatísticas para o modo gradiente
-            if card and current_gradient_field in ["factor", "ivl", "lapses", "due"]:
-                field_value = 0
-                if current_gradient_field == "factor":
-                    field_value = card.factor
-                elif current_gradient_field == "ivl":
-                    field_value = card.ivl
-                elif current_gradient_field == "lapses":
-                    field_value = card.lapses
-                elif current_gradient_field == "due" and card.queue == 2:
-                    today = mw.col.sched.today
-                    field_value = max(0, card.due - today)
-                
-                # Agrupar valores para estatísticas simplificadas
-                if field_value not in gradient_value_stats:
-                    gradient_value_stats[field_value] = 0
-                gradient_value_stats[field_value] += 1
-        else:
-            bg_color = _get_tile_bg_color(card, config)
-        
-        color_counts[bg_color] = color_counts.get(bg_color, 0) + 1 # Incrementa a contagem da cor
-        
-        due_indicator_html = ""
-        if _should_show_due_indicator(card, config, today_val):
-            indicator_style = (
-                f"position: absolute; top: 50%; left: 50%; "
-                f"width: {due_indicator_size_px}px; height: {due_indicator_size_px}px; "
-                f"background-color: {due_indicator_color}; border-radius: 50%; " 
-                f"transform: translate(-50%, -50%); pointer-events: none;" 
-            )
-            due_indicator_html = f'<div style="{indicator_style}"></div>'
-
-        tooltip_parts = [tr("tooltip_card_id", cid=cid)]
-        if card:
-            deck_name = mw.col.decks.name(card.did)
-            tooltip_parts.append(tr("tooltip_deck", deck=deck_name))
-            
-            # last_review_str = _format_last_review_date(cid) # <--- REMOVIDO
-            last_rev_timestamp_ms = last_review_timestamps_map.get(cid)
-            if last_rev_timestamp_ms:
-                last_rev_dt = datetime.fromtimestamp(last_rev_timestamp_ms / 1000)
-                last_review_str = last_rev_dt.strftime("%Y-%m-%d %H:%M")
-            else:
-                last_review_str = "N/A"
-
-            if last_review_str == "N/A":
-                tooltip_parts.append(tr("tooltip_never_reviewed"))
-            else:
-                tooltip_parts.append(tr("tooltip_last_review", date=last_review_str))
-            tooltip_parts.append(tr("tooltip_due", due=card.due))
-            tooltip_parts.append(tr("tooltip_queue", queue=card.queue))
-            tooltip_parts.append(tr("tooltip_type", type=card.type))
-            tooltip_parts.append(tr("tooltip_interval", interval=card.ivl))
-            tooltip_parts.append(tr("tooltip_factor", factor=card.factor))
-            
-            # Adicionar informações específicas do gradiente se no modo gradiente
-            if current_view_mode == "gradient":
-                if current_gradient_field == "factor":
-                    tooltip_parts.append(tr("gradient_tooltip_value", value=card.factor))
-                    tooltip_parts.append(tr("gradient_tooltip_range", min=config.get("gradient_factor_min"), max=config.get("gradient_factor_max")))
-                elif current_gradient_field == "ivl":
-                    tooltip_parts.append(tr("gradient_tooltip_value", value=card.ivl))
-                    
-                    # normalize_ivl_active e actual_min/max_ivl_for_norm já foram definidos anteriormente
-                    if normalize_ivl_active and actual_min_ivl_for_norm is not None and actual_max_ivl_for_norm is not None:
-                        # Usar a faixa dinâmica para o tooltip
-                        tooltip_parts.append(tr("gradient_tooltip_range", min=actual_min_ivl_for_norm, max=actual_max_ivl_for_norm))
-                        # Não é necessário (valor real: X) aqui, pois a cor e a faixa refletem o conjunto de dados
-                    else:
-                        # Usar a faixa do config para o tooltip
-                        tooltip_parts.append(tr("gradient_tooltip_range", min=tooltip_config_min_ivl_for_gradient_tooltip, max=tooltip_config_max_ivl_for_gradient_tooltip))
-                        # Se o valor real do cartão estiver fora da faixa de config (e não estamos normalizando dinamicamente),
-                        # adicionar uma nota com o valor real.
-                        if card.ivl < tooltip_config_min_ivl_for_gradient_tooltip or card.ivl > tooltip_config_max_ivl_for_gradient_tooltip:
-                            tooltip_parts.append(tr("gradient_normalized_value", real=card.ivl))
-                            
-                elif current_gradient_field == "lapses":
-                    tooltip_parts.append(tr("gradient_tooltip_value", value=card.lapses))
-                    tooltip_parts.append(tr("gradient_tooltip_range", min=config.get("gradient_lapses_min"), max=config.get("gradient_lapses_max")))
-                elif current_gradient_field == "due" and card.queue == 2:
-                    # today = mw.col.sched.today # <--- REMOVIDO, usar today_val
-                    days_until_due = max(0, card.due - today_val) # <--- USADO today_val
-                    tooltip_parts.append(tr("gradient_tooltip_value", value=days_until_due))
-                    tooltip_parts.append(tr("gradient_tooltip_range", min=config.get("gradient_due_min"), max=config.get("gradient_due_max")))
-                    
-        title_tooltip = "&#10;".join(tooltip_parts)
-
-        border_color_from_config = config.get('tile_border_color') # Padrão Cinza
-        # A largura da borda é 1px, conforme TILE_BORDER_WIDTH_FIXED_PX. O estilo CSS reflete isso.
-        tile_style = (
-            f"position: relative; width: {tile_size_px}px; height: {tile_size_px}px; "
-            f"background-color: {bg_color}; border: {TILE_BORDER_WIDTH_FIXED_PX}px solid {border_color_from_config};"
-        )
-
-        tile_html = (
-            f'<div class="memorymosaic-tile" data-cid="{cid}" title="{title_tooltip}" style="{tile_style}" onclick="onMemoryMosaicTileClick({cid})">'
-            f'{due_indicator_html}' 
-            f'</div>'
-        )
-        tiles_html_list.append(tile_html)
-    
-    all_tiles_html = "".join(tiles_html_list)
-
-    grid_container_style = (
-        f'display: grid; grid-template-columns: repeat(auto-fit, {tile_size_px}px); '
-        f'gap: {tile_gap_px}px; margin-top: 0px; margin-bottom: 15px;'
-        f'padding: {grid_padding_px}px; max-width: {grid_max_width_px}px; max-height: {grid_max_height_px}px; '
-        f'overflow: auto; justify-content: center; align-content: center;'
-    )
+def _summary_html(view_state: dict, model: Any) -> str:
+    """Sumário de cores (modo categórico) ou legenda do gradiente, com a legenda dos vencidos hoje."""
+    config = view_state["config"]
+    grid_max_width_px = config.get("grid_max_width_px")
+    current_view_mode = view_state["view_mode"]
+    current_gradient_field = view_state["gradient_field"]
+    gradient_lut = model.gradient_lut
+    color_counts = model.color_counts
+    due_count_html = f'<span id="memorymosaic-due-count">{model.due_today_count}</span>' # Atualizado pelos patches ao vivo
 
     # Mapeamento de cores para rótulos do sumário
     color_to_label_map = {
@@ -562,23 +984,6 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         config.get("color_default_bg"): tr("card_status_default")
     }
 
-    # Informação do filtro para o rodapé
-    filter_info_footer_content = ""
-    active_filter_description = ""
-    if overview_deck_name:
-        active_filter_description = f'{tr("current_filter", filter=overview_deck_name)}'
-    elif memorymosaic_default_deck_filter:
-        active_filter_description = f'{tr("current_filter", filter=memorymosaic_default_deck_filter)} ({tr("filter_subdecks")})'
-    else:
-        active_filter_description = tr("all_decks")
-    filter_info_footer_content = f'<p style="margin: 3px 0;"><b>{tr("showing")}:</b> {active_filter_description} ({tr("cards_shown_of_total", count_shown=card_count_displayed, count_total=total_cards_in_filter)})</p>'
-
-    filter_info_footer_html = f'''
-<div id="memorymosaic-filter-footer" style="text-align: center; margin-top: 0px; padding-top: 0px; font-size: 0.9em; max-width: {grid_max_width_px}px; margin-left: auto; margin-right: auto;">
-    {filter_info_footer_content}
-</div>
-'''
-
     # Sumário de cores para o modo categórico
     color_summary_container_html = ""
     if current_view_mode == "categorical":
@@ -591,24 +996,12 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         for color_hex, count in sorted_colors:
             label = color_to_label_map.get(color_hex, f"Cor Desconhecida ({color_hex})")
             color_swatch_style = f"display: inline-block; width: 12px; height: 12px; background-color: {color_hex}; border: 1px solid #888; margin-right: 5px; vertical-align: middle;"
-            color_summary_items_html_parts.append(f'<span style="display: inline-flex; align-items: center; white-space: nowrap;"><span style="{color_swatch_style}"></span>{label}: {count}</span>')
-        
-        # Adicionar legenda para o indicador de cartões devidos hoje        
-        if config.get("show_due_indicator"):            
-            # Criamos um quadrado para simular o cartão com o indicador no centro            
-            tile_sample_size = 14            
-            tile_border_color = config.get('tile_border_color')            
-            due_dot_size = 6  # Tamanho menor para o indicador dentro do tile de amostra
-            
-            # Estilo do "cartão" de amostra (quadrado com borda)            
-            tile_sample_style = f"display: inline-block; width: {tile_sample_size}px; height: {tile_sample_size}px; background-color: #EEEEEE; border: 1px solid {tile_border_color}; margin-right: 5px; vertical-align: middle; position: relative;"
-            
-            # Estilo do indicador (ponto vermelho centralizado)            
-            due_dot_style = f"position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); width: {due_dot_size}px; height: {due_dot_size}px; background-color: {due_indicator_color}; border-radius: 50%;"
-            
-            # Adiciona o item à lista com o tile contendo o indicador            
-            color_summary_items_html_parts.append(f'<span style="display: inline-flex; align-items: center; white-space: nowrap;"><span style="{tile_sample_style}"><span style="{due_dot_style}"></span></span>{tr("card_status_due")}</span>')
+            color_summary_items_html_parts.append(f'<span style="display: inline-flex; align-items: center; white-space: nowrap;"><span style="{color_swatch_style}"></span>{label}: <span class="memorymosaic-summary-count" data-color="{color_hex}">{count}</span></span>')
         
+        # Adicionar legenda para o indicador de cartões devidos hoje
+        if config.get("show_due_indicator"):
+            color_summary_items_html_parts.append(_due_legend_item_html(config, due_count_html))
+
         color_summary_items_html = ' ' .join(color_summary_items_html_parts) # Espaço entre itens
 
         color_summary_container_html = f'''
@@ -630,31 +1023,24 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         if current_gradient_field == "lapses": # Lapses: menor é melhor por padrão
             default_order_legend = "desc"
         field_order_legend = config.get(order_config_key_legend)
-        # Agora field_order_legend pode ser usado para o texto e para as cores da barra
+        # Agora field_order_legend pode ser usado para o texto (as cores da barra vêm da paleta)
 
         field_order_for_legend_text = field_order_legend # Usar a ordem determinada para o texto
         
         if current_gradient_field == "factor":
-            min_val = config.get("gradient_factor_min")
-            max_val = config.get("gradient_factor_max")
             gradient_field_label = tr("gradient_field_factor")
         elif current_gradient_field == "ivl":
             gradient_field_label = tr("gradient_field_ivl")
-            if normalize_ivl_active and actual_min_ivl_for_norm is not None and actual_max_ivl_for_norm is not None:
-                min_val = actual_min_ivl_for_norm
-                max_val = actual_max_ivl_for_norm
+            if model.gradient_ivl_range[2]:
                 gradient_field_label += f" {tr('legend_dynamic_scale')}" # Adiciona (escala dinâmica)
-            else:
-                min_val = config.get("gradient_ivl_min")
-                max_val = config.get("gradient_ivl_max")
         elif current_gradient_field == "lapses":
-            min_val = config.get("gradient_lapses_min")
-            max_val = config.get("gradient_lapses_max")
             gradient_field_label = tr("gradient_field_lapses")
         elif current_gradient_field == "due":
-            min_val = config.get("gradient_due_min")
-            max_val = config.get("gradient_due_max")
             gradient_field_label = tr("gradient_field_due")
+        # A faixa da legenda é a mesma da paleta usada nos tiles
+        if gradient_lut is not None:
+            min_val = gradient_lut["min"]
+            max_val = gradient_lut["max"]
 
         # Adicionar indicador de "melhor" para a legenda
         if field_order_for_legend_text == "asc":
@@ -662,22 +1048,16 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         elif field_order_for_legend_text == "desc":
             gradient_field_label += f" {tr('legend_lower_is_better')}"
             
-        # Cores do gradiente para a legenda
-        display_start_color = config.get("gradient_color_start")
-        display_mid_color = config.get("gradient_color_mid")
-        display_end_color = config.get("gradient_color_end")
-        
-        # field_order_legend já foi definido acima
-        if field_order_legend == "desc":
-            # Inverter as cores para a legenda se a ordem for descendente
-            display_start_color, display_end_color = display_end_color, display_start_color
-            # A cor do meio permanece a mesma, pois a inversão é entre start e end
+        # A barra da legenda é amostrada da mesma paleta (já invertida se a ordem for descendente)
+        legend_gradient_css = _get_gradient_lut_css(gradient_lut) if gradient_lut is not None else (
+            f'{config.get("gradient_color_start")}, {config.get("gradient_color_mid")}, {config.get("gradient_color_end")}'
+        )
 
         # Criar uma legenda de gradiente
         gradient_legend_html = f'''
 <div style="max-width: {grid_max_width_px}px; margin-left: auto; margin-right: auto; margin-bottom: 5px; padding: 8px 0; display: flex; flex-direction: column; align-items: center; font-size: 0.9em;">
     <p style="font-weight: bold; margin: 0 0 5px 0;">{tr("summary_title")}: {gradient_field_label} ({min_val} - {max_val})</p>
-    <div style="width: 80%; max-width: 400px; height: 20px; background: linear-gradient(to right, {display_start_color}, {display_mid_color}, {display_end_color}); border-radius: 3px; margin-bottom: 3px;"></div>
+    <div style="width: 80%; max-width: 400px; height: 20px; background: linear-gradient(to right, {legend_gradient_css}); border-radius: 3px; margin-bottom: 3px;"></div>
     <div style="display: flex; justify-content: space-between; width: 80%; max-width: 400px;">
         <span>{min_val}</span>
         <span>{(min_val + max_val) // 2}</span>
@@ -689,38 +1069,153 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         
         # Adicionar legenda para o indicador de cartões devidos hoje no modo gradiente, se estiver ativado
         if config.get("show_due_indicator"):
-            # Criamos um quadrado para simular o cartão com o indicador no centro            
-            tile_sample_size = 14            
-            tile_border_color = config.get('tile_border_color')            
-            due_dot_size = 6  # Tamanho menor para o indicador dentro do tile de amostra
-            
-            # Estilo do "cartão" de amostra (quadrado com borda)            
-            tile_sample_style = f"display: inline-block; width: {tile_sample_size}px; height: {tile_sample_size}px; background-color: #EEEEEE; border: 1px solid {tile_border_color}; margin-right: 5px; vertical-align: middle; position: relative;"
-            
-            # Estilo do indicador (ponto vermelho centralizado)            
-            due_dot_style = f"position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); width: {due_dot_size}px; height: {due_dot_size}px; background-color: {due_indicator_color}; border-radius: 50%;"
-            
             due_indicator_legend_html = f'''
 <div style="text-align: center; margin-top: 0px; max-width: {grid_max_width_px}px; margin-left: auto; margin-right: auto; font-size: 0.9em;">
-    <span style="display: inline-flex; align-items: center; white-space: nowrap;"><span style="{tile_sample_style}"><span style="{due_dot_style}"></span></span>{tr("card_status_due")}</span>
+    {_due_legend_item_html(config, due_count_html)}
 </div>
 '''
             color_summary_container_html += due_indicator_legend_html
+    return color_summary_container_html
+
+
+def _grid_content_html(view_state: dict, model: Any, profile: RenderProfile | None) -> str:
+    """Contêiner da grade (canvas, DOM virtualizado ou seções) e os scripts que a desenham."""
+    config = view_state["config"]
+    grid_max_width_px = config.get("grid_max_width_px")
+    sections = model.sections
+    due_indicator_color = config.get("due_indicator_color") # Padrão Vermelho
+    grid_container_style = _grid_container_style(config)
+
+    # Medições da página (memorymosaic_profiling): o script vem antes dos demais para marcar o início deles
+    profile_script_html = ""
+    renderer_init = "MemoryMosaicCanvas.init" if model.use_canvas else "MemoryMosaicDomGrid.init"
+    if profile is not None:
+        profile_script_html = f'<script>{_read_web_asset("mosaic_profile.js")}</script>'
+        renderer_init = f"MemoryMosaicProfile.timedInit({renderer_init})"
+    if sections is not None:
+        # Seções: o JS monta os cabeçalhos; a grade de cada seção é pedida ao Python quando aberta
+        if profile is not None:
+            sections_init = "MemoryMosaicProfile.timedInit(MemoryMosaicSections.init)"
+        else:
+            sections_init = "MemoryMosaicSections.init"
+        sections_settings = {
+            "sections": [
+                [_section_label(sections.mode, key, view_state), sections.sizes[index], sections.counts(index), sections.due_counts[index]]
+                for index, key in enumerate(sections.keys)
+            ],
+            "categories": [[config.get(color_key), tr(label_key)] for color_key, label_key in zip(CATEGORY_COLOR_KEYS, _CATEGORY_LABEL_KEYS)],
+            "dueColor": due_indicator_color,
+            "dueLabel": tr("card_status_due"),
+            "showDue": bool(config.get("show_due_indicator")),
+            "containerStyle": grid_container_style,
+        }
+        grid_html_content = (
+            f'<div id="memorymosaic-sections" style="width: {grid_max_width_px}px; max-width: 100%; margin: 0px auto 15px auto;"></div>'
+            f'{profile_script_html}'
+            f'<script>{_read_web_asset("mosaic_tooltip.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_payload.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_fit.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_canvas.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_live.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_sections.js")}</script>'
+            f'<script>{sections_init}({_json_for_script(sections_settings)});</script>'
+        )
+    elif model.use_canvas:
+        grid_html_content = (
+            f'<div id="memorymosaic-grid-container" style="{grid_container_style}">'
+            f'<canvas class="memorymosaic-canvas" style="display: block; position: sticky; top: 0px;"></canvas>'
+            f'<div class="memorymosaic-canvas-spacer"></div>'
+            f'</div>'
+            f'{profile_script_html}'
+            f'<script>{_read_web_asset("mosaic_tooltip.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_payload.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_fit.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_canvas.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_live.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_stream.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_timelapse.js")}</script>'
+            f'<script>MemoryMosaicPayload.load({_json_for_script(model.tile_model)}, {renderer_init});</script>'
+        )
+    else:
+        # Grade DOM virtualizada: só as linhas visíveis viram elementos
+        grid_html_content = (
+            f'<div id="memorymosaic-grid-container" style="{grid_container_style}">'
+            f'<div class="memorymosaic-dom-sizer" style="position: relative;"></div>'
+            f'</div>'
+            f'{profile_script_html}'
+            f'<script>{_read_web_asset("mosaic_tooltip.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_payload.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_fit.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_dom_grid.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_live.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_stream.js")}</script>'
+            f'<script>{_read_web_asset("mosaic_timelapse.js")}</script>'
+            f'<script>MemoryMosaicPayload.load({_json_for_script(model.tile_model)}, {renderer_init});</script>'
+            f'<script>MemoryMosaicTooltip.bindDomGrid(document.getElementById("memorymosaic-grid-container"));</script>'
+        )
+    return grid_html_content
+
 
-    grid_html_content = f'<div id="memorymosaic-grid-container" style="{grid_container_style}">{all_tiles_html}</div>'
+def _pagination_html(view_state: dict, model: Any) -> str:
+    """Botões Mostrar Mais / Mostrar Todos ("" quando todos os cartões já estão na grade)."""
+    display_limit = view_state["display_limit"]
+    incremental_card_load_count = view_state["config"].get("incremental_card_load_count")
+    total_cards_in_filter = model.total_cards
+    card_count_displayed = model.card_count_displayed
 
     # Botões de Paginação
     pagination_buttons_html = ""
-    if _session_current_display_limit != float('inf') and total_cards_in_filter > card_count_displayed:
+    if display_limit != float('inf') and total_cards_in_filter > card_count_displayed:
         load_more_count = min(incremental_card_load_count, total_cards_in_filter - card_count_displayed)
         btn_show_more_text = tr("pagination_show_more", count=load_more_count)
         btn_show_all_text = tr("pagination_show_all", count=total_cards_in_filter)
 
         pagination_buttons_html = f'''
 <div id="memorymosaic-pagination-controls" style="text-align: center; margin-top: 15px; margin-bottom: 10px;">
-    <button onclick="onMemoryMosaicLoadMore()" style="padding: 8px 15px; margin-right: 10px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;">{btn_show_more_text}</button>
-    <button onclick="onMemoryMosaicLoadAll()" style="padding: 8px 15px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;">{btn_show_all_text}</button>
+    <button id="memorymosaic-load-more" onclick="onMemoryMosaicLoadMore()" style="padding: 8px 15px; margin-right: 10px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;">{btn_show_more_text}</button>
+    <button id="memorymosaic-load-all" onclick="onMemoryMosaicLoadAll()" style="padding: 8px 15px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;">{btn_show_all_text}</button>
 </div>'''
+    return pagination_buttons_html
+
+
+def _filter_footer_html(view_state: dict, model: Any, filter_criteria_html: str, drilldown_back_html: str) -> str:
+    """Rodapé: filtro ativo, contagem exibida, exportação e linha do tempo."""
+    grid_max_width_px = view_state["config"].get("grid_max_width_px")
+    drilldown = view_state["drilldown"]
+    total_cards_in_filter = model.total_cards
+    card_count_displayed = model.card_count_displayed
+    bin_accumulator = model.bins
+    sections = model.sections
+
+    # Informação do filtro para o rodapé
+    active_filter_description = _active_filter_description(view_state)
+    count_shown_html = f'<span id="memorymosaic-count-shown">{card_count_displayed}</span>' # Atualizado pelo carregamento progressivo
+    export_button_html = f'<button onclick="onMemoryMosaicExport()" style="padding: 2px 10px; margin-left: 8px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;">{tr("export_button")}</button>'
+    if bin_accumulator is None and sections is None:
+        # A linha do tempo reconstrói cartões (de uma só grade), não grupos: indisponível no modo agrupado e nas seções
+        export_button_html += f'<button onclick="MemoryMosaicTimeLapse.open()" style="padding: 2px 10px; margin-left: 8px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;">{tr("timelapse_button")}</button>'
+    filter_info_footer_content = f'<p style="margin: 3px 0;"><b>{tr("showing")}:</b> {active_filter_description} ({tr("cards_shown_of_total", count_shown=count_shown_html, count_total=total_cards_in_filter)}){export_button_html}</p>'
+    if bin_accumulator is not None:
+        filter_info_footer_content += f'<p style="margin: 3px 0;">{tr("binned_footer", size=model.bin_size, tiles=bin_accumulator.bin_count)}</p>'
+    elif drilldown is not None:
+        drilldown_range_text = tr("bin_drilldown_footer", first=drilldown[0] + 1, last=drilldown[0] + total_cards_in_filter)
+        filter_info_footer_content += f'<p style="margin: 3px 0;">{drilldown_range_text}{drilldown_back_html}</p>'
+    filter_info_footer_content += filter_criteria_html
+
+    filter_info_footer_html = f'''
+<div id="memorymosaic-filter-footer" style="text-align: center; margin-top: 0px; padding-top: 0px; font-size: 0.9em; max-width: {grid_max_width_px}px; margin-left: auto; margin-right: auto;">
+    {filter_info_footer_content}
+</div>
+'''
+    return filter_info_footer_html
+
+
+def _page_script_html(view_state: dict, model: Any) -> str:
+    """Script dos controles da página (pycmd de cada controle e valores iniciais dos menus)."""
+    current_sort_order_key = view_state["sort_order_key"]
+    current_view_mode = view_state["view_mode"]
+    current_gradient_field = view_state["gradient_field"]
+    bin_accumulator = model.bins
 
     script_html = f"""
 <script>
@@ -730,11 +1225,45 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
     let currentSortOrder = '{current_sort_order_key}'; // Injetado pelo Python
     let currentViewMode = '{current_view_mode}'; // Modo de visualização atual
     let currentGradientField = '{current_gradient_field}'; // Campo de gradiente atual
+    let currentBinning = '{view_state["binning"]}'; // Modo agrupado: auto, on ou off
+    let currentSections = '{view_state["sections"]}'; // Seções: none, deck ou tag
+    let memoryMosaicBinned = {'true' if bin_accumulator is not None else 'false'}; // Tiles são grupos de cartões
 
     function onMemoryMosaicTileClick(cid) {{
+        if (memoryMosaicBinned) {{
+            // No modo agrupado, o "cid" do tile é o índice do grupo: abre os seus cartões
+            document.body.style.cursor = 'wait';
+            pycmd("memorymosaic_open_bin:" + cid);
+            return;
+        }}
         pycmd("memorymosaic_open_card:" + cid);
     }}
 
+    function onMemoryMosaicStateFilterChanged(value) {{
+        document.body.style.cursor = 'wait';
+        pycmd("memorymosaic_filter_state:" + value);
+    }}
+
+    function onMemoryMosaicTagFilterChanged(value) {{
+        document.body.style.cursor = 'wait';
+        pycmd("memorymosaic_filter_tag:" + value);
+    }}
+
+    function onMemoryMosaicBinningChanged(newBinning) {{
+        document.body.style.cursor = 'wait';
+        pycmd("memorymosaic_binning_change:" + newBinning);
+    }}
+
+    function onMemoryMosaicSectionsChanged(newSections) {{
+        document.body.style.cursor = 'wait';
+        pycmd("memorymosaic_sections_change:" + newSections);
+    }}
+
+    function onMemoryMosaicCloseBin() {{
+        document.body.style.cursor = 'wait';
+        pycmd("memorymosaic_close_bin");
+    }}
+
     function onMemoryMosaicSortOrderChanged(newSortOrder) {{
         document.body.style.cursor = 'wait'; // Muda o cursor para ampulheta
         pycmd("memorymosaic_sort_change:" + newSortOrder);
@@ -766,6 +1295,10 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         pycmd("memorymosaic_load_all");
     }}
 
+    function onMemoryMosaicExport() {{
+        pycmd("memorymosaic_export");
+    }}
+
     function setMemoryMosaicSortOrderDropdown(sortOrderToSet) {{
         const selectElement = document.getElementById('memorymosaic-sort-order');
         if (selectElement) {{
@@ -807,14 +1340,472 @@ def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str
         if (document.getElementById('memorymosaic-gradient-field')) {{
             setMemoryMosaicGradientFieldDropdown(currentGradientField);
         }}
+        if (document.getElementById('memorymosaic-binning')) {{
+            document.getElementById('memorymosaic-binning').value = currentBinning;
+        }}
+        if (document.getElementById('memorymosaic-sections-mode')) {{
+            document.getElementById('memorymosaic-sections-mode').value = currentSections;
+        }}
     }})();
 </script>
 """
+    return script_html
+
+
+def _build_render_state(view_state: dict, model: Any, page_html: str, profile: RenderProfile | None) -> dict:
+    """Estado da renderização a ser registrado por _commit_render_state."""
+    # Estado registrado por _commit_render_state: serve de contexto para os tooltips sob demanda
+    # e para atualizar tiles individualmente na próxima renderização
+    render_state = {
+        "key": view_state["render_key"],
+        "html": page_html,
+        "snapshot": model.snapshot,
+        "config": view_state["config"],
+        "view_mode": view_state["view_mode"],
+        "gradient_field": view_state["gradient_field"],
+        "today": view_state["today"],
+        "ivl_color_limits": model.ivl_color_limits,
+        "gradient_lut": model.gradient_lut,
+        "gradient_ivl_range": model.gradient_ivl_range,
+        "ivl_range_is_dynamic": model.gradient_ivl_range[2],
+        "color_counts": model.color_counts,
+        "due_today_count": model.due_today_count,
+        "last_review_timestamps_map": model.last_review_timestamps_map,
+        "patched_tiles": {},
+        "filter_depends_on_card_state": view_state["filter_depends_on_card_state"],
+        "filter_has_tags": view_state["filter_has_tags"],
+        "deck_search": view_state["deck_search"],
+        "card_filter": view_state["card_filter"],
+        # Usados pelo carregamento progressivo (Mostrar Mais / Mostrar Todos)
+        "overview_deck_name": view_state["overview_deck_name"],
+        "all_cids": model.all_cids,
+        # Modo agrupado: estatísticas dos grupos (tooltips e drill-down); None com um tile por cartão
+        "bins": model.bins,
+        # Seções: mini-sumários e linhas das seções já abertas (em "snapshot", que cresce a cada
+        # seção lida); o modelo dos tiles serve para montar cada seção aberta. None na grade única
+        "sections": model.sections,
+        "tile_model": model.tile_model if model.sections is not None else None,
+        # Medições das fases desta renderização (None com memorymosaic_profiling desligado)
+        "profile": profile,
+    }
+    return render_state
+
+
+def _compute_memorymosaic_grid_html(view_state: dict, col: Any) -> tuple[str, dict | None]:
+    """Renderiza o HTML para a grade de tiles com base nos cartões da coleção `col`,
+       filtrados opcionalmente por MEMORYMOSAIC_DEFAULT_DECK_FILTER ou overview_deck_name.
+
+       Os dados da grade (inclusive as tags do menu de filtro) vêm do núcleo independente
+       do Anki (render_engine.compute_render_model); aqui só é montado o HTML. Não usa
+       `mw.col` nem altera o estado de sessão: em segundo plano, `col` é a coleção passada
+       pela QueryOp. Retorna o HTML e o estado da renderização a ser registrado por
+       _commit_render_state (None se não há grade)."""
+    config = view_state["config"]
+    # Medição das fases (memorymosaic_profiling); None quando desligada
+    profile = RenderProfile() if config.get("memorymosaic_profiling") else None
+    compute_started = time.perf_counter()
+
+    model = compute_render_model(col, config, view_state, profile)
+    if model is None:
+        # Tenta usar tr() para a mensagem
+        try:
+            return f"<p>{tr('waiting_for_anki_collection_short')}</p>", None
+        except Exception:
+            return "<p>Aguardando coleção do Anki...</p>", None
+
+    filter_menus_html = _filter_menus_html(view_state, model)
+    filter_criteria_html = _filter_criteria_html(view_state)
+    drilldown_back_html = _drilldown_back_html(view_state)
+    if model.card_count_displayed == 0:
+        # Não há contagem de status se não há cartões
+        return _empty_grid_html(view_state, model, filter_menus_html, filter_criteria_html, drilldown_back_html), None
+
+    page_html = (
+        _SPACING_HTML
+        + _header_controls_html(view_state, model, filter_menus_html)
+        + _summary_html(view_state, model)
+        + _grid_content_html(view_state, model, profile)
+        + _pagination_html(view_state, model)
+        + _filter_footer_html(view_state, model, filter_criteria_html, drilldown_back_html)
+        + _page_script_html(view_state, model)
+    )
+    render_state = _build_render_state(view_state, model, page_html, profile)
+    if profile is not None:
+        profile.finish_computation(time.perf_counter() - compute_started, model.tile_count)
+    return page_html, render_state
+
+def _reuse_render(view_state: dict, started: float) -> tuple[str | None, tuple | None]:
+    """Tenta exibir a grade sem calculá-la: atualização incremental ou cache de grades.
+
+    Retorna (HTML, None) quando a grade foi reaproveitada, ou (None, chave do cache) quando
+    ela precisa ser calculada; cada chamador escolhe então entre o cálculo síncrono e o QueryOp.
+    """
+    incremental_html = _try_incremental_render(view_state["render_key"])
+    if incremental_html is not None:
+        _record_render_profile("incremental", started, _session_last_render)
+        return incremental_html, None
+
+    cache_key = _render_cache_key(view_state)
+    cached_result = _render_cache_get(cache_key)
+    if cached_result is not None:
+        _record_render_profile("cache", started, cached_result[1])
+        return _use_render_result(cached_result), None
+    return None, cache_key
+
+def _render_memorymosaic_grid_html(overview_deck_name: str | None = None) -> str:
+    """Renderiza a grade de forma síncrona (na thread atual) e registra o estado da renderização."""
+    view_state = _resolve_render_view_state(overview_deck_name)
+    if isinstance(view_state, str):
+        return view_state
+
+    started = time.perf_counter()
+    reused_html, cache_key = _reuse_render(view_state, started)
+    if reused_html is not None:
+        return reused_html
+
+    result = _compute_memorymosaic_grid_html(view_state, mw.col)
+    _render_cache_put(cache_key, result)
+    _record_render_profile("computed", started, result[1], computed=True)
+    return _use_render_result(result)
+
+def _extend_render_state(render_state: dict, extension: CardSnapshot, last_reviews: dict[int, int], new_key: tuple) -> tuple[dict, list] | None:
+    """Cria o estado da grade com os tiles de `extension` acrescentados ao final.
+
+    Retorna (novo estado, tiles [[cid, cor, vencido], ...]) ou None quando os novos cartões
+    não podem ser simplesmente anexados (escala dinâmica de ivl ou cor sem entrada no sumário).
+    O estado original não é alterado, pois pode estar no cache de grades.
+    """
+    config = render_state["config"]
+    view_mode = render_state["view_mode"]
+    gradient_field = render_state["gradient_field"]
+    today_val = render_state["today"]
+    ivl_color_limits = render_state["ivl_color_limits"]
+    gradient_lut = render_state["gradient_lut"]
+    color_counts = render_state["color_counts"] # Já conta todo o filtro, inclusive os cartões anexados
+
+    tiles = []
+    for row, cid in enumerate(extension.cids):
+        if render_state["ivl_range_is_dynamic"] and extension.present[row] and extension.type[row] != 0 and extension.queue[row] not in (-1, -2, -3):
+            if not ivl_color_limits[0] <= extension.ivl[row] <= ivl_color_limits[1]:
+                return None # A escala dinâmica mudaria para toda a grade
+        color = tile_color(extension, row, config, view_mode, gradient_field, today_val, gradient_lut)
+        if view_mode == "categorical" and color not in color_counts:
+            return None # O sumário não tem entrada para esta cor
+        tiles.append([cid, color, bool(config.get("show_due_indicator")) and is_due_today(extension, row, today_val)])
+
+    last_review_timestamps_map = dict(render_state["last_review_timestamps_map"])
+    last_review_timestamps_map.update(last_reviews)
+    extended_state = dict(
+        render_state,
+        key=new_key,
+        html=None,
+        snapshot=render_state["snapshot"].concatenated(extension),
+        color_counts=dict(color_counts),
+        last_review_timestamps_map=last_review_timestamps_map,
+        patched_tiles=dict(render_state["patched_tiles"]),
+    )
+    return extended_state, tiles
+
+def _send_streamed_tiles(render_state: dict, tiles: list, shown_before: int) -> None:
+    """Envia os novos tiles à página em lotes via web.eval; o JS os anexa em tempo ocioso."""
+    mw.web.eval(f"MemoryMosaicStream.begin({_json_for_script({'shownBefore': shown_before})});")
+    for start in range(0, len(tiles), _STREAM_CHUNK_TILES):
+        mw.web.eval(f"MemoryMosaicStream.enqueue({_json_for_script(tiles[start:start + _STREAM_CHUNK_TILES])});")
+
+    total_cards_in_filter = len(render_state["all_cids"])
+    remaining = total_cards_in_filter - len(render_state["snapshot"])
+    pagination = {"remaining": remaining, "showMoreText": "", "showAllText": ""}
+    if remaining > 0:
+        incremental_load = render_state["config"].get("incremental_card_load_count")
+        pagination["showMoreText"] = tr("pagination_show_more", count=min(incremental_load, remaining))
+        pagination["showAllText"] = tr("pagination_show_all", count=total_cards_in_filter)
+    mw.web.eval(f"MemoryMosaicStream.finish({_json_for_script(pagination)});")
+
+def _stream_additional_tiles() -> bool:
+    """Carrega os próximos tiles (Mostrar Mais / Mostrar Todos) na grade já exibida.
+
+    Os cartões novos são lidos em segundo plano e enviados à página sem recarregá-la.
+    Retorna False quando a grade exibida não corresponde ao estado atual e a página
+    precisa ser recarregada.
+    """
+    last_render = _session_last_render
+    if last_render is None or mw.state not in ("deckBrowser", "overview"):
+        return False
+
+    view_state = _resolve_render_view_state(last_render["overview_deck_name"])
+    if isinstance(view_state, str):
+        return False
+    old_key, new_key = last_render["key"], view_state["render_key"]
+    # Só o limite de exibição (posição 4 da chave) pode ter mudado
+    if old_key[:4] != new_key[:4] or old_key[5:] != new_key[5:]:
+        return False
+
+    all_cids = last_render["all_cids"]
+    shown_before = len(last_render["snapshot"])
+    display_limit = view_state["display_limit"]
+    end = len(all_cids) if display_limit == float('inf') else min(len(all_cids), display_limit)
+    new_cids = all_cids[shown_before:end]
+    requested_state = mw.state
+
+    def compute(col: Any) -> tuple[CardSnapshot, dict[int, int]]:
+        extension = load_card_snapshot(col.db, new_cids)
+        return extension, load_last_review_map(col.db, extension.cids)
+
+    def on_success(result: tuple[CardSnapshot, dict[int, int]]) -> None:
+        # A grade mudou (outra renderização, troca de tela) enquanto os cartões eram lidos
+        if _session_last_render is not last_render or mw.state != requested_state or not _is_collection_usable():
+            return
+        extended = _extend_render_state(last_render, result[0], result[1], new_key)
+        if extended is None:
+            request_refresh_if_memorymosaic_visible()
+            return
+        extended_state, tiles = extended
+        _commit_render_state(extended_state)
+        _send_streamed_tiles(extended_state, tiles, shown_before)
+
+    def on_failure(error: Exception) -> None:
+        print(f"Memory Mosaic: Erro ao carregar mais cartões: {error}")
+        request_refresh_if_memorymosaic_visible()
+
+    QueryOp(parent=mw, op=compute, success=on_success).failure(on_failure).run_in_background()
+    return True
+
+def _start_background_render(view_state: dict, cache_key: tuple, started: float) -> str:
+    """Calcula a grade em segundo plano (QueryOp) e retorna o placeholder a exibir até lá.
+
+    Quando o cálculo termina, o HTML é injetado no placeholder via web.eval, desde que o
+    pedido ainda seja o mais recente e a tela não tenha mudado.
+    """
+    global _render_generation
+    _render_generation += 1
+    generation = _render_generation
+    requested_state = mw.state
+
+    def is_current() -> bool:
+        return generation == _render_generation and mw.state == requested_state and _is_collection_usable()
+
+    def compute(col: Any) -> tuple[str, dict | None] | None:
+        # Pedido substituído por outro antes de começar: nada a calcular. Só o contador é
+        # consultado aqui; `mw` pertence à thread principal e é verificado em on_success
+        if generation != _render_generation:
+            return None
+        return _compute_memorymosaic_grid_html(view_state, col)
+
+    def on_success(result: tuple[str, dict | None] | None) -> None:
+        if result is None or not is_current():
+            return
+        _render_cache_put(cache_key, result)
+        _record_render_profile("background", started, result[1], computed=True)
+        grid_html = _use_render_result(result)
+        mw.web.eval(f"MemoryMosaicInject.fill({generation}, {_json_for_script(grid_html)});")
+
+    def on_failure(error: Exception) -> None:
+        print(f"Memory Mosaic: Erro ao calcular a grade em segundo plano: {error}")
+        if is_current():
+            error_html = f'<p style="text-align: center;">{tr("error_loading", error=error)}</p>'
+            mw.web.eval(f"MemoryMosaicInject.fill({generation}, {_json_for_script(error_html)});")
+
+    QueryOp(parent=mw, op=compute, success=on_success).failure(on_failure).run_in_background()
+
+    return (
+        f'<div id="memorymosaic-root" data-generation="{generation}">'
+        f'<p style="margin-top: 25px; text-align: center;">{tr("loading_mosaic")}</p>'
+        f'</div>'
+        f'<script>{_read_web_asset("mosaic_inject.js")}</script>'
+    )
+
+def _start_timelapse() -> None:
+    """Lê em segundo plano o histórico dos cartões da grade exibida e abre o painel da linha do tempo."""
+    global _timelapse
+    last_render = _session_last_render
+    if last_render is None or last_render["bins"] is not None:
+        return
+    config = last_render["config"]
+    today = last_render["today"]
+    day_cutoff = mw.col.sched.day_cutoff
+    all_cids = last_render["all_cids"]
+    requested_state = mw.state
+
+    def compute(col: Any) -> RevlogReplay:
+        return load_revlog_replay(
+            col.db, all_cids, today, day_cutoff,
+            config.get("timelapse_keyframe_events"), config.get("timelapse_max_keyframes"),
+        )
+
+    def on_success(replay: RevlogReplay) -> None:
+        global _timelapse
+        if _session_last_render is not last_render or mw.state != requested_state or not _is_collection_usable():
+            return
+        step_days = config.get("timelapse_step_days")
+        _timelapse = {
+            "render": last_render,
+            "replay": replay,
+            # (cor, vencido) de cada tile exibido, como está na página; None: ainda não enviado
+            "sent": [None] * len(last_render["snapshot"]),
+        }
+        options = {
+            "firstDay": min(replay.first_day, today),
+            "today": today,
+            "stepDays": max(1, step_days) if isinstance(step_days, int) else _DEFAULT_TIMELAPSE_STEP_DAYS,
+            "frameIntervalMs": config.get("timelapse_frame_interval_ms"),
+            "labels": {"play": tr("timelapse_play"), "pause": tr("timelapse_pause"), "close": tr("timelapse_close")},
+        }
+        mw.web.eval(f"MemoryMosaicTimeLapse.ready({_json_for_script(options)});")
+
+    def on_failure(error: Exception) -> None:
+        print(f"Memory Mosaic: Erro ao ler o histórico da linha do tempo: {error}")
+        mw.web.eval("document.body.style.cursor = 'default';")
+
+    _timelapse = None
+    QueryOp(parent=mw, op=compute, success=on_success).failure(on_failure).with_progress(tr("timelapse_loading")).run_in_background()
+
+def _get_timelapse_frame(day: int) -> dict | None:
+    """Patch da página com o estado dos cartões no fim do dia `day`, ou None se a grade mudou.
+
+    Só os tiles exibidos cuja cor ou indicador mudou desde o último quadro enviado entram
+    no patch; as contagens do sumário cobrem todo o filtro, como na grade.
+    """
+    timelapse = _timelapse
+    if timelapse is None or timelapse["render"] is not _session_last_render:
+        return None
+    render = timelapse["render"]
+    replay = timelapse["replay"]
+    config = render["config"]
+    day = max(replay.first_day, min(day, replay.today))
+    snapshot = replay.seek(day)
+    coloring = compute_tile_coloring(
+        snapshot, config, render["view_mode"], render["gradient_field"], day, render["gradient_lut"],
+        use_numpy=config.get("memorymosaic_use_numpy"),
+    )
+    palette, colors = coloring["palette"], coloring["colors"]
+    due_rows = set(coloring["due"])
+    sent = timelapse["sent"]
+    cids = snapshot.cids
+    tiles = []
+    for row in range(len(sent)):
+        tile = (palette[colors[row]], row in due_rows)
+        if sent[row] != tile:
+            sent[row] = tile
+            tiles.append([cids[row], tile[0], tile[1]])
+    day_end = replay.day_cutoff - (replay.today - day) * 86400 - 1
+    return {
+        "date": datetime.fromtimestamp(day_end).strftime("%Y-%m-%d"),
+        "patch": {
+            "tiles": tiles,
+            "counts": coloring["counts"] if render["view_mode"] == "categorical" else {},
+            "dueCount": len(due_rows),
+        },
+    }
+
+def _set_section_open(index: int, opened: bool) -> None:
+    """Registra a seção `index` da última grade como aberta ou fechada, para as próximas páginas."""
+    global _session_open_section_keys
+    last_render = _session_last_render
+    if last_render is None or last_render["sections"] is None or not 0 <= index < len(last_render["sections"]):
+        return
+    if _session_open_section_keys is None:
+        _session_open_section_keys = set()
+    key = last_render["sections"].keys[index]
+    if opened:
+        _session_open_section_keys.add(key)
+    else:
+        _session_open_section_keys.discard(key)
+
+def _get_open_section_indices() -> list[int]:
+    """Seções da última grade a abrir na página: as que estavam abertas ou, sem nenhuma delas
+    neste filtro, as primeiras `sections_open_count`."""
+    global _session_open_section_keys
+    last_render = _session_last_render
+    if last_render is None or last_render["sections"] is None:
+        return []
+    keys = last_render["sections"].keys
+    open_keys = _session_open_section_keys
+    if open_keys is not None:
+        indices = [index for index, key in enumerate(keys) if key in open_keys]
+        if indices or not open_keys: # Todas fechadas pelo usuário: continuam fechadas
+            return indices
+    open_count = _get_addon_config().get("sections_open_count")
+    if not isinstance(open_count, int):
+        open_count = _DEFAULT_SECTIONS_OPEN_COUNT
+    indices = list(range(min(max(0, open_count), len(keys))))
+    _session_open_section_keys = (open_keys or set()) | {keys[index] for index in indices}
+    return indices
+
+def _open_section(index: int) -> dict | None:
+    """Modelo dos tiles (com payload) de uma seção da última grade, aberta pela primeira vez na página.
+
+    Na primeira abertura desde a renderização, lê os cartões da seção (acrescentados ao
+    instantâneo da grade) e o revlog deles, usado nos tooltips.
+    """
+    last_render = _session_last_render
+    if last_render is None or last_render["sections"] is None or not 0 <= index < len(last_render["sections"]):
+        return None
+    sections = last_render["sections"]
+    if sections.rows[index] is None:
+        loaded_before = len(last_render["snapshot"])
+        last_render["snapshot"] = load_section_rows(mw.col.db, last_render["all_cids"], sections, index, last_render["snapshot"])
+        new_cids = last_render["snapshot"].cids[loaded_before:]
+        last_render["last_review_timestamps_map"].update(load_last_review_map(mw.col.db, new_cids))
+    _set_section_open(index, True)
+    return section_tile_model(
+        last_render["config"], last_render["tile_model"], last_render["snapshot"], sections, index,
+        last_render["view_mode"], last_render["gradient_field"], last_render["today"], last_render["gradient_lut"],
+    )
+
+def _export_memorymosaic_image() -> None:
+    """Pede o arquivo de destino e exporta o mosaico do filtro exibido (todos os cartões) em segundo plano."""
+    last_render = _session_last_render
+    view_state = _resolve_render_view_state(last_render["overview_deck_name"] if last_render is not None else None)
+    if isinstance(view_state, str):
+        return
+    path, _ = QFileDialog.getSaveFileName(
+        mw, tr("export_dialog_title"), os.path.join(os.path.expanduser("~"), "memorymosaic.png"), "PNG (*.png);;SVG (*.svg)",
+    )
+    if not path:
+        return
+    export_format = os.path.splitext(path)[1][1:].lower()
+    if export_format not in EXPORT_FORMATS:
+        export_format = "png"
+        path += ".png"
+    config = view_state["config"]
+
+    def report_progress(done: int, total: int) -> None:
+        mw.taskman.run_on_main(lambda: mw.progress.update(label=tr("export_progress"), value=done, max=total))
+
+    def compute(col: Any) -> int:
+        return export_mosaic(col, config, view_state, path, export_format, report_progress)
+
+    def on_success(count: int) -> None:
+        tooltip(tr("export_done", count=count, path=path), period=5000)
 
-    # Atualiza os detalhes do filtro da sessão para a próxima renderização
-    _session_last_filter_details = current_filter_details
+    def on_failure(error: Exception) -> None:
+        print(f"Memory Mosaic: Erro ao exportar o mosaico: {error}")
+        showWarning(tr("export_error", error=error))
 
-    return spacing_html + title_and_controls_html + color_summary_container_html + grid_html_content + pagination_buttons_html + filter_info_footer_html + script_html
+    QueryOp(parent=mw, op=compute, success=on_success).failure(on_failure).with_progress(tr("export_progress")).run_in_background()
+
+def _get_memorymosaic_page_html(overview_deck_name: str | None = None) -> str:
+    """HTML do Memory Mosaic para os hooks de renderização do Deck Browser e do Overview.
+
+    Com `memorymosaic_background_render`, a grade é calculada fora da thread principal e a
+    página recebe um placeholder; a atualização incremental continua síncrona, pois é barata.
+    """
+    config = _get_addon_config()
+    if not config.get("memorymosaic_background_render"):
+        return _render_memorymosaic_grid_html(overview_deck_name=overview_deck_name)
+
+    view_state = _resolve_render_view_state(overview_deck_name)
+    if isinstance(view_state, str):
+        return view_state
+
+    started = time.perf_counter()
+    reused_html, cache_key = _reuse_render(view_state, started)
+    if reused_html is not None:
+        return reused_html
+
+    if not _is_collection_usable():
+        return f"<p>{tr('waiting_for_anki_collection_short')}</p>"
+    return _start_background_render(view_state, cache_key, started)
 
 def _is_collection_usable() -> bool:
     """Verifica se a coleção está em um estado utilizável."""
@@ -841,120 +1832,13 @@ def _is_collection_usable() -> bool:
         
     return True
 
-def _hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
-    """Converte cor hexadecimal para RGB."""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-def _rgb_to_hex(rgb: tuple[int, int, int]) -> str:
-    """Converte cor RGB para hexadecimal."""
-    return '#{:02x}{:02x}{:02x}'.format(*rgb)
-
-def _get_gradient_color(value: float, min_val: float, max_val: float, config: dict, invert_gradient: bool = False) -> str:
-    """Calcula a cor do gradiente para um valor entre o mínimo e o máximo."""
-    # Prevenir divisão por zero
-    if min_val == max_val:
-        return config.get("gradient_color_mid")
-        
-    # Normalizar o valor para [0, 1]
-    normalized = max(0, min(1, (value - min_val) / (max_val - min_val)))
-    
-    if invert_gradient:
-        normalized = 1.0 - normalized
-    
-    # Obter cores do gradiente do config
-    start_color = config.get("gradient_color_start")  # Amarelo
-    mid_color = config.get("gradient_color_mid")      # Verde
-    end_color = config.get("gradient_color_end")      # Azul
-    
-    # Converter para RGB para interpolação
-    start_rgb = _hex_to_rgb(start_color)
-    mid_rgb = _hex_to_rgb(mid_color)
-    end_rgb = _hex_to_rgb(end_color)
-    
-    # Interpolação baseada na posição normalizada
-    if normalized <= 0.5:
-        # Entre start e mid (0.0 a 0.5)
-        normalized_adjusted = normalized * 2  # Ajusta para range 0-1
-        r = int(start_rgb[0] + (mid_rgb[0] - start_rgb[0]) * normalized_adjusted)
-        g = int(start_rgb[1] + (mid_rgb[1] - start_rgb[1]) * normalized_adjusted)
-        b = int(start_rgb[2] + (mid_rgb[2] - start_rgb[2]) * normalized_adjusted)
-    else:
-        # Entre mid e end (0.5 a 1.0)
-        normalized_adjusted = (normalized - 0.5) * 2  # Ajusta para range 0-1
-        r = int(mid_rgb[0] + (end_rgb[0] - mid_rgb[0]) * normalized_adjusted)
-        g = int(mid_rgb[1] + (end_rgb[1] - mid_rgb[1]) * normalized_adjusted)
-        b = int(mid_rgb[2] + (end_rgb[2] - mid_rgb[2]) * normalized_adjusted)
-    
-    # Converter de volta para hex
-    return _rgb_to_hex((r, g, b))
-
-def _get_gradient_tile_color(card: Card | None, field: str, config: dict, today_for_due_calc: int, ivl_min_override: int | None = None, ivl_max_override: int | None = None) -> str:
-    """Determina a cor do tile com base no gradiente do campo selecionado."""
-    if not card:
-        return config.get("color_default_bg")
-        
-    # Cartões suspensos/enterrados sempre têm a mesma cor
-    if card.queue in [-1, -2, -3]:
-        return config.get("color_suspended_buried")
-        
-    # Cartões novos devem usar a cor de 'novo' do config, mesmo no modo gradiente
-    if card.type == 0:
-        return config.get("color_new") # Cor para cartões novos
-        
-    # Obter o valor de acordo com o campo
-    value = None
-    min_val = 0
-    max_val = 100  # Valores padrão
-    
-    if field == "factor":
-        value = card.factor
-        min_val = config.get("gradient_factor_min")
-        max_val = config.get("gradient_factor_max")
-    elif field == "ivl":
-        value = card.ivl
-        if ivl_min_override is not None and ivl_max_override is not None:
-            min_val = ivl_min_override
-            max_val = ivl_max_override
-        else: # Fallback se overrides não forem passados (não deveria acontecer com a nova lógica)
-            min_val = config.get("gradient_ivl_min")
-            max_val = config.get("gradient_ivl_max")
-    elif field == "lapses":
-        value = card.lapses
-        min_val = config.get("gradient_lapses_min")
-        max_val = config.get("gradient_lapses_max")
-    elif field == "due":
-        # Calcular dias até o vencimento
-        if card.queue == 2:  # Cartão em revisão
-            days_until_due = card.due - today_for_due_calc
-            value = max(0, days_until_due)  # Não negativo
-            min_val = config.get("gradient_due_min")
-            max_val = config.get("gradient_due_max")
-        else:
-            # Para cartões que não estão em revisão, usar verde médio
-            return config.get("gradient_color_mid")
-    else:
-        # Campo não reconhecido, usar cor padrão
-        return config.get("color_default_bg")
-    
-    if value is None:
-        return config.get("color_default_bg")
-        
-    # Determinar se o gradiente deve ser invertido
-    invert_gradient = False
-    order_config_key = f"gradient_{field}_order"
-    
-    # Definir padrões de ordem para cada campo
-    default_order = "asc"
-    if field == "lapses": # Para lapsos, menor é melhor, então a ordem natural do gradiente invertido é desejada
-        default_order = "desc"
-    
-    field_order = config.get(order_config_key)
-    if field_order == "desc":
-        invert_gradient = True
-        
-    # Calcular a cor do gradiente
-    return _get_gradient_color(value, min_val, max_val, config, invert_gradient=invert_gradient)
+def _get_gradient_lut_css(lut: dict, stops: int = 11) -> str:
+    """Lista de cores (para `linear-gradient`) amostrada da paleta, usada na barra da legenda."""
+    palette = lut["palette"]
+    if len(palette) == 1:
+        return f"{palette[0]}, {palette[0]}"
+    last = len(palette) - 1
+    return ", ".join(palette[round(i * last / (stops - 1))] for i in range(stops))
 
 def on_sync_will_start():
     """Handler para quando a sincronização vai começar."""
@@ -963,8 +1847,11 @@ def on_sync_will_start():
 
 def on_sync_did_finish():
     """Handler para quando a sincronização termina."""
-    global _is_syncing
+    global _is_syncing, _session_needs_full_rebuild
     _is_syncing = False
+    _session_needs_full_rebuild = True # A sincronização pode ter alterado qualquer cartão
+    _invalidate_deck_index() # ... e os decks
+    clear_review_error_stats() # ... e o revlog
     
     if not _is_collection_usable():
         return
@@ -980,8 +1867,18 @@ def on_sync_did_finish():
 
 def on_profile_will_close():
     """Handler para quando o perfil vai ser fechado."""
-    global _is_closing
+    global _is_closing, _session_tooltip_context, _session_last_render, _timelapse, _session_open_section_keys
     _is_closing = True
+    _session_tooltip_context = None
+    _session_last_render = None
+    _timelapse = None
+    _session_open_section_keys = None
+    _tooltip_lru.clear()
+    _session_dirty_cids.clear()
+    _clear_render_cache()
+    clear_review_error_stats()
+    _invalidate_deck_index()
+    invalidate_language() # O próximo perfil pode usar outro idioma
 
 def on_collection_will_temporarily_close():
     """Handler para quando a coleção vai ser temporariamente fechada."""
@@ -1035,13 +1932,11 @@ def on_overview_will_render_content(overview_obj: Overview, content_obj: Overvie
 
     if current_deck_id: 
         try:
-            deck = mw.col.decks.get(current_deck_id)
-            if deck:
-                current_deck_name = deck['name']
+            current_deck_name = _get_deck_index().name(current_deck_id)
         except Exception as e:
             print(f"Memory Mosaic: Não foi possível obter o nome do deck para did {current_deck_id}: {e}")
             
-    grid_html = _render_memorymosaic_grid_html(overview_deck_name=current_deck_name)
+    grid_html = _get_memorymosaic_page_html(overview_deck_name=current_deck_name)
     content_obj.table += grid_html
 
 def on_deck_browser_will_render_content(deck_browser_obj: DeckBrowser, content_obj: DeckBrowserContent) -> None:
@@ -1054,7 +1949,7 @@ def on_deck_browser_will_render_content(deck_browser_obj: DeckBrowser, content_o
         return
         
     try:
-        grid_html = _render_memorymosaic_grid_html()
+        grid_html = _get_memorymosaic_page_html()
         content_obj.stats += grid_html
     except Exception as e:
         print(f"Memory Mosaic: Erro ao renderizar grid no deck browser: {e}")
@@ -1067,8 +1962,10 @@ def on_config_changed_refresh_memorymosaic(addon_name: str, key: str, new_value:
     """Handler para mudanças de configuração."""
     # O hook config_did_change_hook passa o nome do addon, não o objeto do addon.
     if addon_name == __name__: 
-        global _memorymosaic_cached_config
+        global _memorymosaic_cached_config, _session_needs_full_rebuild
         _memorymosaic_cached_config = None # Invalida o cache
+        _session_needs_full_rebuild = True
+        _clear_render_cache() # Grades calculadas com o config antigo não serão mais usadas
         
         # Verifica se é seguro atualizar a interface
         if not mw or not mw.col or mw.state == "closing" or mw.state == "profileManager":
@@ -1077,11 +1974,37 @@ def on_config_changed_refresh_memorymosaic(addon_name: str, key: str, new_value:
         print(f"Memory Mosaic: Configuração alterada ('{key}'), cache invalidado e visualização será atualizada.")
         request_refresh_if_memorymosaic_visible()
 
+def on_reviewer_did_answer_card(reviewer: Any, card: Any, ease: int) -> None:
+    """Registra o cartão respondido para atualizar só o seu tile ao voltar da revisão."""
+    _session_dirty_cids.add(card.id)
+
+def on_operation_did_execute(changes: Any, handler: Any) -> None:
+    """Força a reconstrução da grade após operações que alteram cartões fora do revisor."""
+    global _session_needs_full_rebuild
+    # As respostas do revisor já são registradas cartão a cartão por on_reviewer_did_answer_card
+    if handler is not None and handler is getattr(mw, "reviewer", None):
+        return
+    if getattr(changes, "deck", False):
+        _invalidate_deck_index() # Deck criado, renomeado, movido ou apagado
+    if getattr(changes, "card", False) or getattr(changes, "deck", False):
+        _session_needs_full_rebuild = True
+        clear_review_error_stats() # A operação (ex.: desfazer uma resposta) pode ter removido entradas do revlog
+    elif getattr(changes, "tag", False) or getattr(changes, "note_text", False):
+        # Tags da nota alteradas: o filtro por tags e as seções por tag podem ter mudado
+        last_render = _session_last_render
+        if last_render is not None and (
+            last_render["filter_has_tags"]
+            or (last_render["sections"] is not None and last_render["sections"].mode == "tag")
+        ):
+            _session_needs_full_rebuild = True
+
 # Registra os novos hooks
 sync_will_start.append(on_sync_will_start)
 sync_did_finish.append(on_sync_did_finish)
 profile_will_close.append(on_profile_will_close)
 collection_will_temporarily_close.append(on_collection_will_temporarily_close)
+reviewer_did_answer_card.append(on_reviewer_did_answer_card)
+operation_did_execute.append(on_operation_did_execute)
 
 # Após a configuração ser salva (via editor JSON padrão do Anki), 
 # precisamos atualizar a visualização se estiver visível.
@@ -1097,6 +2020,13 @@ def handle_memorymosaic_pycmd(handled: tuple[bool, Any], message: str, context:
     global _session_view_mode_override
     global _session_gradient_field_override
     global _session_current_display_limit
+    global _session_binning_override
+    global _session_bin_drilldown
+    global _session_state_filter_override
+    global _session_tag_filter_override
+    global _session_sections_override
+    global _session_open_section_keys
+    global _timelapse
     # _session_last_filter_details é modificado em _render_memorymosaic_grid_html, não aqui diretamente,
     # então não precisa de global aqui, mas não faria mal se estivesse.
 
@@ -1114,14 +2044,21 @@ def handle_memorymosaic_pycmd(handled: tuple[bool, Any], message: str, context:
             return (True, None) 
         except Exception:
             return (True, None) 
+    elif message.startswith("memorymosaic_tooltip:"):
+        # Pedido/resposta: o valor retornado é entregue ao callback do pycmd no JS
+        try:
+            cid = int(message.split(":")[1])
+            return (True, _get_tile_tooltip_lines(cid))
+        except Exception as e:
+            print(f"Memory Mosaic: Erro ao montar o tooltip: {e}")
+            return (True, None)
     elif message.startswith("memorymosaic_sort_change:"):
         try:
             if not _is_collection_usable():
                 return (True, None)
                 
             new_sort_order = message.split(":")[1]
-            valid_sort_orders = ["id_asc", "ivl_asc", "ivl_desc", "due_asc"]
-            if new_sort_order in valid_sort_orders:
+            if new_sort_order in SORT_ORDER_KEYS:
                 _session_sort_order_override = new_sort_order
                 try:
                     mw.progress.single_shot(
@@ -1171,6 +2108,102 @@ def handle_memorymosaic_pycmd(handled: tuple[bool, Any], message: str, context:
             return (True, None)
         except Exception:
             return (True, None)
+    elif message.startswith("memorymosaic_binning_change:"):
+        try:
+            new_binning = message.split(":")[1]
+            if new_binning in ("auto", "on", "off"):
+                _session_binning_override = new_binning
+                _session_bin_drilldown = None
+                mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+            return (True, None)
+        except Exception as e:
+            print(f"Memory Mosaic: Erro ao mudar o modo agrupado: {e}")
+            return (True, None)
+    elif message.startswith("memorymosaic_sections_change:"):
+        new_sections = message.split(":")[1]
+        if new_sections in SECTION_MODES:
+            _session_sections_override = new_sections
+            _session_open_section_keys = None # Chaves (dids ou tags) do modo anterior
+            _session_bin_drilldown = None
+            mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+        return (True, None)
+    elif message.startswith("memorymosaic_sections_state"):
+        # Pedido/resposta: índices das seções que a página deve abrir
+        return (True, _get_open_section_indices())
+    elif message.startswith("memorymosaic_section_open:"):
+        # Pedido/resposta: os tiles da seção vão para o callback do pycmd no JS
+        try:
+            return (True, _open_section(int(message.split(":")[1])))
+        except Exception as e:
+            print(f"Memory Mosaic: Erro ao abrir a seção: {e}")
+            return (True, None)
+    elif message.startswith("memorymosaic_section_state:"):
+        # Seção já carregada na página, aberta (1) ou fechada (0)
+        try:
+            _, index, opened = message.split(":")
+            _set_section_open(int(index), opened == "1")
+        except ValueError:
+            pass
+        return (True, None)
+    elif message.startswith("memorymosaic_filter_state:") or message.startswith("memorymosaic_filter_tag:"):
+        # Só a busca muda: o novo filtro é outra chave de renderização (e de cache)
+        command, value = message.split(":", 1)
+        if value == "*":
+            value = None # Volta aos valores do config
+        elif command == "memorymosaic_filter_state" and value not in FILTER_STATES:
+            value = ""
+        if command == "memorymosaic_filter_state":
+            _session_state_filter_override = value
+        else:
+            _session_tag_filter_override = value
+        mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+        return (True, None)
+    elif message.startswith("memorymosaic_open_bin:"):
+        # Drill-down: mostra os cartões de um grupo do modo agrupado, um tile por cartão
+        try:
+            bin_index = int(message.split(":")[1])
+            last_render = _session_last_render
+            if last_render is not None and last_render.get("bins") is not None and 0 <= bin_index < last_render["bins"].bin_count:
+                search_query, sort_order_key = last_render["key"][:2]
+                start, end = last_render["bins"].bin_range(bin_index, len(last_render["all_cids"]))
+                _session_bin_drilldown = (search_query, sort_order_key, start, end)
+                mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+            return (True, None)
+        except Exception as e:
+            print(f"Memory Mosaic: Erro ao abrir o grupo de cartões: {e}")
+            return (True, None)
+    elif message.startswith("memorymosaic_close_bin"):
+        _session_bin_drilldown = None
+        mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+        return (True, None)
+    elif message.startswith("memorymosaic_profile:"):
+        # Medições da página (web/mosaic_profile.js), em ms, como JSON
+        try:
+            _record_page_profile(json.loads(message[len("memorymosaic_profile:"):]))
+        except Exception as e:
+            print(f"Memory Mosaic: Erro ao registrar as medições da página: {e}")
+        return (True, None)
+    elif message.startswith("memorymosaic_profile_overlay"):
+        return (True, _get_profile_overlay_lines())
+    elif message.startswith("memorymosaic_timelapse_start"):
+        _start_timelapse()
+        return (True, None)
+    elif message.startswith("memorymosaic_timelapse_frame:"):
+        # Pedido/resposta: o patch do quadro vai para o callback do pycmd no JS
+        try:
+            return (True, _get_timelapse_frame(int(message.split(":")[1])))
+        except Exception as e:
+            print(f"Memory Mosaic: Erro ao montar o quadro da linha do tempo: {e}")
+            return (True, None)
+    elif message.startswith("memorymosaic_timelapse_stop"):
+        _timelapse = None
+        # Recarrega a grade com o estado atual dos cartões
+        mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+        return (True, None)
+    elif message.startswith("memorymosaic_export"):
+        # O diálogo de arquivo é modal: abre depois que o pycmd retornar
+        mw.progress.single_shot(100, lambda: _export_memorymosaic_image() if _is_collection_usable() else None)
+        return (True, None)
     elif message.startswith("memorymosaic_load_more"):
         try:
             if not _is_collection_usable():
@@ -1184,7 +2217,9 @@ def handle_memorymosaic_pycmd(handled: tuple[bool, Any], message: str, context:
             elif _session_current_display_limit != float('inf'):
                 _session_current_display_limit += incremental_load
             
-            mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+            # Anexa os novos tiles à grade exibida; recarrega a página só se não for possível
+            if not _stream_additional_tiles():
+                mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
             return (True, None)
         except Exception as e:
             print(f"MemoryMosaic error in load_more: {e}")
@@ -1196,7 +2231,8 @@ def handle_memorymosaic_pycmd(handled: tuple[bool, Any], message: str, context:
             
             _session_current_display_limit = float('inf') # Sinaliza para carregar todos
             
-            mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
+            if not _stream_additional_tiles():
+                mw.progress.single_shot(100, lambda: request_refresh_if_memorymosaic_visible() if _is_collection_usable() else None)
             return (True, None)
         except Exception as e:
             print(f"MemoryMosaic error in load_all: {e}")
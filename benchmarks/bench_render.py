@@ -0,0 +1,254 @@
+"""Benchmark da renderização completa da grade sobre uma coleção sintética.
+
+Cria coleções SQLite com o esquema do Anki (ver synthetic_collection.py), de 1k
+a 1M cartões, e executa `_compute_memorymosaic_grid_html` com um `mw` local no
+lugar do Anki. Para cada tamanho, mede o tempo de cada fase da renderização
+(as fases de profiling.py: busca, leitura dos cartões, modo agrupado, revlog,
+sumário, cores, payload e montagem do HTML), o tempo médio de montagem de um
+tooltip, o tamanho da página e do payload dos tiles e o pico de memória alocada
+pelo Python (tracemalloc). Uso, a partir da pasta do addon:
+
+    python benchmarks/bench_render.py [quantidade ...] [--paginated] [--binning auto|on|off]
+                                      [--view categorical|gradient] [--db-dir PASTA] [--no-memory]
+                                      [--engine-only] [--sort ORDENAÇÃO] [--sections none|deck|tag]
+
+Com --db-dir, os bancos gerados são mantidos e reaproveitados nas execuções seguintes.
+Com --engine-only, só o núcleo (render_engine.compute_render_model) é executado, sem
+o `mw` local nem a montagem do HTML; a coluna "html" mostra então o restante do núcleo.
+Com --sort, usa outra ordenação (ex.: failure_rate_desc, que inclui na fase "find_cards"
+a agregação do revlog da primeira renderização).
+Com --sections, a grade é dividida em seções por deck ou por tag (fase "sections", só os
+mini-sumários); os cartões e o payload de cada seção só são lidos quando ela é aberta,
+então não entram na medição.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Any
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from synthetic_collection import SyntheticCollection, create_collection_db, install_aqt_stand_in  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+TOOLTIP_SAMPLE_SIZE = 500
+# Mesmas fases de profiling.PHASES (o pacote só é importado depois de criado o `mw` local)
+PHASES = ("find_cards", "cards", "bins", "revlog", "summary", "coloring", "sections", "payload", "html")
+PHASE_COLUMN_WIDTHS = {phase: max(9, len(phase) + 3) for phase in PHASES}
+
+
+def load_config(overrides: dict) -> dict:
+    with open(os.path.join(ADDON_DIR, "config.json"), encoding="utf-8") as config_file:
+        config = json.load(config_file)
+    config.update(overrides)
+    return config
+
+
+def _forget_addon_modules() -> None:
+    for name in [name for name in sys.modules if name == "memorymosaic" or name.startswith("memorymosaic.")]:
+        del sys.modules[name]
+
+
+def import_addon() -> Any:
+    """Importa o pacote do addon (a pasta do projeto) com o nome "memorymosaic"."""
+    _forget_addon_modules()
+    spec = importlib.util.spec_from_file_location(
+        "memorymosaic", os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR],
+    )
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["memorymosaic"] = addon
+    spec.loader.exec_module(addon)
+    return addon
+
+
+def import_engine() -> Any:
+    """Importa só o núcleo (memorymosaic.render_engine), sem executar o __init__.py do addon (e sem `aqt`)."""
+    _forget_addon_modules()
+    package = types.ModuleType("memorymosaic")
+    package.__path__ = [ADDON_DIR]
+    sys.modules["memorymosaic"] = package
+    return importlib.import_module("memorymosaic.render_engine")
+
+
+def engine_view_state(config: dict, collection: SyntheticCollection, args: argparse.Namespace) -> dict:
+    """Estado de visualização para o núcleo, equivalente ao que o addon resolve sem ajustes de sessão."""
+    return {
+        "search_query": "",
+        "deck_search": "",
+        "card_filter": None,
+        "sort_order_key": config.get("memorymosaic_default_sort_order"),
+        "view_mode": args.view,
+        "gradient_field": config.get("memorymosaic_default_gradient_field"),
+        "binning": args.binning,
+        "drilldown": None,
+        "sections": args.sections,
+        "deck_index": sys.modules["memorymosaic.card_data"].load_deck_index(collection.decks) if args.sections == "deck" else None,
+        "display_limit": config.get("initial_card_load_count") if args.paginated else float("inf"),
+        "today": collection.sched.today,
+        "day_cutoff": collection.sched.day_cutoff,
+        "collection_identity": (id(collection), collection.path),
+    }
+
+
+def collection_path(db_dir: str, count: int) -> str:
+    path = os.path.join(db_dir, f"synthetic_{count}.anki2")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        create_collection_db(path, count)
+        print(f"  (coleção sintética de {count} cartões criada em {time.perf_counter() - started:.1f} s)")
+    return path
+
+
+def render_once(addon: Any, paginated: bool) -> tuple[str, dict | None]:
+    view_state = addon._resolve_render_view_state()
+    if not paginated:
+        view_state["display_limit"] = float("inf")
+    return addon._compute_memorymosaic_grid_html(view_state, addon.mw.col)
+
+
+def run_size(count: int, args: argparse.Namespace, db_dir: str) -> dict:
+    config = load_config({
+        "memorymosaic_binning": args.binning,
+        "memorymosaic_default_view_mode": args.view,
+        "memorymosaic_default_deck_filter": "",
+        "memorymosaic_default_sections": args.sections,
+        "memorymosaic_profiling": True,
+    })
+    if args.sort:
+        config["memorymosaic_default_sort_order"] = args.sort
+    collection = SyntheticCollection(collection_path(db_dir, count))
+    if args.engine_only:
+        addon = None
+        engine = import_engine()
+        profiling = sys.modules["memorymosaic.profiling"]
+    else:
+        install_aqt_stand_in(collection, config)
+        addon = import_addon()
+        engine = sys.modules["memorymosaic.render_engine"]
+
+    payload_sizes: list[int] = []
+    original_encode = engine.encode_tile_payload
+
+    def encode_and_measure(*encode_args: Any, **encode_kwargs: Any) -> dict:
+        payload = original_encode(*encode_args, **encode_kwargs)
+        payload_sizes.append(len(payload["data"]))
+        return payload
+    engine.encode_tile_payload = encode_and_measure
+
+    def render() -> tuple[str | None, Any, Any]:
+        """(HTML, estado da renderização ou modelo do núcleo, medições das fases)."""
+        if addon is not None:
+            page_html, render_state = render_once(addon, args.paginated)
+            return page_html, render_state, render_state["profile"] if render_state is not None else None
+        profile = profiling.RenderProfile()
+        started = time.perf_counter()
+        model = engine.compute_render_model(collection, config, engine_view_state(config, collection, args), profile)
+        profile.finish_computation(time.perf_counter() - started, model.tile_count)
+        return None, model, profile
+
+    started = time.perf_counter()
+    page_html, render_state, profile = render()
+    total_seconds = time.perf_counter() - started
+
+    result = {
+        "count": count,
+        "total": total_seconds,
+        "phases": {phase: profile.spans.get(phase, 0.0) if profile is not None else 0.0 for phase in PHASES},
+        "html_bytes": len(page_html.encode("utf-8")) if page_html is not None else None,
+        "payload_bytes": payload_sizes[-1] if payload_sizes else 0,
+        "tiles": profile.tiles if profile is not None else 0,
+        "tooltip_ms": None,
+        "peak_mb": None,
+    }
+
+    if addon is not None and render_state is not None:
+        addon._commit_render_state(render_state)
+        if render_state.get("bins") is not None:
+            tile_ids = list(range(render_state["bins"].bin_count))
+        else:
+            tile_ids = list(render_state["snapshot"].cids)
+        sample = random.Random(7).sample(tile_ids, min(TOOLTIP_SAMPLE_SIZE, len(tile_ids)))
+        started = time.perf_counter()
+        for tile_id in sample:
+            addon._get_tile_tooltip_lines(tile_id)
+        result["tooltip_ms"] = (time.perf_counter() - started) * 1000 / max(1, len(sample))
+
+    if not args.no_memory:
+        # Segunda renderização, só para medir memória: o tracemalloc deixa o código mais lento
+        if addon is not None:
+            addon._clear_render_cache()
+        engine.clear_review_error_stats()
+        tracemalloc.start()
+        render()
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    collection.close()
+    return result
+
+
+def print_result(result: dict) -> None:
+    phases = "  ".join(f"{result['phases'][phase] * 1000:>{PHASE_COLUMN_WIDTHS[phase]}.1f}" for phase in PHASES)
+    tooltip = "-" if result["tooltip_ms"] is None else f"{result['tooltip_ms']:.3f}"
+    peak = "-" if result["peak_mb"] is None else f"{result['peak_mb']:.1f}"
+    html_kb = "-" if result["html_bytes"] is None else f"{result['html_bytes'] / 1024:.1f}"
+    print(
+        f"{result['count']:>10}  {result['tiles']:>8}  {phases}  {result['total'] * 1000:>9.1f}  "
+        f"{tooltip:>10}  {html_kb:>9}  {result['payload_bytes'] / 1024:>10.1f}  {peak:>8}"
+    )
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da renderização do Memory Mosaic em coleções sintéticas.")
+    parser.add_argument("sizes", nargs="*", type=int, help="quantidades de cartões (padrão: 1k, 10k, 100k e 1M)")
+    parser.add_argument("--paginated", action="store_true", help="renderiza só a carga inicial (initial_card_load_count)")
+    parser.add_argument("--binning", choices=("auto", "on", "off"), default="auto", help="modo agrupado (padrão: auto)")
+    parser.add_argument("--view", choices=("categorical", "gradient"), default="categorical", help="modo de visualização")
+    parser.add_argument("--db-dir", help="pasta onde as coleções sintéticas são criadas e reaproveitadas")
+    parser.add_argument("--no-memory", action="store_true", help="não mede o pico de memória")
+    parser.add_argument("--engine-only", action="store_true", help="mede só o núcleo (render_engine), sem o `mw` local nem o HTML")
+    parser.add_argument("--sort", help="ordenação (padrão: memorymosaic_default_sort_order do config.json)")
+    parser.add_argument("--sections", choices=("none", "deck", "tag"), default="none", help="seções por deck ou tag (padrão: none)")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or list(DEFAULT_SIZES)
+    temporary_dir = None
+    db_dir = args.db_dir
+    if db_dir is None:
+        temporary_dir = tempfile.TemporaryDirectory(prefix="memorymosaic_bench_")
+        db_dir = temporary_dir.name
+    os.makedirs(db_dir, exist_ok=True)
+
+    print(
+        f"modo: {args.view}, agrupado: {args.binning}, {'paginado' if args.paginated else 'todos os cartões'}"
+        f"{f', ordenação: {args.sort}' if args.sort else ''}"
+        f"{f', seções: {args.sections}' if args.sections != 'none' else ''}"
+        f"{', só o núcleo' if args.engine_only else ''}"
+    )
+    phase_header = "  ".join(f"{phase + ' ms':>{PHASE_COLUMN_WIDTHS[phase]}}" for phase in PHASES)
+    print(
+        f"{'cartões':>10}  {'tiles':>8}  {phase_header}  {'total ms':>9}  "
+        f"{'tooltip ms':>10}  {'html KB':>9}  {'payload KB':>10}  {'pico MB':>8}"
+    )
+    try:
+        for count in sizes:
+            print_result(run_size(count, args, db_dir))
+    finally:
+        if temporary_dir is not None:
+            temporary_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,128 @@
+"""Benchmark do motor de coloração dos tiles (tile_engine.py): NumPy x Python puro.
+
+Gera instantâneos sintéticos de 10k, 100k e 1M cartões, confere que os dois
+caminhos produzem exatamente a mesma saída (paleta, índices de cor, vencidos e
+contagens de `compute_tile_coloring` e todos os campos do `BinAccumulator` do
+modo agrupado) e mede o tempo de cada um.
+Não depende do Anki. Uso, a partir da pasta do addon:
+
+    python benchmarks/bench_tile_engine.py [quantidade ...]
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from card_data import CardSnapshot  # noqa: E402
+from tile_engine import (  # noqa: E402
+    HAS_NUMPY, BinAccumulator, bin_size_for, build_gradient_lut, compute_tile_coloring, ivl_range,
+)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+TODAY = 1000
+BINNING_TARGET_TILES = 2000
+# Posição do primeiro cartão no acumulador: grupos que começam no meio do instantâneo
+BIN_START_OFFSET = 7
+
+
+def load_config() -> dict:
+    import json
+    with open(CONFIG_PATH, encoding="utf-8") as config_file:
+        return json.load(config_file)
+
+
+def synthetic_snapshot(count: int, seed: int = 42) -> CardSnapshot:
+    """Instantâneo com uma mistura plausível de cartões novos, em aprendizado, revisão e suspensos."""
+    rng = random.Random(seed)
+    snapshot = CardSnapshot(range(1, count + 1))
+    for row in range(count):
+        if rng.random() < 0.002:
+            continue # Cartão apagado entre a busca e a leitura
+        card_type = rng.choices((0, 1, 2, 3), weights=(25, 5, 65, 5))[0]
+        queue = {0: 0, 1: 1, 2: 2, 3: 3}[card_type]
+        if rng.random() < 0.05:
+            queue = rng.choice((-1, -2, -3))
+        ivl = rng.randint(1, 3650) if card_type == 2 else 0
+        factor = rng.randint(1300, 3500) if card_type else 0
+        due = TODAY + rng.randint(-30, 365) if queue == 2 else rng.randint(0, 2000)
+        snapshot.set_row(row, (card_type, queue, ivl, factor, rng.randint(0, 15), due, rng.randint(1, 50)))
+    return snapshot
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def assert_same_output(python_output: dict, numpy_output: dict, fields: tuple[str, ...], context: str) -> None:
+    """Levanta AssertionError com o primeiro campo que difere entre os dois caminhos."""
+    for field in fields:
+        if python_output[field] != numpy_output[field]:
+            raise AssertionError(f"'{field}' diferente entre NumPy e Python puro ({context})")
+
+
+def run_case(snapshot: CardSnapshot, config: dict, view_mode: str, field: str, invert: bool) -> tuple[float, float | None]:
+    lut = None
+    if view_mode == "gradient":
+        if field == "ivl":
+            min_val, max_val = ivl_range(snapshot) or (config["gradient_ivl_min"], config["gradient_ivl_max"])
+        else:
+            min_val, max_val = config[f"gradient_{field}_min"], config[f"gradient_{field}_max"]
+        lut = build_gradient_lut(config, min_val, max_val, invert, 4096)
+
+    python_result, python_seconds = timed(compute_tile_coloring, snapshot, config, view_mode, field, TODAY, lut, use_numpy=False)
+    if not HAS_NUMPY:
+        return python_seconds, None
+    numpy_result, numpy_seconds = timed(compute_tile_coloring, snapshot, config, view_mode, field, TODAY, lut, use_numpy=True)
+    assert_same_output(python_result, numpy_result, ("palette", "colors", "due", "counts"), f"{view_mode}/{field}, {len(snapshot)} cartões")
+    return python_seconds, numpy_seconds
+
+
+def check_bins(snapshot: CardSnapshot, gradient_field: str | None) -> None:
+    """Confere que os dois caminhos do BinAccumulator acumulam exatamente os mesmos valores."""
+    card_count = len(snapshot) + BIN_START_OFFSET
+    bin_size = bin_size_for(card_count, BINNING_TARGET_TILES)
+    accumulators = []
+    for use_numpy in (False, True):
+        accumulator = BinAccumulator(card_count, bin_size, gradient_field, TODAY)
+        accumulator.add(BIN_START_OFFSET, snapshot, use_numpy=use_numpy)
+        accumulators.append({name: getattr(accumulator, name) for name in BinAccumulator.__slots__})
+    assert_same_output(
+        accumulators[0], accumulators[1], BinAccumulator.__slots__, f"grupos/{gradient_field}, {len(snapshot)} cartões",
+    )
+
+
+def main(argv: list[str]) -> None:
+    sizes = [int(arg) for arg in argv] or list(DEFAULT_SIZES)
+    config = load_config()
+    cases = (
+        [("categorical", "ivl", False)]
+        + [("gradient", field, config[f"gradient_{field}_order"] == "desc") for field in ("ivl", "factor", "lapses", "due")]
+        + [("gradient", "ivl", config["gradient_ivl_order"] != "desc")] # Ordem inversa do gradiente
+    )
+    print(f"NumPy disponível: {HAS_NUMPY}")
+    print(f"{'cartões':>10}  {'modo':<22}  {'python (s)':>10}  {'numpy (s)':>10}  {'ganho':>7}")
+    for size in sizes:
+        snapshot = synthetic_snapshot(size)
+        for view_mode, field, invert in cases:
+            python_seconds, numpy_seconds = run_case(snapshot, config, view_mode, field, invert)
+            label = view_mode if view_mode == "categorical" else f"gradient/{field}" + (" (desc)" if invert else "")
+            if numpy_seconds is None:
+                print(f"{size:>10}  {label:<22}  {python_seconds:>10.3f}  {'-':>10}  {'-':>7}")
+            else:
+                print(f"{size:>10}  {label:<22}  {python_seconds:>10.3f}  {numpy_seconds:>10.3f}  {python_seconds / numpy_seconds:>6.1f}x")
+        if HAS_NUMPY:
+            for gradient_field in (None, "ivl", "factor", "lapses", "due"):
+                check_bins(snapshot, gradient_field)
+            print(f"{size:>10}  grupos: mesmos valores nos dois caminhos")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,422 @@
+"""Coleção sintética do Anki para os benchmarks, sem depender do Anki.
+
+Cria um banco SQLite com o subconjunto do esquema do Anki que o addon lê
+(`cards`, `notes`, `revlog` e `decks`, com os índices do Anki) e o preenche com
+uma distribuição plausível de estados, intervalos, revisões e tags.
+`SyntheticCollection` imita a parte de `mw.col` usada pelo addon (db,
+find_cards, sched.today, decks, tags)
+e `install_aqt_stand_in` registra módulos `aqt` mínimos para que o pacote do
+addon possa ser importado fora do Anki.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import types
+from typing import Any, Callable
+
+TODAY = 1000 # Dias desde a criação da coleção (mw.col.sched.today)
+COLLECTION_CREATED_SECS = 1_600_000_000
+DAY_SECS = 86_400
+INSERT_BATCH_ROWS = 50_000
+
+SCHEMA_SQL = """
+CREATE TABLE cards (
+    id integer PRIMARY KEY, nid integer NOT NULL, did integer NOT NULL, ord integer NOT NULL,
+    mod integer NOT NULL, usn integer NOT NULL, type integer NOT NULL, queue integer NOT NULL,
+    due integer NOT NULL, ivl integer NOT NULL, factor integer NOT NULL, reps integer NOT NULL,
+    lapses integer NOT NULL, left integer NOT NULL, odue integer NOT NULL, odid integer NOT NULL,
+    flags integer NOT NULL, data text NOT NULL
+);
+CREATE TABLE notes (
+    id integer PRIMARY KEY, tags text NOT NULL
+);
+CREATE TABLE revlog (
+    id integer PRIMARY KEY, cid integer NOT NULL, usn integer NOT NULL, ease integer NOT NULL,
+    ivl integer NOT NULL, lastIvl integer NOT NULL, factor integer NOT NULL, time integer NOT NULL,
+    type integer NOT NULL
+);
+CREATE TABLE decks (
+    id integer PRIMARY KEY NOT NULL, name text NOT NULL, mtime_secs integer NOT NULL,
+    usn integer NOT NULL, common blob NOT NULL, kind blob NOT NULL
+);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE UNIQUE INDEX idx_decks_name ON decks (name);
+"""
+
+# Decks sintéticos (nome no formato do Anki, com "::"); os cartões são distribuídos entre eles
+DECK_NAMES = (
+    "Default",
+    "Idiomas",
+    "Idiomas::Japonês",
+    "Idiomas::Japonês::Kanji",
+    "Idiomas::Inglês",
+    "Medicina",
+    "Medicina::Anatomia",
+    "Medicina::Farmacologia",
+)
+
+# Tags sintéticas: cada nota recebe de zero a duas
+TAG_NAMES = ("vocabulario", "gramatica", "leitura", "prova", "revisar", "dificil")
+
+
+class SyntheticDB:
+    """Imita os métodos de `mw.col.db` usados pelo addon sobre uma conexão sqlite3."""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def all(self, sql: str, *args: Any) -> list[tuple]:
+        return self.connection.execute(sql, args).fetchall()
+
+    def list(self, sql: str, *args: Any) -> list[Any]:
+        return [row[0] for row in self.connection.execute(sql, args)]
+
+    def first(self, sql: str, *args: Any) -> tuple | None:
+        return self.connection.execute(sql, args).fetchone()
+
+    def scalar(self, sql: str, *args: Any) -> Any:
+        row = self.first(sql, *args)
+        return row[0] if row else None
+
+
+class SyntheticDecks:
+    """Imita `mw.col.decks.all_names_and_ids()`."""
+
+    def __init__(self, db: SyntheticDB) -> None:
+        self.db = db
+
+    def all_names_and_ids(self) -> list[types.SimpleNamespace]:
+        return [
+            types.SimpleNamespace(id=did, name=name.replace("\x1f", "::"))
+            for did, name in self.db.all("SELECT id, name FROM decks ORDER BY name")
+        ]
+
+
+# Termos `is:` com a mesma tradução SQL do Anki
+_IS_SEARCH_SQL = {
+    "new": "c.type = 0",
+    "learn": "c.queue IN (1, 3)",
+    "review": "c.type IN (2, 3)",
+    "suspended": "c.queue = -1",
+    "buried": "c.queue IN (-2, -3)",
+}
+# Campos de `prop:` (a facilidade é buscada em fração: prop:ease>=2.5)
+_PROP_SEARCH_SQL = {"ivl": "c.ivl", "lapses": "c.lapses", "ease": "c.factor / 1000.0"}
+_SEARCH_TOKEN = re.compile(r'\s*(\(|\)|-(?=\S)|(?:[^\s()"]|"(?:[^"\\]|\\.)*")+)')
+
+
+def _unquote_search_text(text: str) -> str:
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = re.sub(r"\\(.)", r"\1", text[1:-1])
+    return text
+
+
+class _SearchTranslator:
+    """Traduz para SQL o subconjunto da busca do Anki gerado pelo addon.
+
+    Entende `deck:`, `tag:` (sem curingas), `is:new/learn/review/suspended/buried`,
+    `prop:ivl/lapses/ease`, `cid:`, a negação `-`, parênteses, `OR` e o E implícito
+    (que tem precedência sobre `OR`, como no Anki). Outros termos levantam ValueError.
+    """
+
+    def __init__(self, collection: SyntheticCollection, query: str) -> None:
+        self.collection = collection
+        self.query = query
+        self.tokens: list[str] = []
+        end = 0
+        for match in _SEARCH_TOKEN.finditer(query):
+            if match.start() != end:
+                break
+            self.tokens.append(match.group(1))
+            end = match.end()
+        if query[end:].strip():
+            raise ValueError(f"Busca não suportada pela coleção sintética: {query!r}")
+        self.position = 0
+
+    def translate(self, args: list[Any]) -> str:
+        sql = self._or_expression(args)
+        if self.position != len(self.tokens):
+            raise ValueError(f"Busca não suportada pela coleção sintética: {self.query!r}")
+        return sql
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _or_expression(self, args: list[Any]) -> str:
+        terms = [self._and_expression(args)]
+        while self._peek() is not None and self._peek().upper() == "OR":
+            self.position += 1
+            terms.append(self._and_expression(args))
+        return terms[0] if len(terms) == 1 else "(" + " OR ".join(terms) + ")"
+
+    def _and_expression(self, args: list[Any]) -> str:
+        terms = []
+        while self._peek() not in (None, ")") and self._peek().upper() != "OR":
+            terms.append(self._unary(args))
+        if not terms:
+            raise ValueError(f"Busca não suportada pela coleção sintética: {self.query!r}")
+        return terms[0] if len(terms) == 1 else "(" + " AND ".join(terms) + ")"
+
+    def _unary(self, args: list[Any]) -> str:
+        token = self.tokens[self.position]
+        self.position += 1
+        if token == "-":
+            return f"NOT {self._unary(args)}"
+        if token == "(":
+            sql = self._or_expression(args)
+            if self._peek() != ")":
+                raise ValueError(f"Busca não suportada pela coleção sintética: {self.query!r}")
+            self.position += 1
+            return sql
+        return self._term(token, args)
+
+    def _term(self, token: str, args: list[Any]) -> str:
+        key, _, value = token.partition(":")
+        value = _unquote_search_text(value)
+        if key == "deck":
+            dids = self.collection.deck_ids(value)
+            args.extend(dids)
+            return f"c.did IN ({', '.join('?' * len(dids))})" if dids else "0"
+        if key == "tag":
+            args.append(f"% {value} %")
+            return "c.nid IN (SELECT id FROM notes WHERE tags LIKE ?)"
+        if key == "is" and value in _IS_SEARCH_SQL:
+            return f"({_IS_SEARCH_SQL[value]})"
+        if key == "cid" and re.fullmatch(r"\d+(,\d+)*", value):
+            return f"c.id IN ({value})"
+        prop_match = re.fullmatch(r"(ivl|lapses|ease)(<=|>=|<|>|=)(\d+(?:\.\d+)?)", value) if key == "prop" else None
+        if prop_match:
+            field, operator, number = prop_match.groups()
+            args.append(float(number))
+            return f"{_PROP_SEARCH_SQL[field]} {operator} ?"
+        raise ValueError(f"Busca não suportada pela coleção sintética: {self.query!r}")
+
+
+class SyntheticCollection:
+    """Imita a parte de `mw.col` usada pelo addon, sobre um banco criado por `create_collection_db`.
+
+    `find_cards` entende o subconjunto da busca do Anki gerado pelo addon (ver
+    `_SearchTranslator`); `order` é a cláusula ORDER BY sobre o alias `c`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.db = SyntheticDB(self.connection)
+        self.decks = SyntheticDecks(self.db)
+        self.tags = types.SimpleNamespace(all=self._all_tags)
+        self.sched = types.SimpleNamespace(today=TODAY, day_cutoff=COLLECTION_CREATED_SECS + (TODAY + 1) * DAY_SECS)
+        self.mod = COLLECTION_CREATED_SECS * 1000
+
+    def find_cards(self, query: str, order: str | bool = False) -> list[int]:
+        sql = "SELECT c.id FROM cards c"
+        args: list[Any] = []
+        if query.strip():
+            sql += " WHERE " + _SearchTranslator(self, query).translate(args)
+        if isinstance(order, str) and order:
+            sql += f" ORDER BY {order}"
+        return self.db.list(sql, *args)
+
+    def deck_ids(self, deck_name: str) -> list[int]:
+        """Ids do deck `deck_name` e dos seus subdecks."""
+        return [
+            entry.id for entry in self.decks.all_names_and_ids()
+            if entry.name == deck_name or entry.name.startswith(deck_name + "::")
+        ]
+
+    def _all_tags(self) -> list[str]:
+        # Bancos criados antes da tabela de notas não têm tags
+        if not self.db.scalar("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes'"):
+            return []
+        return sorted({tag for tags in self.db.list("SELECT DISTINCT tags FROM notes") for tag in tags.split()})
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def _card_rows(count: int, rng: random.Random, deck_ids: list[int]) -> Any:
+    """Gera (linha de `cards`, revisões) para `count` cartões com uma distribuição plausível.
+
+    Cerca de 30% novos, 3% em aprendizado, 64% em revisão e 3% em reaprendizado;
+    5% suspensos ou enterrados. Intervalos com distribuição log-normal (mediana
+    ~30 dias) e uma entrada no revlog por repetição.
+    """
+    first_cid = COLLECTION_CREATED_SECS * 1000
+    deck_weights = [1 + index % 3 for index in range(len(deck_ids))]
+    for position in range(count):
+        cid = first_cid + position
+        did = rng.choices(deck_ids, weights=deck_weights)[0]
+        card_type = rng.choices((0, 1, 2, 3), weights=(30, 3, 64, 3))[0]
+        queue = card_type
+        ivl = factor = reps = lapses = 0
+        if card_type == 0:
+            due = position # Posição na fila de novos
+        else:
+            factor = max(1300, int(rng.gauss(2500, 250)))
+            lapses = min(int(rng.expovariate(1.2)), 30)
+            if card_type == 1:
+                due = COLLECTION_CREATED_SECS + TODAY * DAY_SECS + rng.randint(-3600, 3600) # Aprendizado: timestamp
+            else:
+                ivl = 1 if card_type == 3 else max(1, min(36500, int(rng.lognormvariate(math.log(30), 1.2))))
+                due = TODAY + rng.randint(-max(1, ivl // 10), ivl)
+            reps = 2 + int(math.log2(ivl + 1)) + lapses
+        if rng.random() < 0.05:
+            queue = rng.choice((-1, -1, -1, -2, -3))
+        card_row = (cid, position, did, 0, 0, 0, card_type, queue, due, ivl, factor, reps, lapses, 0, 0, 0, 0, "")
+
+        reviews = []
+        if reps:
+            # Revisões espaçadas até hoje; o id do revlog é o timestamp em ms
+            review_ms = (COLLECTION_CREATED_SECS + rng.randint(0, TODAY // 2) * DAY_SECS) * 1000
+            step_ms = max(1, (TODAY * DAY_SECS * 1000 - (review_ms - COLLECTION_CREATED_SECS * 1000)) // (reps + 1))
+            for repetition in range(reps):
+                review_ms += rng.randint(step_ms // 2, step_ms) + repetition
+                ease = 1 if repetition < lapses else rng.choices((2, 3, 4), weights=(10, 80, 10))[0]
+                reviews.append((review_ms, cid, 0, ease, ivl, ivl, factor, rng.randint(2000, 20000), 1))
+        yield card_row, reviews
+
+
+def create_collection_db(path: str, count: int, seed: int = 42, progress: Callable[[str], None] | None = None) -> None:
+    """Cria em `path` um banco com `count` cartões sintéticos (o arquivo é sobrescrito)."""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA_SQL)
+    deck_ids = list(range(1, len(DECK_NAMES) + 1))
+    connection.executemany(
+        "INSERT INTO decks VALUES (?, ?, 0, 0, x'', x'')",
+        [(did, name.replace("::", "\x1f")) for did, name in zip(deck_ids, DECK_NAMES)],
+    )
+
+    card_batch: list[tuple] = []
+    review_batch: list[tuple] = []
+    note_batch: list[tuple] = []
+    # Gerador separado: as tags não mudam os cartões gerados com a mesma semente
+    tag_rng = random.Random(seed + 1)
+
+    def flush() -> None:
+        connection.executemany(f"INSERT INTO cards VALUES ({', '.join('?' * 18)})", card_batch)
+        connection.executemany("INSERT INTO notes VALUES (?, ?)", note_batch)
+        # O id do revlog é um timestamp em ms: a rara colisão entre cartões descarta uma revisão
+        connection.executemany(f"INSERT OR IGNORE INTO revlog VALUES ({', '.join('?' * 9)})", review_batch)
+        card_batch.clear()
+        review_batch.clear()
+        note_batch.clear()
+
+    for card_row, reviews in _card_rows(count, rng, deck_ids):
+        card_batch.append(card_row)
+        review_batch.extend(reviews)
+        tags = tag_rng.sample(TAG_NAMES, tag_rng.choices((0, 1, 2), weights=(20, 60, 20))[0])
+        note_batch.append((card_row[1], f" {' '.join(tags)} " if tags else "")) # Formato do Anki: " tag1 tag2 "
+        if len(card_batch) >= INSERT_BATCH_ROWS:
+            flush()
+            if progress:
+                progress(f"{card_row[1] + 1} cartões")
+    flush()
+    connection.commit()
+    connection.execute("ANALYZE")
+    connection.close()
+
+
+class _Hook(list):
+    """Hook do aqt: aceita append/remove e pode ser chamado (sem efeito)."""
+
+    def __call__(self, *args: Any, **kwargs: Any) -> None:
+        for callback in list(self):
+            callback(*args, **kwargs)
+
+
+class _HookModule(types.ModuleType):
+    def __getattr__(self, name: str) -> _Hook:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        hook = _Hook()
+        setattr(self, name, hook)
+        return hook
+
+
+class _SynchronousQueryOp:
+    """QueryOp que executa a operação na thread atual (o benchmark mede o cálculo, não a fila do Qt)."""
+
+    def __init__(self, parent: Any, op: Callable, success: Callable) -> None:
+        self._op = op
+        self._success = success
+        self._failure: Callable | None = None
+
+    def failure(self, callback: Callable) -> _SynchronousQueryOp:
+        self._failure = callback
+        return self
+
+    def with_progress(self, label: str | None = None) -> _SynchronousQueryOp:
+        return self
+
+    def run_in_background(self) -> None:
+        try:
+            result = self._op(sys.modules["aqt"].mw.col)
+        except Exception as error:
+            if self._failure is None:
+                raise
+            self._failure(error)
+            return
+        self._success(result)
+
+
+def install_aqt_stand_in(collection: SyntheticCollection, config: dict, language: str = "en") -> types.SimpleNamespace:
+    """Registra módulos `aqt` mínimos em sys.modules e retorna o `mw` correspondente.
+
+    Deve ser chamado antes de importar o pacote do addon. O `mw` expõe a coleção,
+    o config do addon, o idioma do perfil e `web.eval`/`progress.single_shot`
+    que registram ou executam as chamadas imediatamente.
+    """
+    evaluated_scripts: list[str] = []
+    mw = types.SimpleNamespace(
+        col=collection,
+        state="deckBrowser",
+        addonManager=types.SimpleNamespace(getConfig=lambda name: config, config_did_change_hook=_Hook()),
+        pm=types.SimpleNamespace(meta={"defaultLang": language}),
+        web=types.SimpleNamespace(eval=evaluated_scripts.append),
+        progress=types.SimpleNamespace(single_shot=lambda delay_ms, callback, *args: callback()),
+        deckBrowser=types.SimpleNamespace(refresh=lambda: None),
+        overview=types.SimpleNamespace(refresh=lambda: None),
+        evaluated_scripts=evaluated_scripts,
+    )
+
+    aqt_module = types.ModuleType("aqt")
+    aqt_module.mw = mw
+    aqt_module.dialogs = types.SimpleNamespace(open=lambda *args: None)
+    gui_hooks = _HookModule("aqt.gui_hooks")
+    aqt_module.gui_hooks = gui_hooks
+    operations = types.ModuleType("aqt.operations")
+    operations.QueryOp = _SynchronousQueryOp
+    overview = types.ModuleType("aqt.overview")
+    overview.Overview = type("Overview", (), {})
+    overview.OverviewContent = type("OverviewContent", (), {})
+    deckbrowser = types.ModuleType("aqt.deckbrowser")
+    deckbrowser.DeckBrowser = type("DeckBrowser", (), {})
+    deckbrowser.DeckBrowserContent = type("DeckBrowserContent", (), {})
+    qt = types.ModuleType("aqt.qt")
+    qt.QLocale = type("QLocale", (), {"name": lambda self: language})
+    qt.QFileDialog = type("QFileDialog", (), {"getSaveFileName": staticmethod(lambda *args: ("", ""))})
+    utils = types.ModuleType("aqt.utils")
+    utils.showWarning = print
+    utils.tooltip = lambda message, *args, **kwargs: None
+
+    sys.modules.update({
+        "aqt": aqt_module,
+        "aqt.gui_hooks": gui_hooks,
+        "aqt.operations": operations,
+        "aqt.overview": overview,
+        "aqt.deckbrowser": deckbrowser,
+        "aqt.qt": qt,
+        "aqt.utils": utils,
+    })
+    return mw
@@ -0,0 +1,265 @@
+"""Camada de acesso a dados do Memory Mosaic.
+
+Lê apenas as colunas de `cards` que a grade usa e as guarda em arrays
+compactos (um array por coluna), evitando construir objetos `Card` por tile.
+Este módulo não importa `aqt`: recebe qualquer objeto `db` com o método
+`all(sql, *args)` (o `mw.col.db` do Anki ou um substituto local).
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Iterable, Iterator, Sequence
+
+# Limite conservador de parâmetros por instrução (SQLITE_MAX_VARIABLE_NUMBER
+# em builds antigos do SQLite é 999).
+SQL_PARAM_CHUNK_SIZE = 900
+
+# Colunas lidas de `cards`, na ordem do SELECT.
+CARD_COLUMNS = ("type", "queue", "ivl", "factor", "lapses", "due", "did")
+
+
+def iter_id_chunks(ids: Sequence[int], size: int = SQL_PARAM_CHUNK_SIZE) -> Iterator[Sequence[int]]:
+    """Divide uma sequência de ids em fatias de no máximo `size` elementos."""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+class CardSnapshot:
+    """Instantâneo colunar dos cartões exibidos, na mesma ordem de `cids`.
+
+    Cada coluna é um `array` indexado pela posição do tile (a "linha").
+    `present[row]` é 0 quando o cartão não existe mais no banco (ex.: apagado
+    entre a busca e a leitura), equivalente ao antigo `card is None`.
+    """
+
+    __slots__ = ("cids", "present", "type", "queue", "ivl", "factor", "lapses", "due", "did", "_row_by_cid")
+
+    def __init__(self, cids: Iterable[int]) -> None:
+        self.cids = array("q", cids)
+        count = len(self.cids)
+        self.present = bytearray(count)
+        self.type = array("b", bytes(count))
+        self.queue = array("b", bytes(count))
+        self.ivl = array("i", bytes(4 * count))
+        self.factor = array("i", bytes(4 * count))
+        self.lapses = array("i", bytes(4 * count))
+        self.due = array("q", bytes(8 * count))
+        self.did = array("q", bytes(8 * count))
+        self._row_by_cid: dict[int, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.cids)
+
+    def row_of(self, cid: int) -> int | None:
+        """Retorna a linha (posição na grade) do cartão, ou None se não exibido."""
+        if self._row_by_cid is None:
+            self._row_by_cid = {c: i for i, c in enumerate(self.cids)}
+        return self._row_by_cid.get(cid)
+
+    def concatenated(self, other: CardSnapshot) -> CardSnapshot:
+        """Novo instantâneo com as linhas de `other` após as deste (este não é alterado)."""
+        combined = CardSnapshot(())
+        for column in self.__slots__[:-1]:
+            setattr(combined, column, getattr(self, column) + getattr(other, column))
+        return combined
+
+    def selected(self, rows: Sequence[int]) -> CardSnapshot:
+        """Novo instantâneo só com as linhas `rows`, nessa ordem (este não é alterado)."""
+        subset = CardSnapshot(())
+        for column in self.__slots__[:-1]:
+            values = getattr(self, column)
+            picked = [values[row] for row in rows]
+            setattr(subset, column, bytearray(picked) if column == "present" else array(values.typecode, picked))
+        return subset
+
+    def row_values(self, row: int) -> tuple[int, ...]:
+        """Valores de uma linha na ordem de CARD_COLUMNS (inverso de `set_row`)."""
+        return (
+            self.type[row], self.queue[row], self.ivl[row], self.factor[row],
+            self.lapses[row], self.due[row], self.did[row],
+        )
+
+    def set_row(self, row: int, values: Sequence[Any]) -> None:
+        """Preenche uma linha com os valores na ordem de CARD_COLUMNS."""
+        card_type, queue, ivl, factor, lapses, due, did = values
+        self.present[row] = 1
+        self.type[row] = card_type
+        self.queue[row] = queue
+        self.ivl[row] = ivl
+        self.factor[row] = factor
+        self.lapses[row] = lapses
+        self.due[row] = due
+        self.did[row] = did
+
+
+def iter_chunked_rows(db: Any, sql_template: str, ids: Sequence[int], params: Sequence[Any] = ()) -> Iterator[Sequence[Any]]:
+    """Executa `sql_template` para cada lote de ids e devolve as linhas de todos os lotes.
+
+    `sql_template` deve conter `{placeholders}` no lugar da lista do IN; `params`
+    são os parâmetros que aparecem antes dela no SQL, repetidos em cada lote. O texto
+    SQL dos lotes completos é montado uma única vez e reaproveitado, de modo que
+    o custo cresce linearmente com o número de ids, sem montar uma string gigante.
+    """
+    full_chunk_sql = None
+    for chunk in iter_id_chunks(ids):
+        if len(chunk) == SQL_PARAM_CHUNK_SIZE:
+            if full_chunk_sql is None:
+                full_chunk_sql = sql_template.format(placeholders=_placeholders(SQL_PARAM_CHUNK_SIZE))
+            sql = full_chunk_sql
+        else:
+            sql = sql_template.format(placeholders=_placeholders(len(chunk)))
+        yield from db.all(sql, *params, *chunk)
+
+
+def load_card_snapshot(db: Any, cids: Sequence[int]) -> CardSnapshot:
+    """Lê type/queue/ivl/factor/lapses/due/did de `cids` em uma única passada.
+
+    O resultado é gravado na posição original de cada cid, preservando a
+    ordenação vinda de `find_cards`.
+    """
+    snapshot = CardSnapshot(cids)
+    if not cids:
+        return snapshot
+
+    sql_template = f"SELECT id, {', '.join(CARD_COLUMNS)} FROM cards WHERE id IN ({{placeholders}})"
+    for db_row in iter_chunked_rows(db, sql_template, snapshot.cids):
+        row = snapshot.row_of(db_row[0])
+        if row is not None:
+            snapshot.set_row(row, db_row[1:])
+    return snapshot
+
+
+class DeckIndex:
+    """Nomes e hierarquia dos decks: did -> nome, nome -> did e did -> subárvore.
+
+    Uma coleção tem poucas centenas de decks, então o índice é montado de uma
+    vez e consultado por tile, em vez de perguntar ao gerenciador de decks.
+    A subárvore de um deck é o próprio did seguido dos dids de todos os descendentes.
+    """
+
+    __slots__ = ("_name_by_id", "_id_by_name", "_subtrees")
+
+    def __init__(self, names_and_ids: Iterable[tuple[int, str]]) -> None:
+        self._name_by_id: dict[int, str] = {}
+        self._id_by_name: dict[str, int] = {}
+        for did, name in names_and_ids:
+            self._name_by_id[did] = name
+            self._id_by_name[name] = did
+        self._subtrees: dict[int, tuple[int, ...]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._name_by_id)
+
+    def name(self, did: int) -> str | None:
+        return self._name_by_id.get(did)
+
+    def id_of(self, name: str) -> int | None:
+        return self._id_by_name.get(name)
+
+    def subtree(self, did: int) -> tuple[int, ...]:
+        """dids do deck e de todos os seus descendentes (vazio se o deck não existe)."""
+        if self._subtrees is None:
+            descendants: dict[int, list[int]] = {deck_id: [deck_id] for deck_id in self._name_by_id}
+            for deck_id, name in self._name_by_id.items():
+                parts = name.split("::")
+                for depth in range(1, len(parts)):
+                    ancestor_id = self._id_by_name.get("::".join(parts[:depth]))
+                    if ancestor_id is not None:
+                        descendants[ancestor_id].append(deck_id)
+            self._subtrees = {deck_id: tuple(ids) for deck_id, ids in descendants.items()}
+        return self._subtrees.get(did, ())
+
+
+def load_deck_index(decks: Any) -> DeckIndex:
+    """Monta o índice a partir do gerenciador de decks da coleção (`col.decks`)."""
+    return DeckIndex((entry.id, entry.name) for entry in decks.all_names_and_ids())
+
+
+def load_grouped_counts(db: Any, cids: Sequence[int], group_expressions: Sequence[str], params: Sequence[Any] = ()) -> dict[tuple, int]:
+    """Conta os cartões de `cids` agrupados pelas expressões SQL dadas (sobre `cards`).
+
+    Retorna {(valor de cada expressão, ...): quantidade}. A agregação é feita pelo
+    SQLite (GROUP BY), sem trazer as linhas dos cartões para o Python; `params`
+    são os parâmetros usados nas expressões. Não é uma consulta só: cada lote de
+    SQL_PARAM_CHUNK_SIZE ids é agrupado à parte (via iter_chunked_rows) e os grupos
+    repetidos entre lotes são somados, então o custo é de ceil(N/SQL_PARAM_CHUNK_SIZE)
+    consultas, cada uma com poucas linhas de resultado.
+    """
+    group_columns = ", ".join(str(position) for position in range(1, len(group_expressions) + 1))
+    sql_template = (
+        f"SELECT {', '.join(group_expressions)}, COUNT(*) FROM cards "
+        f"WHERE id IN ({{placeholders}}) GROUP BY {group_columns}"
+    )
+    counts: dict[tuple, int] = {}
+    for db_row in iter_chunked_rows(db, sql_template, cids, params):
+        key = tuple(db_row[:-1])
+        counts[key] = counts.get(key, 0) + db_row[-1]
+    return counts
+
+
+def load_ivl_range(db: Any, cids: Sequence[int]) -> tuple[int, int] | None:
+    """(min, max) de ivl dos cartões de `cids` que usam o gradiente (revisados, não suspensos), ou None.
+
+    Mesmo critério de tile_engine.ivl_range, sem ler os cartões: MIN/MAX no SQLite, por lote de ids.
+    """
+    sql_template = "SELECT MIN(ivl), MAX(ivl) FROM cards WHERE id IN ({placeholders}) AND type != 0 AND queue NOT IN (-1, -2, -3)"
+    found = None
+    for low, high in iter_chunked_rows(db, sql_template, cids):
+        if low is None:
+            continue # Nenhum cartão do lote usa o gradiente
+        found = (low, high) if found is None else (min(found[0], low), max(found[1], high))
+    return found
+
+
+def load_last_review_map(db: Any, cids: Sequence[int]) -> dict[int, int]:
+    """Retorna {cid: timestamp_ms da última revisão} para os cartões revisados.
+
+    Cartões sem entrada no revlog ficam fora do dicionário. A busca usa o
+    índice de `revlog.cid` com os ids passados como parâmetros, em lotes.
+    """
+    last_review_timestamps_map: dict[int, int] = {}
+    if not cids:
+        return last_review_timestamps_map
+
+    sql_template = "SELECT cid, MAX(id) FROM revlog WHERE cid IN ({placeholders}) GROUP BY cid"
+    for cid, timestamp_ms in iter_chunked_rows(db, sql_template, cids):
+        if timestamp_ms:
+            last_review_timestamps_map[cid] = timestamp_ms
+    return last_review_timestamps_map
+
+
+def load_review_error_stats(db: Any, recent_since_ms: int, cids: Sequence[int] | None = None) -> dict[int, tuple[int, int, int, int]]:
+    """Retorna {cid: (erros, respostas, lapsos, erros recentes)} dos cartões com respostas no revlog.
+
+    Uma única agregação (GROUP BY cid) sobre o revlog inteiro: erros são as respostas
+    "Errei" (ease = 1), lapsos os erros em revisão (type = 1) e erros recentes os
+    registrados a partir de `recent_since_ms`. Entradas sem resposta (ease = 0, como
+    reagendamentos manuais) não contam. Com `cids`, agrega só o revlog desses cartões
+    (em lotes, pelo índice de `revlog.cid`).
+    """
+    columns = "cid, SUM(ease = 1), COUNT(*), SUM(ease = 1 AND type = 1), SUM(ease = 1 AND id >= ?)"
+    if cids is not None:
+        sql_template = f"SELECT {columns} FROM revlog WHERE ease > 0 AND cid IN ({{placeholders}}) GROUP BY cid"
+        return {db_row[0]: tuple(db_row[1:]) for db_row in iter_chunked_rows(db, sql_template, cids, (recent_since_ms,))}
+    # "+cid" impede o uso de ix_revlog_cid: uma leitura sequencial do revlog (em ordem de
+    # tempo) agrupada em memória é bem mais rápida que percorrer o índice com saltos na tabela
+    sql = f"SELECT {columns} FROM revlog WHERE ease > 0 GROUP BY +cid"
+    return {db_row[0]: tuple(db_row[1:]) for db_row in db.all(sql, recent_since_ms)}
+
+
+def load_day_learning_cids(db: Any, cids: Sequence[int] | None = None) -> list[int]:
+    """Retorna os ids dos cartões novos em aprendizado de vários dias (type = 1, queue = 3).
+
+    A busca do Anki não distingue esses cartões dos demais em aprendizado (`is:learn`
+    cobre as filas 1 e 3), mas o tile os classifica como reaprendizado; o filtro de
+    estados (card_filter) os inclui ou exclui pelos ids. Com `cids`, procura só entre eles.
+    """
+    if cids is None:
+        return db.list("SELECT id FROM cards WHERE type = 1 AND queue = 3")
+    sql_template = "SELECT id FROM cards WHERE type = 1 AND queue = 3 AND id IN ({placeholders})"
+    return [db_row[0] for db_row in iter_chunked_rows(db, sql_template, cids)]
@@ -0,0 +1,135 @@
+"""Filtro de cartões com vários critérios, compilado em uma única busca do Anki.
+
+`CardFilter` reúne decks, tags, tipos de nota, estados (as categorias do sumário)
+e faixas de intervalo, facilidade e lapsos. `to_search` gera a busca equivalente
+(`deck:`, `tag:`, `note:`, `is:`, `prop:` e, para os cartões que o `is:` não separa,
+`cid:`), que o Anki traduz em uma só consulta
+SQL em `find_cards`: nenhum cartão é lido para ser filtrado em Python. Dentro de
+um critério os valores são alternativas (OR); os critérios se somam (AND).
+Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+from .tile_engine import MATURE_IVL_DAYS
+
+# Estados aceitos, com a mesma prioridade das regras de tile_engine.classify_card:
+# suspensos/enterrados primeiro, depois novos, reaprendizado e aprendizado/revisão
+FILTER_STATES = ("new", "young", "mature", "relearning", "suspended")
+
+_NOT_SUSPENDED = "-is:suspended -is:buried"
+_STATE_SEARCH = {
+    "new": f"(is:new {_NOT_SUSPENDED})",
+    "young": f"(((is:learn -is:review{{without_day_learning}}) OR (is:review -is:learn prop:ivl<{MATURE_IVL_DAYS})) {_NOT_SUSPENDED})",
+    "mature": f"(is:review -is:learn prop:ivl>={MATURE_IVL_DAYS} {_NOT_SUSPENDED})",
+    "relearning": f"({{relearning}} {_NOT_SUSPENDED})",
+    "suspended": "(is:suspended OR is:buried)",
+}
+# Estados cuja busca depende dos cartões novos em aprendizado de vários dias (type = 1,
+# queue = 3): classify_card os conta como reaprendizado, mas `is:learn` não os separa do
+# aprendizado comum (fila 1), então eles entram na busca pelos ids (`cid:`)
+_DAY_LEARNING_STATES = ("young", "relearning")
+
+# Faixas: atributo do filtro -> campo do `prop:` da busca
+_RANGE_PROPS = (("ivl_range", "ivl"), ("ease_range", "ease"), ("lapses_range", "lapses"))
+
+
+def quote_search_text(text: str) -> str:
+    """Texto entre aspas para a busca do Anki (escapa `\\` e `"`)."""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _any_of(terms: Sequence[str]) -> str:
+    return terms[0] if len(terms) == 1 else "(" + " OR ".join(terms) + ")"
+
+
+def _range_values(values: Sequence | None) -> tuple:
+    if not values:
+        return (None, None)
+    low, high = (list(values) + [None, None])[:2]
+    return (low, high)
+
+
+class CardFilter:
+    """Critérios do filtro; listas vazias e limites None não restringem nada."""
+
+    __slots__ = ("decks", "tags", "note_types", "states", "ivl_range", "ease_range", "lapses_range")
+
+    def __init__(
+        self, decks: Sequence[str] = (), tags: Sequence[str] = (), note_types: Sequence[str] = (),
+        states: Sequence[str] = (), ivl_range: Sequence | None = None, ease_range: Sequence | None = None,
+        lapses_range: Sequence | None = None,
+    ) -> None:
+        self.decks = tuple(decks)
+        self.tags = tuple(tags)
+        self.note_types = tuple(note_types)
+        # Estados desconhecidos são ignorados
+        self.states = tuple(state for state in FILTER_STATES if state in states)
+        self.ivl_range = _range_values(ivl_range)
+        self.ease_range = _range_values(ease_range)
+        self.lapses_range = _range_values(lapses_range)
+
+    @classmethod
+    def from_config(cls, config: dict) -> CardFilter:
+        return cls(
+            decks=config.get("filter_decks"),
+            tags=config.get("filter_tags"),
+            note_types=config.get("filter_note_types"),
+            states=config.get("filter_states"),
+            ivl_range=config.get("filter_ivl_range"),
+            ease_range=config.get("filter_ease_range"),
+            lapses_range=config.get("filter_lapses_range"),
+        )
+
+    def replace(self, **criteria) -> CardFilter:
+        """Cópia com alguns critérios trocados (ex.: pelos menus da grade)."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(criteria)
+        return CardFilter(**values)
+
+    def depends_on_card_state(self) -> bool:
+        """Indica se há critérios que mudam com as respostas (estados e faixas de intervalo, facilidade e lapsos)."""
+        return bool(self.states) or any(
+            limit is not None for attribute, _ in _RANGE_PROPS for limit in getattr(self, attribute)
+        )
+
+    def uses_day_learning_cids(self) -> bool:
+        """Indica se `to_search` precisa dos ids dos cartões em aprendizado de vários dias."""
+        return any(state in _DAY_LEARNING_STATES for state in self.states)
+
+    def to_search(self, day_learning_cids: Sequence[int] = ()) -> str:
+        """Busca do Anki com todos os critérios ("" quando o filtro não restringe nada).
+
+        `day_learning_cids` são os cartões com type = 1 e queue = 3 (card_data.load_day_learning_cids),
+        necessários só quando `uses_day_learning_cids()`.
+        """
+        parts = []
+        for prefix, values in (("deck", self.decks), ("tag", self.tags), ("note", self.note_types)):
+            if values:
+                parts.append(_any_of([f"{prefix}:{quote_search_text(value)}" for value in values]))
+        if self.states:
+            day_learning = f"cid:{','.join(str(cid) for cid in day_learning_cids)}" if day_learning_cids else ""
+            parts.append(_any_of([
+                _STATE_SEARCH[state].format(
+                    without_day_learning=f" -{day_learning}" if day_learning else "",
+                    relearning=f"((is:learn is:review) OR {day_learning})" if day_learning else "(is:learn is:review)",
+                )
+                for state in self.states
+            ]))
+        for attribute, prop in _RANGE_PROPS:
+            low, high = getattr(self, attribute)
+            if low is not None:
+                parts.append(f"prop:{prop}>={low}")
+            if high is not None:
+                parts.append(f"prop:{prop}<={high}")
+        return " ".join(parts)
+
+
+def combine_search(base_search: str, card_filter: CardFilter, day_learning_cids: Sequence[int] = ()) -> str:
+    """`base_search` (ex.: o deck da tela) restrito pelos critérios de `card_filter`."""
+    criteria = card_filter.to_search(day_learning_cids)
+    if not criteria:
+        return base_search
+    return f"{base_search} {criteria}" if base_search else criteria
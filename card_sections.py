@@ -0,0 +1,168 @@
+"""Visualização em seções: os cartões do filtro divididos por deck ou por tag.
+
+A grade em seções é montada sem ler os cartões: `load_section_summaries` conta
+no SQLite (GROUP BY), por deck ou pelas tags da nota, os cartões de cada
+categoria (as do sumário) e os vencidos hoje de cada seção. Só quando uma seção
+é aberta `load_section_rows` lê os seus cartões e os acrescenta ao instantâneo
+(card_data.CardSnapshot) dos cartões já carregados. Por deck, o cartão fica na
+seção do seu próprio deck; por tag, em uma seção para cada tag da nota (ou na
+seção sem tag), então pode aparecer em mais de uma. Dentro de cada seção os
+cartões seguem a ordenação da grade. Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Callable, Hashable, Iterable, Sequence
+
+from .card_data import CardSnapshot, DeckIndex, iter_chunked_rows, load_card_snapshot, load_grouped_counts
+from .tile_engine import CATEGORY_COUNT, CATEGORY_SQL_CASE, DUE_TODAY_SQL
+
+SECTION_MODES = ("none", "deck", "tag")
+# Seção dos cartões cujas notas não têm tags
+UNTAGGED_SECTION_KEY = ""
+
+# Mini-sumários por tag: agrupa pelo texto das tags da nota, que se repete entre muitos cartões
+_TAG_SUMMARY_SQL = (
+    f"SELECT n.tags, {CATEGORY_SQL_CASE}, {DUE_TODAY_SQL}, COUNT(*) FROM cards c JOIN notes n ON n.id = c.nid "
+    "WHERE c.id IN ({placeholders}) GROUP BY 1, 2, 3"
+)
+# Cartões de uma seção; na seção de uma tag, o LIKE só pré-seleciona as notas (a tag é conferida no Python)
+_DECK_SECTION_SQL = "SELECT id, did FROM cards WHERE did = ? AND id IN ({placeholders})"
+_TAG_SECTION_SQL = "SELECT c.id, n.tags FROM cards c JOIN notes n ON n.id = c.nid WHERE n.tags LIKE ? AND c.id IN ({placeholders})"
+_UNTAGGED_SECTION_SQL = "SELECT c.id, n.tags FROM cards c JOIN notes n ON n.id = c.nid WHERE TRIM(n.tags) = '' AND c.id IN ({placeholders})"
+
+
+class CardSections:
+    """Seções da grade, na ordem de exibição.
+
+    `keys[s]` é o did (por deck) ou a tag (por tag) da seção `s` e `sizes[s]` o seu total
+    de cartões. `category_counts[s * CATEGORY_COUNT + categoria]` e `due_counts[s]` são o
+    mini-sumário de cada seção. `rows[s]` são as linhas da seção no instantâneo dos cartões
+    carregados, ou None enquanto ela não foi aberta; as seções de cada linha carregada ficam
+    em `_offsets`/`_members` (listas compactas), para as atualizações tile a tile.
+    """
+
+    __slots__ = ("mode", "keys", "sizes", "rows", "category_counts", "due_counts", "_index_by_key", "_offsets", "_members")
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.keys: list[Hashable] = []
+        self.sizes: list[int] = []
+        self.rows: list[array | None] = []
+        self.category_counts: list[int] = []
+        self.due_counts: list[int] = []
+        self._index_by_key: dict[Hashable, int] = {}
+        self._offsets = array("i", [0])
+        self._members = array("i")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def sections_of(self, row: int) -> Sequence[int]:
+        """Seções em que a linha `row` do instantâneo aparece."""
+        return self._members[self._offsets[row]:self._offsets[row + 1]]
+
+    def counts(self, section: int) -> list[int]:
+        """Contagem de cada categoria (CATEGORY_*) da seção."""
+        start = section * CATEGORY_COUNT
+        return self.category_counts[start:start + CATEGORY_COUNT]
+
+    def update_row(self, row: int, old_category: int, new_category: int, due_change: int) -> None:
+        """Corrige o mini-sumário das seções da linha depois de o cartão mudar."""
+        for section in self.sections_of(row):
+            self.category_counts[section * CATEGORY_COUNT + old_category] -= 1
+            self.category_counts[section * CATEGORY_COUNT + new_category] += 1
+            self.due_counts[section] += due_change
+
+    def add_row(self, keys: Iterable[Hashable]) -> None:
+        """Registra as seções (pelas chaves) da próxima linha acrescentada ao instantâneo."""
+        for key in keys:
+            section = self._index_by_key.get(key)
+            if section is not None: # Chave sem seção: o cartão mudou depois dos mini-sumários
+                self._members.append(section)
+        self._offsets.append(len(self._members))
+
+
+def summarize_sections(mode: str, grouped_counts: Iterable[tuple[Sequence[Hashable], int, int, int]], sort_key: Callable[[Hashable], Any]) -> CardSections:
+    """Monta as seções a partir das contagens (chaves, categoria, vencido hoje, quantidade), ordenadas por `sort_key`."""
+    summaries: dict[Hashable, list[int]] = {} # Por chave: contagem de cada categoria e, na última posição, os vencidos
+    for keys, category, is_due, count in grouped_counts:
+        for key in keys:
+            summary = summaries.get(key)
+            if summary is None:
+                summary = summaries[key] = [0] * (CATEGORY_COUNT + 1)
+            summary[category] += count
+            if is_due:
+                summary[CATEGORY_COUNT] += count
+
+    sections = CardSections(mode)
+    for key in sorted(summaries, key=sort_key):
+        summary = summaries[key]
+        sections._index_by_key[key] = len(sections.keys)
+        sections.keys.append(key)
+        sections.sizes.append(sum(summary[:CATEGORY_COUNT]))
+        sections.rows.append(None)
+        sections.category_counts.extend(summary[:CATEGORY_COUNT])
+        sections.due_counts.append(summary[CATEGORY_COUNT])
+    return sections
+
+
+def _note_tag_keys(tags: str) -> tuple[str, ...]:
+    return tuple(tags.split()) or (UNTAGGED_SECTION_KEY,)
+
+
+def load_section_summaries(db: Any, cids: Sequence[int], mode: str, today: int, deck_index: DeckIndex | None) -> CardSections:
+    """Seções por deck (ordenadas pelo nome do deck) ou por tag (em ordem alfabética, sem tag por último).
+
+    Só os mini-sumários são calculados, com uma agregação GROUP BY no SQLite por lote de
+    ids (como card_data.load_grouped_counts); as linhas de cada seção ficam para
+    `load_section_rows`.
+    """
+    if mode == "deck":
+        def deck_sort_key(did: int) -> tuple:
+            name = deck_index.name(did) if deck_index is not None else None
+            return (name is None, (name or "").lower(), did)
+
+        grouped_counts = load_grouped_counts(db, cids, ("did", CATEGORY_SQL_CASE, DUE_TODAY_SQL), (today,))
+        return summarize_sections(
+            mode, (((did,), category, is_due, count) for (did, category, is_due), count in grouped_counts.items()), deck_sort_key,
+        )
+
+    return summarize_sections(
+        mode,
+        ((_note_tag_keys(tags), category, is_due, count) for tags, category, is_due, count in iter_chunked_rows(db, _TAG_SUMMARY_SQL, cids, (today,))),
+        lambda tag: (tag == UNTAGGED_SECTION_KEY, tag.lower(), tag),
+    )
+
+
+def load_section_rows(db: Any, all_cids: Sequence[int], sections: CardSections, section: int, snapshot: CardSnapshot) -> CardSnapshot:
+    """Lê os cartões da seção `section` e registra as linhas dela em `sections.rows`.
+
+    `all_cids` são os cartões do filtro na ordenação da grade e `snapshot` o instantâneo dos
+    cartões já carregados. Os cartões da seção que ainda não estão nele são lidos e
+    acrescentados ao final; retorna o instantâneo resultante (`snapshot` não é alterado).
+    """
+    key = sections.keys[section]
+    keys_by_cid: dict[int, tuple] = {}
+    if sections.mode == "deck":
+        for cid, did in iter_chunked_rows(db, _DECK_SECTION_SQL, all_cids, (key,)):
+            keys_by_cid[cid] = (did,)
+    else:
+        if key == UNTAGGED_SECTION_KEY:
+            tag_rows = iter_chunked_rows(db, _UNTAGGED_SECTION_SQL, all_cids)
+        else:
+            tag_rows = iter_chunked_rows(db, _TAG_SECTION_SQL, all_cids, (f"%{key}%",))
+        for cid, tags in tag_rows:
+            note_keys = _note_tag_keys(tags)
+            if key in note_keys:
+                keys_by_cid[cid] = note_keys
+
+    section_cids = [cid for cid in all_cids if cid in keys_by_cid]
+    new_cids = [cid for cid in section_cids if snapshot.row_of(cid) is None]
+    if new_cids:
+        snapshot = snapshot.concatenated(load_card_snapshot(db, new_cids))
+        for cid in new_cids:
+            sections.add_row(keys_by_cid[cid])
+    sections.rows[section] = array("i", (snapshot.row_of(cid) for cid in section_cids))
+    return snapshot
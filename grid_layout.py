@@ -0,0 +1,49 @@
+"""Dimensionamento da grade do Memory Mosaic.
+
+Calcula o maior tamanho de tile com o qual todos os tiles cabem na área
+disponível. O mesmo algoritmo está em web/mosaic_fit.js, usado pela página
+para reajustar a grade ao redimensionar a janela sem voltar ao Python.
+Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+
+def grid_fits(tile_count: int, tile_size: int, avail_width: int, avail_height: int, border: int, gap: int) -> bool:
+    """True se `tile_count` tiles de `tile_size` px (conteúdo) cabem em avail_width x avail_height."""
+    pitch = tile_size + 2 * border + gap
+    if pitch <= 0:
+        return False
+    cols = (avail_width + gap) // pitch
+    if cols <= 0:
+        return False
+    rows = -(-tile_count // cols)
+    return rows * pitch - gap <= avail_height
+
+
+def solve_tile_size(tile_count: int, avail_width: int, avail_height: int, min_size: int, max_size: int, border: int, gap: int) -> int:
+    """Maior tamanho de tile (conteúdo, px) em [min_size, max_size] com o qual a grade cabe.
+
+    Diminuir o tile nunca aumenta a altura da grade (mais colunas, menos linhas),
+    então a busca binária encontra o maior tamanho que cabe em O(log(max - min)).
+    Se nem o tamanho mínimo couber, retorna `min_size` (a grade terá rolagem).
+    """
+    if tile_count <= 0 or max_size <= min_size:
+        return max(min_size, max_size) if tile_count <= 0 else min_size
+    if not grid_fits(tile_count, min_size, avail_width, avail_height, border, gap):
+        return min_size
+    low, high = min_size, max_size
+    while low < high:
+        middle = (low + high + 1) // 2
+        if grid_fits(tile_count, middle, avail_width, avail_height, border, gap):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def due_indicator_size(tile_size: int, size_ratio: float | None) -> int:
+    """Diâmetro (px) do indicador de vencimento para o tamanho de tile dado."""
+    if size_ratio is None:
+        return 1
+    return max(1, int(tile_size * size_ratio))
@@ -0,0 +1,234 @@
+"""Exportação do mosaico do filtro inteiro para PNG ou SVG.
+
+A imagem tem um tile por cartão do filtro, na ordenação atual, sem paginação
+nem modo agrupado. As cores vêm da mesma classificação e paleta de gradiente
+da grade (tile_engine.compute_tile_coloring e render_engine.get_gradient_lut).
+Os cartões são lidos em lotes e cada linha de tiles é escrita no arquivo assim
+que fica pronta: o PNG é codificado linha a linha com zlib (Python puro, sem
+Pillow) e o SVG é escrito elemento a elemento. A memória usada não cresce com
+a imagem, só com a lista de cids devolvida pela busca. Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import zlib
+from typing import Any, BinaryIO, Callable, Iterator, Sequence, TextIO
+
+from .card_data import load_card_snapshot, load_ivl_range
+from .grid_layout import due_indicator_size
+from .render_engine import CollectionSource, find_sorted_cards, get_gradient_lut, resolve_ivl_ranges
+from .tile_engine import compute_tile_coloring, hex_to_rgb
+
+EXPORT_FORMATS = ("png", "svg")
+# Cartões lidos por consulta
+EXPORT_CHUNK_CARDS = 20000
+# Fundo da imagem (espaço entre os tiles e o fim da última linha)
+EXPORT_BACKGROUND_COLOR = "#FFFFFF"
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Tamanho do bloco comprimido acumulado antes de virar um chunk IDAT
+_PNG_IDAT_FLUSH_BYTES = 1 << 16
+
+def iter_tile_colors(
+    db: Any, cids: Sequence[int], config: dict, view_mode: str, gradient_field: str, today: int,
+    lut: dict | None, use_numpy: bool, progress: Callable[[int, int], None] | None = None,
+) -> Iterator[tuple[str, bool]]:
+    """(cor, indicador de vencimento) de cada cartão, na ordem de `cids`, lendo `EXPORT_CHUNK_CARDS` por vez."""
+    for start in range(0, len(cids), EXPORT_CHUNK_CARDS):
+        snapshot = load_card_snapshot(db, cids[start:start + EXPORT_CHUNK_CARDS])
+        coloring = compute_tile_coloring(snapshot, config, view_mode, gradient_field, today, lut, use_numpy=use_numpy)
+        palette = coloring["palette"]
+        due_rows = set(coloring["due"])
+        for row, color_index in enumerate(coloring["colors"]):
+            yield palette[color_index], row in due_rows
+        if progress is not None:
+            progress(start + len(snapshot), len(cids))
+
+
+class ExportLayout:
+    """Dimensões da imagem exportada: colunas, linhas e tamanho (px) dos tiles."""
+
+    __slots__ = ("tile_count", "columns", "rows", "tile_size", "gap", "due_size", "width", "height")
+
+    def __init__(self, config: dict, tile_count: int) -> None:
+        self.tile_count = tile_count
+        self.tile_size = max(1, config.get("export_tile_size_px"))
+        self.gap = max(0, config.get("export_tile_gap_px"))
+        configured_columns = config.get("export_columns")
+        # 0: colunas para uma imagem aproximadamente quadrada
+        self.columns = configured_columns if configured_columns > 0 else max(1, math.ceil(math.sqrt(tile_count)))
+        self.columns = max(1, min(self.columns, tile_count))
+        self.rows = math.ceil(tile_count / self.columns)
+        self.due_size = min(self.tile_size, due_indicator_size(self.tile_size, config.get("due_indicator_size_ratio")))
+        step = self.tile_size + self.gap
+        self.width = self.columns * step - self.gap
+        self.height = self.rows * step - self.gap
+
+
+def _iter_tile_rows(tiles: Iterator[tuple[str, bool]], columns: int) -> Iterator[list[tuple[str, bool]]]:
+    tile_row: list[tuple[str, bool]] = []
+    for tile in tiles:
+        tile_row.append(tile)
+        if len(tile_row) == columns:
+            yield tile_row
+            tile_row = []
+    if tile_row:
+        yield tile_row
+
+
+class PngStreamWriter:
+    """Escreve um PNG RGB de 8 bits linha a linha, comprimindo os dados (IDAT) à medida que chegam."""
+
+    def __init__(self, output: BinaryIO, width: int, height: int) -> None:
+        self._output = output
+        self._compressor = zlib.compressobj(6)
+        self._pending: list[bytes] = []
+        self._pending_size = 0
+        output.write(_PNG_SIGNATURE)
+        # Largura, altura, 8 bits por canal, cor RGB (2), deflate, filtros padrão, sem entrelaçamento
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        self._output.write(struct.pack(">I", len(data)))
+        self._output.write(chunk_type)
+        self._output.write(data)
+        self._output.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def _queue(self, compressed: bytes) -> None:
+        if compressed:
+            self._pending.append(compressed)
+            self._pending_size += len(compressed)
+        if self._pending_size >= _PNG_IDAT_FLUSH_BYTES:
+            self._write_chunk(b"IDAT", b"".join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def write_row(self, pixels: bytes) -> None:
+        """Acrescenta uma linha de pixels RGB (sem filtro: byte 0 no início da linha)."""
+        self._queue(self._compressor.compress(b"\x00" + pixels))
+
+    def close(self) -> None:
+        self._pending.append(self._compressor.flush())
+        self._write_chunk(b"IDAT", b"".join(self._pending))
+        self._pending = []
+        self._write_chunk(b"IEND", b"")
+
+
+def write_png(output: BinaryIO, layout: ExportLayout, tiles: Iterator[tuple[str, bool]], config: dict) -> None:
+    """Desenha os tiles no PNG: borda de 1px (tiles de 3px ou mais), preenchimento e indicador de vencimento."""
+    tile_size, gap, due_size = layout.tile_size, layout.gap, layout.due_size
+    background = bytes(hex_to_rgb(EXPORT_BACKGROUND_COLOR))
+    border = bytes(hex_to_rgb(config.get("tile_border_color")))
+    due_color = bytes(hex_to_rgb(config.get("due_indicator_color")))
+    has_border = tile_size >= 3
+    due_start = (tile_size - due_size) // 2
+    gap_pixels = background * gap
+    row_bytes = 3 * layout.width
+    gap_row = background * layout.width
+
+    # Linha de pixels de um tile (com o espaço seguinte), por (cor, vencimento, tipo de linha):
+    # 0 = borda, 1 = interior, 2 = interior na altura do indicador de vencimento
+    segments: dict[tuple[str, bool, int], bytes] = {}
+
+    def segment(color: str, due: bool, kind: int) -> bytes:
+        key = (color, due, kind)
+        pixels = segments.get(key)
+        if pixels is None:
+            fill = bytes(hex_to_rgb(color))
+            if kind == 0:
+                pixels = border * tile_size
+            else:
+                row = [fill] * tile_size
+                if due: # Só na altura do indicador (tipo 2)
+                    row[due_start:due_start + due_size] = [due_color] * due_size
+                if has_border:
+                    row[0] = row[-1] = border
+                pixels = b"".join(row)
+            pixels = segments[key] = pixels + gap_pixels
+        return pixels
+
+    line_kinds = []
+    for y in range(tile_size):
+        if has_border and y in (0, tile_size - 1):
+            line_kinds.append(0)
+        elif due_start <= y < due_start + due_size:
+            line_kinds.append(2)
+        else:
+            line_kinds.append(1)
+
+    writer = PngStreamWriter(output, layout.width, layout.height)
+    for row_index, tile_row in enumerate(_iter_tile_rows(tiles, layout.columns)):
+        if row_index:
+            for _ in range(gap):
+                writer.write_row(gap_row)
+        for kind in line_kinds:
+            pixels = b"".join(segment(color, due and kind == 2, kind) for color, due in tile_row)[:row_bytes]
+            writer.write_row(pixels + background * ((row_bytes - len(pixels)) // 3))
+    writer.close()
+
+
+def write_svg(output: TextIO, layout: ExportLayout, tiles: Iterator[tuple[str, bool]], config: dict) -> None:
+    """Escreve os tiles como <rect> (com borda) e os indicadores de vencimento como <circle>."""
+    step = layout.tile_size + layout.gap
+    inner = layout.tile_size - 1
+    due_radius = layout.due_size / 2
+    due_color = config.get("due_indicator_color")
+    output.write(
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.width}" height="{layout.height}" '
+        f'viewBox="0 0 {layout.width} {layout.height}">\n'
+        f'<rect width="100%" height="100%" fill="{EXPORT_BACKGROUND_COLOR}"/>\n'
+        f'<g stroke="{config.get("tile_border_color")}" stroke-width="1">\n'
+    )
+    for row_index, tile_row in enumerate(_iter_tile_rows(tiles, layout.columns)):
+        y = row_index * step
+        elements = []
+        for column, (color, due) in enumerate(tile_row):
+            x = column * step
+            # Traço de 1px centrado na borda: o tile ocupa exatamente tile_size px
+            elements.append(f'<rect x="{x + 0.5}" y="{y + 0.5}" width="{inner}" height="{inner}" fill="{color}"/>')
+            if due:
+                elements.append(
+                    f'<circle cx="{x + layout.tile_size / 2}" cy="{y + layout.tile_size / 2}" r="{due_radius}" '
+                    f'fill="{due_color}" stroke="none"/>'
+                )
+        output.write("\n".join(elements))
+        output.write("\n")
+    output.write("</g>\n</svg>\n")
+
+
+def export_mosaic(
+    source: CollectionSource, config: dict, view_state: dict, path: str, export_format: str,
+    progress: Callable[[int, int], None] | None = None,
+) -> int:
+    """Exporta o mosaico de todos os cartões do filtro de `view_state` para `path` ("png" ou "svg").
+
+    Usa de `view_state` o filtro, a ordenação, o modo, o campo do gradiente, o dia de hoje
+    e o estado da coleção (ver render_engine.compute_render_model). `progress(cartões lidos,
+    total)` é chamado a cada lote. Retorna o número de tiles exportados.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {export_format}")
+    view_mode = view_state["view_mode"]
+    gradient_field = view_state["gradient_field"]
+    cids = find_sorted_cards(source, config, view_state)
+    if not cids:
+        return 0
+
+    gradient_lut = None
+    if view_mode == "gradient":
+        _, ivl_color_limits = resolve_ivl_ranges(config, view_mode, gradient_field, lambda: load_ivl_range(source.db, cids))
+        gradient_lut = get_gradient_lut(config, gradient_field, ivl_color_limits)
+    tiles = iter_tile_colors(
+        source.db, cids, config, view_mode, gradient_field, view_state["today"], gradient_lut,
+        config.get("memorymosaic_use_numpy"), progress,
+    )
+    layout = ExportLayout(config, len(cids))
+    if export_format == "png":
+        with open(path, "wb") as output:
+            write_png(output, layout, tiles, config)
+    else:
+        with open(path, "w", encoding="utf-8") as output:
+            write_svg(output, layout, tiles, config)
+    return len(cids)
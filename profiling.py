@@ -0,0 +1,129 @@
+"""Medição opcional do tempo de cada fase da renderização (memorymosaic_profiling).
+
+`RenderProfile` guarda a duração das fases de uma exibição da grade no Python
+(busca, leitura dos cartões, revlog, ...), as medições da página enviadas pelo
+JS (web/mosaic_profile.js) e o tempo gasto com tooltips enquanto ela esteve
+exibida. `ProfileHistory` mantém as últimas exibições para o painel de
+diagnóstico e para o arquivo de log. Com a medição desligada nenhum perfil é
+criado e `profile_span` não faz nada. Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Iterator
+
+# Fases do Python, na ordem de exibição; "html" é o restante do cálculo da grade
+PHASES = ("find_cards", "cards", "bins", "revlog", "summary", "coloring", "sections", "payload", "html")
+# Medições da página (ms): início dos scripts da grade, decodificação do payload, primeiro desenho e pintura
+PAGE_MARKS = ("scripts", "decode", "init", "paint")
+
+
+class RenderProfile:
+    """Medições de uma exibição da grade."""
+
+    __slots__ = ("profile_id", "origin", "created", "spans", "total", "tiles", "page", "tooltip_count", "tooltip_seconds")
+
+    def __init__(self) -> None:
+        self.profile_id = 0
+        self.origin = ""
+        self.created = time.time()
+        self.spans: dict[str, float] = {}
+        self.total = 0.0
+        self.tiles = 0
+        self.page: dict[str, float] | None = None
+        self.tooltip_count = 0
+        self.tooltip_seconds = 0.0
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Soma à fase `phase` o tempo do bloco `with`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[phase] = self.spans.get(phase, 0.0) + time.perf_counter() - started
+
+    def finish_computation(self, seconds: float, tiles: int) -> None:
+        """Registra a duração total do cálculo da grade; o que não está em outra fase vai para "html"."""
+        self.spans["html"] = max(0.0, seconds - sum(self.spans.values()))
+        self.total = seconds
+        self.tiles = tiles
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.profile_id,
+            "origin": self.origin,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created)),
+            "total_ms": round(self.total * 1000, 2),
+            "tiles": self.tiles,
+            "spans_ms": {phase: round(self.spans[phase] * 1000, 2) for phase in PHASES if phase in self.spans},
+            "page_ms": self.page,
+            "tooltips": self.tooltip_count,
+            "tooltip_ms": round(self.tooltip_seconds * 1000, 2),
+        }
+
+    def summary_line(self) -> str:
+        """Uma linha de texto para o painel de diagnóstico."""
+        parts = [f"#{self.profile_id} {time.strftime('%H:%M:%S', time.localtime(self.created))} {self.origin} {self.total * 1000:.1f} ms"]
+        if self.spans:
+            parts.append(" ".join(f"{phase} {self.spans[phase] * 1000:.1f}" for phase in PHASES if phase in self.spans))
+        if self.page is not None:
+            parts.append("page " + " ".join(f"{mark} {self.page[mark]:.1f}" for mark in PAGE_MARKS if mark in self.page))
+        if self.tooltip_count:
+            parts.append(f"tooltips {self.tooltip_count} ({self.tooltip_seconds * 1000 / self.tooltip_count:.2f} ms)")
+        return " | ".join(parts)
+
+
+def profile_span(profile: RenderProfile | None, phase: str) -> ContextManager:
+    """`profile.span(phase)`, ou um contexto vazio quando a medição está desligada."""
+    return nullcontext() if profile is None else profile.span(phase)
+
+
+class ProfileHistory:
+    """As últimas `max_entries` exibições medidas, da mais antiga para a mais recente."""
+
+    def __init__(self, max_entries: int, previous: ProfileHistory | None = None) -> None:
+        self.entries: deque[RenderProfile] = deque(maxlen=max(1, max_entries))
+        self.next_id = 1
+        if previous is not None:
+            self.entries.extend(previous.entries)
+            self.next_id = previous.next_id
+
+    @property
+    def max_entries(self) -> int:
+        return self.entries.maxlen
+
+    def add(self, profile: RenderProfile) -> None:
+        profile.profile_id = self.next_id
+        self.next_id += 1
+        self.entries.append(profile)
+
+    def latest(self) -> RenderProfile | None:
+        return self.entries[-1] if self.entries else None
+
+    def add_tooltip(self, seconds: float) -> None:
+        """Conta um tooltip montado para a grade exibida (a exibição mais recente)."""
+        profile = self.latest()
+        if profile is not None:
+            profile.tooltip_count += 1
+            profile.tooltip_seconds += seconds
+
+    def attach_page_marks(self, marks: dict) -> RenderProfile | None:
+        """Associa as medições da página à exibição mais recente, se ela ainda não as tiver."""
+        profile = self.latest()
+        if profile is None or profile.page is not None:
+            return None
+        profile.page = {mark: float(marks[mark]) for mark in PAGE_MARKS if isinstance(marks.get(mark), (int, float))}
+        return profile
+
+
+def append_profile_log(path: str, record: dict) -> None:
+    """Acrescenta `record` como uma linha JSON ao arquivo de log (a pasta é criada se preciso)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as log_file:
+        log_file.write(json.dumps(record, ensure_ascii=False) + "\n")
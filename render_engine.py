@@ -0,0 +1,502 @@
+"""Núcleo da renderização da grade, independente do Anki.
+
+`compute_render_model` recebe a coleção (qualquer objeto com `find_cards(query,
+order)`, `db` e `tags`), o config do addon e o estado de visualização resolvido
+(filtro, ordenação, modo, paginação) e faz todo o trabalho pesado: busca,
+leitura dos cartões e do revlog, modo agrupado, seções, dimensionamento,
+cores, sumário, tags do menu de filtro e payload dos tiles. O resultado é um
+`RenderModel`, só com dados; a montagem do HTML (textos traduzidos, controles, scripts) e o estado de
+sessão ficam nos adaptadores de __init__.py. Assim o caminho quente pode ser
+medido e executado fora da thread principal, ou fora do Anki (ver
+benchmarks/), sem Qt. Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Protocol, Sequence
+
+from .card_data import (
+    CardSnapshot, load_card_snapshot, load_day_learning_cids, load_grouped_counts, load_ivl_range,
+    load_last_review_map, load_review_error_stats,
+)
+from .card_filter import combine_search
+from .card_sections import CardSections, load_section_summaries
+from .grid_layout import due_indicator_size, solve_tile_size
+from .profiling import RenderProfile, profile_span
+from .tile_engine import (
+    CATEGORY_COLOR_KEYS, CATEGORY_SQL_CASE, DUE_TODAY_SQL, BinAccumulator,
+    bin_size_for, build_gradient_lut, compute_tile_coloring, ivl_range,
+)
+from .tile_payload import encode_tile_payload
+
+# Cláusula ORDER BY de cada ordenação da grade
+SORT_ORDER_SQL = {
+    "id_asc": "c.id asc",      # Ordenar por ID do cartão (data de criação)
+    "ivl_asc": "c.ivl asc",    # Intervalo crescente
+    "ivl_desc": "c.ivl desc",  # Intervalo decrescente
+    "due_asc": "c.due asc",    # Data de vencimento mais próxima
+}
+
+# Ordenações por frequência de erro: calculadas sobre a agregação do revlog (load_review_error_stats),
+# da maior para a menor; empates e cartões sem respostas mantêm a ordem de criação.
+# Valor de cada uma a partir de (erros, respostas, lapsos, erros recentes)
+ERROR_SORT_VALUES: dict[str, Callable[[tuple[int, int, int, int]], float]] = {
+    "failure_rate_desc": lambda stats: stats[0] / stats[1] if stats[1] else 0.0,
+    "lapses_desc": lambda stats: stats[2],
+    "recent_failures_desc": lambda stats: stats[3],
+}
+SORT_ORDER_KEYS = tuple(SORT_ORDER_SQL) + tuple(ERROR_SORT_VALUES)
+_NO_REVIEW_STATS = (0, 0, 0, 0)
+SECONDS_PER_DAY = 86400
+
+# Agregação do revlog usada pelas ordenações por erro: (chave, maior id do revlog agregado,
+# {cid: estatísticas}) da última calculada
+_error_stats_cache: tuple[tuple, int, dict[int, tuple[int, int, int, int]]] | None = None
+
+# A largura da borda do tile está fixa em 1px no CSS; o dimensionamento precisa saber disso
+TILE_BORDER_WIDTH_PX = 1
+# Área útil da grade: desconta o padding da célula da tabela do Anki e o título
+ANKI_TABLE_CELL_PADDING_PX = 5
+TITLE_AREA_ESTIMATED_HEIGHT_PX = 35
+
+# Modo agrupado: cartões lidos por consulta na passada única sobre o filtro
+BIN_STREAM_CHUNK_CARDS = 20000
+
+# Paletas de gradiente pré-calculadas (LUT), por (campo, inversão, min, max, cores)
+GRADIENT_LUT_MAX_STOPS = 4096
+_GRADIENT_LUT_CACHE_MAX_ENTRIES = 32
+_gradient_lut_cache: dict[tuple, dict] = {}
+
+# Protege os caches do módulo (paletas e estatísticas de erro): a grade pode ser calculada em
+# segundo plano (QueryOp) enquanto a thread principal descarta ou consulta os caches
+_cache_lock = threading.Lock()
+
+
+class CollectionSource(Protocol):
+    """O que o núcleo usa da coleção: a busca do Anki, o banco (`all`, `scalar`, ...) e as tags (`tags.all()`)."""
+
+    db: Any
+    tags: Any
+
+    def find_cards(self, query: str, order: Any = ...) -> Sequence[int]: ...
+
+
+class RenderModel:
+    """Resultado de `compute_render_model`: os dados de uma grade, sem HTML."""
+
+    __slots__ = (
+        "all_cids", "total_cards", "drilldown", "bin_size", "bins", "snapshot", "last_review_timestamps_map",
+        "tile_count", "card_count_displayed", "tile_size", "tile_gap", "due_size", "grid_height", "use_canvas",
+        "gradient_ivl_range", "ivl_color_limits", "gradient_lut", "coloring", "color_counts", "due_today_count",
+        "tile_model", "sections", "all_tags",
+    )
+
+    def __init__(self, all_cids: Sequence[int], drilldown: tuple[int, int] | None) -> None:
+        self.all_cids = all_cids # Cartões do filtro na ordenação atual (só os do grupo aberto, no drill-down)
+        self.total_cards = len(all_cids)
+        self.drilldown = drilldown
+        self.bin_size = 0 # Cartões por tile no modo agrupado (0: um tile por cartão)
+        self.bins: BinAccumulator | None = None
+        self.snapshot = CardSnapshot(())
+        self.last_review_timestamps_map: dict[int, int] = {}
+        self.tile_count = 0
+        self.card_count_displayed = 0
+        self.tile_size = 0
+        self.tile_gap = 0
+        self.due_size = 0
+        self.grid_height = 0
+        self.use_canvas = False
+        # (min, max, escala dinâmica) do ivl exibida no tooltip e limites de ivl usados na cor
+        self.gradient_ivl_range: tuple[int | None, int | None, bool] = (None, None, False)
+        self.ivl_color_limits: tuple[int | None, int | None] = (None, None)
+        self.gradient_lut: dict | None = None
+        self.coloring: dict | None = None
+        self.color_counts: dict[str, int] = {}
+        self.due_today_count = 0
+        self.tile_model: dict | None = None # Modelo JSON dos renderizadores da página (web/)
+        # Visualização em seções: mini-sumário de cada seção (as linhas são lidas quando ela é aberta); None na grade única
+        self.sections: CardSections | None = None
+        # Tags da coleção, em ordem alfabética (menu do filtro por tag)
+        self.all_tags: list[str] = []
+
+
+def effective_grid_width(config: dict) -> int:
+    """Largura útil da grade: desconta o padding da célula da tabela do Anki e o padding da grade."""
+    return config.get("grid_max_width_px") - (2 * ANKI_TABLE_CELL_PADDING_PX) - (2 * config.get("grid_padding_px"))
+
+
+def load_filter_summary(db: Any, cids: Sequence[int], config: dict, today_for_due_calc: int) -> tuple[dict[str, int], int]:
+    """Contagens do sumário para todos os cartões do filtro: ({cor categórica: quantidade}, vencidos hoje).
+
+    Agregação GROUP BY/CASE no SQLite, sem carregar os cartões; independe da paginação
+    da grade. Como o filtro é uma busca do Anki, os ids vão em lotes (uma consulta `IN`
+    a cada SQL_PARAM_CHUNK_SIZE cartões) cujas contagens parciais load_grouped_counts soma.
+    """
+    grouped_counts = load_grouped_counts(db, cids, (CATEGORY_SQL_CASE, DUE_TODAY_SQL), (today_for_due_calc,))
+    color_counts: dict[str, int] = {}
+    due_today_count = 0
+    for (category, is_due), count in grouped_counts.items():
+        color = config.get(CATEGORY_COLOR_KEYS[category])
+        color_counts[color] = color_counts.get(color, 0) + count
+        if is_due:
+            due_today_count += count
+    return color_counts, due_today_count
+
+
+def use_binned_mode(config: dict, binning: str, card_count: int) -> bool:
+    """Decide se a grade usa o modo agrupado conforme a opção ("auto", "on", "off") e o tamanho do filtro."""
+    if binning == "on":
+        return True
+    if binning == "off":
+        return False
+    binning_threshold = config.get("binning_auto_threshold")
+    return isinstance(binning_threshold, int) and card_count >= binning_threshold
+
+
+def accumulate_bins(
+    db: Any, cids: Sequence[int], bin_size: int, view_mode: str, gradient_field: str, today_for_due_calc: int, use_numpy: bool,
+) -> BinAccumulator:
+    """Estatísticas dos grupos do modo agrupado, em uma única passada (lote a lote) sobre os cartões do filtro."""
+    bin_accumulator = BinAccumulator(len(cids), bin_size, gradient_field if view_mode == "gradient" else None, today_for_due_calc)
+    for start in range(0, len(cids), BIN_STREAM_CHUNK_CARDS):
+        chunk_snapshot = load_card_snapshot(db, cids[start:start + BIN_STREAM_CHUNK_CARDS])
+        bin_accumulator.add(start, chunk_snapshot, use_numpy=use_numpy)
+    return bin_accumulator
+
+
+def resolve_renderer_mode(config: dict, tile_count: int) -> str:
+    """Decide entre o renderizador "dom" e "canvas" conforme o config e o número de tiles."""
+    configured_renderer = config.get("memorymosaic_renderer")
+    if configured_renderer in ("dom", "canvas"):
+        return configured_renderer
+    if configured_renderer not in (None, "auto"):
+        print(f"Memory Mosaic: Valor inválido '{configured_renderer}' para 'memorymosaic_renderer' no config.json. Usando padrão 'auto'.")
+
+    # Modo "auto": canvas a partir do limite configurado
+    canvas_threshold = config.get("canvas_auto_threshold")
+    if isinstance(canvas_threshold, int) and tile_count >= canvas_threshold:
+        return "canvas"
+    return "dom"
+
+
+def get_gradient_lut(config: dict, field: str, ivl_color_limits: tuple[int | None, int | None]) -> dict | None:
+    """Retorna a paleta pré-calculada (LUT) do gradiente de `field` para a renderização.
+
+    A paleta tem uma cor por valor inteiro da faixa [min, max] (quantizada em até
+    GRADIENT_LUT_MAX_STOPS cores para faixas maiores), já com a ordem (asc/desc) aplicada.
+    Fica em cache por (campo, ordem, min, max, cores), sendo reaproveitada entre renderizações.
+    Retorna None para um campo não reconhecido.
+    """
+    if field == "ivl":
+        min_val, max_val = ivl_color_limits
+    elif field in ("factor", "lapses", "due"):
+        min_val = config.get(f"gradient_{field}_min")
+        max_val = config.get(f"gradient_{field}_max")
+    else:
+        return None
+    invert_gradient = config.get(f"gradient_{field}_order") == "desc"
+    gradient_colors = (config.get("gradient_color_start"), config.get("gradient_color_mid"), config.get("gradient_color_end"))
+
+    lut_key = (field, invert_gradient, min_val, max_val, gradient_colors)
+    with _cache_lock:
+        lut = _gradient_lut_cache.get(lut_key)
+    if lut is not None:
+        return lut
+
+    lut = build_gradient_lut(config, min_val, max_val, invert_gradient, GRADIENT_LUT_MAX_STOPS)
+
+    with _cache_lock:
+        if len(_gradient_lut_cache) >= _GRADIENT_LUT_CACHE_MAX_ENTRIES:
+            _gradient_lut_cache.clear()
+        _gradient_lut_cache[lut_key] = lut
+    return lut
+
+
+def resolve_ivl_ranges(
+    config: dict, view_mode: str, gradient_field: str, find_ivl_range: Callable[[], tuple[int, int] | None],
+) -> tuple[tuple[int | None, int | None, bool], tuple[int | None, int | None]]:
+    """Faixa de ivl exibida no tooltip (min, max, escala dinâmica) e limites de ivl usados na cor.
+
+    Com `gradient_ivl_normalize` no gradiente de ivl, a escala vem de `find_ivl_range()`
+    (o (min, max) dos cartões que usam o gradiente, ou None); senão, da faixa do config.
+    """
+    normalize_ivl_active = config.get("gradient_ivl_normalize")
+    dynamic_min: int | None = None
+    dynamic_max: int | None = None
+    if view_mode == "gradient" and gradient_field == "ivl" and normalize_ivl_active:
+        # Considerar apenas cartões que efetivamente usarão o gradiente
+        found_ivl_range = find_ivl_range()
+        if found_ivl_range is not None:
+            dynamic_min, dynamic_max = found_ivl_range
+        else:
+            # Fallback para config se nenhum cartão aplicável for encontrado
+            dynamic_min = config.get("gradient_ivl_min")
+            dynamic_max = config.get("gradient_ivl_max")
+        # Garantir que min não seja maior que max (build_gradient_lut já trata min == max)
+        if dynamic_min is not None and dynamic_max is not None and dynamic_min > dynamic_max:
+            dynamic_max = dynamic_min
+
+    if normalize_ivl_active and dynamic_min is not None and dynamic_max is not None:
+        return (dynamic_min, dynamic_max, True), (dynamic_min, dynamic_max)
+    config_limits = (config.get("gradient_ivl_min"), config.get("gradient_ivl_max"))
+    if view_mode == "gradient" and gradient_field == "ivl":
+        return config_limits + (False,), config_limits
+    return (None, None, False), config_limits
+
+
+def get_review_error_stats(db: Any, config: dict, view_state: dict) -> dict[int, tuple[int, int, int, int]]:
+    """Estatísticas de erro de todos os cartões (ver card_data.load_review_error_stats), com cache.
+
+    Os erros recentes são os dos últimos `error_sort_recent_days` dias do agendador, contados
+    a partir de `view_state["day_cutoff"]`. A agregação do revlog inteiro é refeita só quando a
+    coleção aberta (`view_state["collection_identity"]`) muda, o dia vira ou a janela é alterada.
+    Respostas novas (entradas do revlog com id acima da maior já agregada) atualizam só os
+    cartões respondidos; quem remove entradas do revlog (desfazer, sincronização) descarta o
+    cache com `clear_review_error_stats`.
+    """
+    global _error_stats_cache
+    recent_days = config.get("error_sort_recent_days")
+    day_cutoff = view_state["day_cutoff"]
+    cache_key = (view_state["collection_identity"], day_cutoff, recent_days)
+    recent_since_ms = (day_cutoff - recent_days * SECONDS_PER_DAY) * 1000
+    revlog_watermark = db.scalar("SELECT MAX(id) FROM revlog") or 0 # Busca pela chave primária
+    with _cache_lock:
+        cached = _error_stats_cache
+    if cached is not None and cached[0] == cache_key and cached[1] == revlog_watermark:
+        return cached[2]
+    if cached is not None and cached[0] == cache_key and cached[1] < revlog_watermark:
+        # Cópia: a agregação anterior pode estar em uso por outra renderização
+        stats = dict(cached[2])
+        answered_cids = db.list("SELECT DISTINCT cid FROM revlog WHERE id > ?", cached[1])
+        for cid in answered_cids:
+            stats.pop(cid, None)
+        stats.update(load_review_error_stats(db, recent_since_ms, answered_cids))
+    else:
+        stats = load_review_error_stats(db, recent_since_ms)
+    with _cache_lock:
+        _error_stats_cache = (cache_key, revlog_watermark, stats)
+    return stats
+
+
+def clear_review_error_stats() -> None:
+    """Descarta a agregação em cache (ex.: ao fechar o perfil)."""
+    global _error_stats_cache
+    with _cache_lock:
+        _error_stats_cache = None
+
+
+def resolve_search_query(db: Any, view_state: dict) -> str:
+    """Busca do filtro de `view_state`, com os ids dos cartões em aprendizado de vários dias.
+
+    `view_state["search_query"]` não tem esses ids (é a busca exibida e a usada nas chaves
+    da grade); quando os estados do filtro dependem deles (card_filter), eles são lidos
+    aqui, na thread do cálculo, e a busca é refeita a partir de "deck_search" e "card_filter".
+    """
+    card_filter = view_state["card_filter"]
+    if card_filter is None or not card_filter.uses_day_learning_cids():
+        return view_state["search_query"]
+    return combine_search(view_state["deck_search"], card_filter, load_day_learning_cids(db))
+
+
+def find_sorted_cards(source: CollectionSource, config: dict, view_state: dict) -> list[int]:
+    """Cids do filtro de `view_state` na ordenação `sort_order_key`.
+
+    As ordenações de SORT_ORDER_SQL vão para o ORDER BY da busca; as por erro buscam
+    na ordem de criação e reordenam pela agregação do revlog (uma consulta, em cache).
+    """
+    sort_order_key = view_state["sort_order_key"]
+    search_query = resolve_search_query(source.db, view_state)
+    error_sort_value = ERROR_SORT_VALUES.get(sort_order_key)
+    if error_sort_value is None:
+        return source.find_cards(search_query, order=SORT_ORDER_SQL.get(sort_order_key))
+    cids = source.find_cards(search_query, order=SORT_ORDER_SQL["id_asc"])
+    stats = get_review_error_stats(source.db, config, view_state)
+    # sorted é estável também com reverse=True: empates ficam na ordem de criação
+    return sorted(cids, key=lambda cid: error_sort_value(stats.get(cid, _NO_REVIEW_STATS)), reverse=True)
+
+
+def compute_render_model(
+    source: CollectionSource | None, config: dict, view_state: dict, profile: RenderProfile | None = None,
+) -> RenderModel | None:
+    """Calcula os dados da grade para o estado de visualização `view_state` (ver
+    `_resolve_render_view_state` em __init__.py).
+
+    Usa de `view_state` só "search_query", "deck_search", "card_filter", "sort_order_key",
+    "view_mode", "gradient_field", "binning", "drilldown", "display_limit", "today", "day_cutoff",
+    "collection_identity", "sections" e "deck_index" (o card_data.DeckIndex usado para ordenar
+    as seções por deck).
+    Não altera estado algum além dos caches de paletas e de estatísticas de erro (protegidos
+    por `_cache_lock`), podendo rodar em qualquer thread. Retorna None se a coleção não estiver
+    aberta (`source` ou o seu banco ausentes); sem cartões a exibir, o modelo volta sem layout
+    nem cores.
+
+    Na visualização em seções o modelo cobre todos os cartões do filtro, sem paginação nem
+    modo agrupado, mas nenhum cartão é lido: só os mini-sumários das seções são agregados no
+    SQLite. Os cartões, as cores e o payload de cada seção ficam para quando ela é aberta
+    (ver card_sections.load_section_rows e `section_tile_model`).
+    """
+    view_mode = view_state["view_mode"]
+    gradient_field = view_state["gradient_field"]
+    today_val = view_state["today"]
+    display_limit = view_state["display_limit"]
+    drilldown = view_state["drilldown"]
+    use_numpy = config.get("memorymosaic_use_numpy")
+    use_sections = view_state["sections"] != "none" and drilldown is None
+
+    if source is None or source.db is None:
+        return None # Coleção fechada (ou ainda não carregada)
+    with profile_span(profile, "find_cards"):
+        all_cids = find_sorted_cards(source, config, view_state)
+    # Grupo aberto a partir do modo agrupado: a grade mostra só os cartões dele, um tile por cartão
+    if drilldown is not None:
+        all_cids = all_cids[drilldown[0]:drilldown[1]]
+    model = RenderModel(all_cids, drilldown)
+    model.all_tags = sorted(source.tags.all(), key=str.lower)
+
+    # Modo agrupado: cada tile representa `bin_size` cartões consecutivos na ordenação atual
+    if drilldown is None and not use_sections and use_binned_mode(config, view_state["binning"], model.total_cards):
+        model.bin_size = bin_size_for(model.total_cards, config.get("binning_target_tiles"))
+
+    if model.bin_size:
+        # Todos os cartões do filtro entram nos grupos, sem paginação nem instantâneo por cartão
+        with profile_span(profile, "bins"):
+            model.bins = accumulate_bins(source.db, all_cids, model.bin_size, view_mode, gradient_field, today_val, use_numpy)
+        model.card_count_displayed = model.total_cards
+        model.tile_count = model.bins.bin_count
+    elif use_sections:
+        # Seções: só os mini-sumários, agregados no SQLite; as seções mostram sempre o filtro inteiro
+        with profile_span(profile, "sections"):
+            model.sections = load_section_summaries(source.db, all_cids, view_state["sections"], today_val, view_state["deck_index"])
+        model.card_count_displayed = model.total_cards
+        model.tile_count = model.card_count_displayed
+    else:
+        # Paginação: display_limit infinito mostra todos
+        cids = all_cids if display_limit == float("inf") else all_cids[:display_limit]
+        # Leitura colunar (type/queue/ivl/factor/lapses/due/did) de todos os cartões exibidos de uma vez
+        with profile_span(profile, "cards"):
+            model.snapshot = load_card_snapshot(source.db, cids)
+        # Consulta em lotes com parâmetros (sem um IN literal com todos os cids)
+        with profile_span(profile, "revlog"):
+            model.last_review_timestamps_map = load_last_review_map(source.db, model.snapshot.cids)
+        model.card_count_displayed = len(cids)
+        model.tile_count = model.card_count_displayed
+
+    if model.card_count_displayed == 0:
+        return model
+
+    # Área útil da grade: desconta o padding da célula da tabela do Anki, o título e o padding da grade
+    grid_padding_px = config.get("grid_padding_px")
+    tile_min_size_px = config.get("tile_min_size_px")
+    tile_default_size_px = config.get("tile_default_size_px")
+    eff_grid_width = effective_grid_width(config)
+    eff_grid_height = (config.get("grid_max_height_px") -
+                       TITLE_AREA_ESTIMATED_HEIGHT_PX -
+                       (2 * ANKI_TABLE_CELL_PADDING_PX) -
+                       (2 * grid_padding_px))
+    model.grid_height = max(eff_grid_height, tile_min_size_px)
+
+    model.tile_gap = config.get("tile_default_gap_px")
+    # Maior tile entre o mínimo e o padrão com o qual a grade cabe; a página repete o
+    # cálculo (web/mosaic_fit.js) quando a largura do container muda
+    model.tile_size = solve_tile_size(
+        model.tile_count, eff_grid_width, model.grid_height,
+        tile_min_size_px, tile_default_size_px, TILE_BORDER_WIDTH_PX, model.tile_gap,
+    )
+    due_indicator_size_ratio = config.get("due_indicator_size_ratio")
+    model.due_size = due_indicator_size(model.tile_size, due_indicator_size_ratio)
+
+    # Renderizador: DOM (um <div> por tile) ou <canvas> (índices de cor compactos); as seções usam
+    # sempre o canvas, um só elemento por seção aberta
+    model.use_canvas = use_sections or resolve_renderer_mode(config, model.tile_count) == "canvas"
+
+    def find_ivl_range() -> tuple[int, int] | None:
+        if model.bins is not None:
+            return model.bins.ivl_range()
+        if model.sections is not None:
+            return load_ivl_range(source.db, all_cids) # Os cartões das seções ainda não foram lidos
+        return ivl_range(model.snapshot, use_numpy=use_numpy)
+
+    model.gradient_ivl_range, model.ivl_color_limits = resolve_ivl_ranges(config, view_mode, gradient_field, find_ivl_range)
+    # Paleta do gradiente calculada uma vez: a cor de cada tile vira um índice nesta tabela
+    if view_mode == "gradient":
+        model.gradient_lut = get_gradient_lut(config, gradient_field, model.ivl_color_limits)
+
+    # Cor (índice na paleta), indicador de vencimento e contagens de todos os tiles de uma vez;
+    # o JS (canvas ou DOM virtualizada) desenha a partir deste modelo. As seções são coloridas
+    # quando abertas (ver `section_tile_model`)
+    if model.sections is None:
+        with profile_span(profile, "coloring"):
+            if model.bins is not None:
+                # Modo agrupado: a cor de cada grupo resume os seus cartões (ver BinAccumulator.bin_color)
+                model.coloring = model.bins.coloring(config, view_mode, model.gradient_lut, config.get("binning_color_mode"))
+            else:
+                model.coloring = compute_tile_coloring(
+                    model.snapshot, config, view_mode, gradient_field, today_val, model.gradient_lut, use_numpy=use_numpy,
+                )
+    # Contagens do sumário sobre todo o filtro (e não só os tiles desta página), em uma agregação no SQLite
+    with profile_span(profile, "summary"):
+        color_counts, model.due_today_count = load_filter_summary(source.db, all_cids, config, today_val)
+    model.color_counts = color_counts if view_mode == "categorical" else {}
+
+    model.tile_model = {
+        "tileSize": model.tile_size,
+        "gap": model.tile_gap,
+        "border": TILE_BORDER_WIDTH_PX,
+        "padding": grid_padding_px,
+        "maxHeight": config.get("grid_max_height_px"),
+        "borderColor": config.get("tile_border_color"),
+        "dueColor": config.get("due_indicator_color"),
+        "dueSize": model.due_size,
+        # Parâmetros para o reajuste do tamanho dos tiles na página (MemoryMosaicFit)
+        "fit": {
+            "minSize": tile_min_size_px,
+            "maxSize": tile_default_size_px,
+            "height": model.grid_height,
+            "widthMargin": 2 * ANKI_TABLE_CELL_PADDING_PX,
+            "dueRatio": due_indicator_size_ratio,
+        },
+        "palette": model.coloring["palette"] if model.coloring is not None else [], # Seções: a paleta de cada uma
+    }
+    # cids (no modo agrupado, índices dos grupos), índices de cor e vencimentos no formato
+    # binário compacto (tile_payload.py)
+    if model.sections is None:
+        with profile_span(profile, "payload"):
+            model.tile_model["payload"] = encode_tile_payload(
+                range(model.tile_count) if model.bins is not None else model.snapshot.cids,
+                model.coloring["colors"], model.coloring["due"], len(model.coloring["palette"]),
+                compress=bool(config.get("memorymosaic_payload_compression")),
+            )
+    if model.use_canvas:
+        model.tile_model["hoverColor"] = "#000000"
+    return model
+
+
+def section_tile_model(
+    config: dict, tile_model: dict, snapshot: CardSnapshot, sections: CardSections, section: int,
+    view_mode: str, gradient_field: str, today: int, lut: dict | None,
+) -> dict:
+    """Modelo dos tiles da seção `section` (a partir do `tile_model` da grade), com payload.
+
+    A seção já deve ter sido lida (card_sections.load_section_rows) para `snapshot`. Os
+    tiles são os da seção, na ordenação da grade, coloridos agora com a paleta da grade
+    (`lut`); o tamanho dos tiles é resolvido para a quantidade de cartões e a altura da seção.
+    """
+    section_snapshot = snapshot.selected(sections.rows[section])
+    coloring = compute_tile_coloring(
+        section_snapshot, config, view_mode, gradient_field, today, lut, use_numpy=config.get("memorymosaic_use_numpy"),
+    )
+    max_height = config.get("sections_max_height_px")
+    fit = dict(tile_model["fit"], height=max(max_height - 2 * tile_model["padding"], config.get("tile_min_size_px")))
+    tile_size = solve_tile_size(
+        len(section_snapshot), effective_grid_width(config), fit["height"], fit["minSize"], fit["maxSize"], TILE_BORDER_WIDTH_PX, tile_model["gap"],
+    )
+    model = dict(
+        tile_model, palette=coloring["palette"], tileSize=tile_size, dueSize=due_indicator_size(tile_size, fit["dueRatio"]),
+        maxHeight=max_height, fit=fit,
+    )
+    model["payload"] = encode_tile_payload(
+        section_snapshot.cids, coloring["colors"], coloring["due"], len(coloring["palette"]),
+        compress=bool(config.get("memorymosaic_payload_compression")),
+    )
+    return model
@@ -0,0 +1,200 @@
+"""Reconstrução do estado dos cartões em datas passadas a partir do revlog (linha do tempo).
+
+O histórico de um conjunto de cartões vira uma sequência de eventos ordenada
+pelo tempo: a criação de cada cartão (o cid é o instante da criação, em ms) e
+cada entrada do `revlog`. `RevlogReplay` mantém um `CardSnapshot` com o estado
+de todos os cartões (type/queue/ivl/factor/lapses/due) depois de um prefixo
+desses eventos e avança aplicando só os eventos entre dois quadros. Para voltar
+no tempo, restaura o keyframe (cópia das colunas) mais próximo antes da data
+pedida e avança a partir dele; os keyframes são guardados à medida que o replay
+passa por eles, em um LRU.
+
+O revlog não registra suspensões nem enterros, então o estado reconstruído nunca
+está suspenso; cartões ainda não criados na data ficam com present = 0 (cor de
+fundo). As cores de cada quadro vêm de tile_engine.compute_tile_coloring, como
+na grade. Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Sequence
+
+from .card_data import CardSnapshot, iter_chunked_rows
+
+# Tipos de evento: os tipos de entrada do revlog e a criação do cartão
+EVENT_CREATED = -1
+REVLOG_LEARN = 0
+REVLOG_REVIEW = 1
+REVLOG_RELEARN = 2
+REVLOG_FILTERED = 3
+REVLOG_MANUAL = 4
+REVLOG_RESCHEDULED = 5
+
+SECONDS_PER_DAY = 86400
+
+# Colunas do estado que mudam com os eventos (as copiadas nos keyframes)
+STATE_COLUMNS = ("present", "type", "queue", "ivl", "factor", "lapses", "due")
+
+_REVLOG_SQL = "SELECT id, cid, ease, ivl, factor, type FROM revlog WHERE cid IN ({placeholders})"
+
+
+class ReplayEvents:
+    """Eventos em ordem cronológica, um array por coluna (`row` é a linha do cartão no instantâneo)."""
+
+    __slots__ = ("time_ms", "row", "kind", "ease", "ivl", "factor")
+
+    def __init__(self) -> None:
+        self.time_ms = array("q")
+        self.row = array("i")
+        self.kind = array("b")
+        self.ease = array("b")
+        self.ivl = array("i")
+        self.factor = array("i")
+
+    def __len__(self) -> int:
+        return len(self.time_ms)
+
+    def append(self, time_ms: int, row: int, kind: int, ease: int = 0, ivl: int = 0, factor: int = 0) -> None:
+        self.time_ms.append(time_ms)
+        self.row.append(row)
+        self.kind.append(kind)
+        self.ease.append(ease)
+        self.ivl.append(ivl)
+        self.factor.append(factor)
+
+    def sorted_by_time(self) -> ReplayEvents:
+        """Novo conjunto com os mesmos eventos em ordem de tempo (estável: a criação vem antes das revisões)."""
+        order = sorted(range(len(self)), key=self.time_ms.__getitem__)
+        ordered = ReplayEvents()
+        for column in self.__slots__:
+            values = getattr(self, column)
+            setattr(ordered, column, array(values.typecode, [values[index] for index in order]))
+        return ordered
+
+
+def load_replay_events(db: Any, cids: Sequence[int]) -> ReplayEvents:
+    """Criação e entradas do revlog de `cids`, em ordem cronológica."""
+    events = ReplayEvents()
+    row_by_cid = {}
+    for row, cid in enumerate(cids):
+        row_by_cid[cid] = row
+        events.append(cid, row, EVENT_CREATED)
+    for revlog_id, cid, ease, ivl, factor, kind in iter_chunked_rows(db, _REVLOG_SQL, cids):
+        events.append(revlog_id, row_by_cid[cid], kind, ease, ivl, factor)
+    return events.sorted_by_time()
+
+
+class RevlogReplay:
+    """Estado dos cartões de `cids` em qualquer dia, reconstruído a partir de `events`.
+
+    Os dias seguem a numeração do agendador (`today` é o dia de hoje e
+    `day_cutoff` o instante, em segundos, em que o dia seguinte começa).
+    Um keyframe é guardado a cada `keyframe_events` eventos aplicados; no
+    máximo `max_keyframes` ficam em memória.
+    """
+
+    def __init__(
+        self, cids: Sequence[int], events: ReplayEvents, today: int, day_cutoff: int,
+        keyframe_events: int, max_keyframes: int,
+    ) -> None:
+        self.snapshot = CardSnapshot(cids)
+        self.events = events
+        self.today = today
+        self.day_cutoff = day_cutoff
+        self.keyframe_events = max(1, keyframe_events)
+        self.max_keyframes = max(1, max_keyframes)
+        self.keyframes: OrderedDict[int, tuple] = OrderedDict()
+        self.position = 0 # Eventos já aplicados ao instantâneo
+        self.first_day = self.day_of(events.time_ms[0]) if len(events) else today
+
+    def day_of(self, time_ms: int) -> int:
+        """Dia do agendador em que cai o instante `time_ms`."""
+        return self.today - (self.day_cutoff - 1 - time_ms // 1000) // SECONDS_PER_DAY
+
+    def position_for_day(self, day: int) -> int:
+        """Número de eventos ocorridos até o fim do dia `day`."""
+        day_end_ms = (self.day_cutoff - (self.today - day) * SECONDS_PER_DAY) * 1000
+        return bisect_left(self.events.time_ms, day_end_ms)
+
+    def seek(self, day: int) -> CardSnapshot:
+        """Leva o instantâneo ao estado do fim do dia `day` e o retorna (o mesmo objeto a cada chamada)."""
+        target = self.position_for_day(min(day, self.today))
+        start = self.position if self.position <= target else 0
+        best_keyframe = max((position for position in self.keyframes if start < position <= target), default=None)
+        if best_keyframe is not None:
+            self._restore(best_keyframe)
+        elif start == 0 and self.position != 0:
+            self._restore(0)
+        self._advance(target)
+        return self.snapshot
+
+    def _restore(self, position: int) -> None:
+        snapshot = self.snapshot
+        if position == 0:
+            # Estado inicial: nenhum cartão criado ainda
+            for column in STATE_COLUMNS:
+                values = getattr(snapshot, column)
+                values[:] = bytearray(len(values)) if column == "present" else array(values.typecode, bytes(len(values) * values.itemsize))
+        else:
+            self.keyframes.move_to_end(position)
+            for column, values in zip(STATE_COLUMNS, self.keyframes[position]):
+                getattr(snapshot, column)[:] = values
+        self.position = position
+
+    def _store_keyframe(self) -> None:
+        if self.position in self.keyframes:
+            self.keyframes.move_to_end(self.position)
+            return
+        self.keyframes[self.position] = tuple(getattr(self.snapshot, column)[:] for column in STATE_COLUMNS)
+        if len(self.keyframes) > self.max_keyframes:
+            self.keyframes.popitem(last=False)
+
+    def _advance(self, target: int) -> None:
+        snapshot = self.snapshot
+        present, types, queues, ivls = snapshot.present, snapshot.type, snapshot.queue, snapshot.ivl
+        factors, lapses, dues = snapshot.factor, snapshot.lapses, snapshot.due
+        events = self.events
+        time_ms, rows, kinds, eases, event_ivls, event_factors = (
+            events.time_ms, events.row, events.kind, events.ease, events.ivl, events.factor,
+        )
+        interval = self.keyframe_events
+        for index in range(self.position, target):
+            row = rows[index]
+            kind = kinds[index]
+            present[row] = 1
+            if kind != EVENT_CREATED:
+                ivl = event_ivls[index]
+                if kind == REVLOG_MANUAL and ivl == 0:
+                    # "Esquecer": o cartão volta a ser novo
+                    types[row] = queues[row] = 0
+                    ivls[row] = dues[row] = 0
+                elif ivl > 0 or kind not in (REVLOG_MANUAL, REVLOG_RESCHEDULED, REVLOG_FILTERED):
+                    # Entradas de filtered deck sem reagendamento (ivl <= 0) não mudam o cartão
+                    if event_factors[index] > 0:
+                        factors[row] = event_factors[index]
+                    if eases[index] == 1 and kind in (REVLOG_REVIEW, REVLOG_FILTERED):
+                        lapses[row] += 1
+                    day = self.day_of(time_ms[index])
+                    if ivl > 0:
+                        # Intervalo em dias: o cartão está (ou voltou a estar) em revisão
+                        types[row] = queues[row] = 2
+                        ivls[row] = ivl
+                        dues[row] = day + ivl
+                    else:
+                        # Intervalo negativo (segundos): passos de aprendizado ou reaprendizado
+                        types[row] = 1 if kind == REVLOG_LEARN else 3
+                        queues[row] = 1
+                        dues[row] = day
+            self.position = index + 1
+            if self.position % interval == 0:
+                self._store_keyframe()
+
+
+def load_revlog_replay(
+    db: Any, cids: Sequence[int], today: int, day_cutoff: int, keyframe_events: int, max_keyframes: int,
+) -> RevlogReplay:
+    """Lê o histórico de `cids` e retorna o replay posicionado antes do primeiro evento."""
+    return RevlogReplay(cids, load_replay_events(db, cids), today, day_cutoff, keyframe_events, max_keyframes)
@@ -0,0 +1,111 @@
+"""Infraestrutura dos testes: importa o addon fora do Anki.
+
+Os módulos puros (sem `aqt`) são importados como submódulos de um pacote
+"memorymosaic" vazio, como em benchmarks/bench_render.py (`import_engine`).
+O addon inteiro é importado com os módulos `aqt` mínimos de
+benchmarks/synthetic_collection.py, sobre uma coleção SQLite sintética
+(`SyntheticCollection`) cujos cartões cada teste define (ver mosaic_testing.py).
+O pytest.ini põe tests/ e benchmarks/ no sys.path. Uso, a partir da pasta do addon:
+
+    python -m pytest -q
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import os
+import sys
+import types
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from mosaic_testing import ADDON_DIR, load_config
+from synthetic_collection import SyntheticCollection, create_collection_db, install_aqt_stand_in
+
+_AQT_MODULES = ("aqt", "aqt.gui_hooks", "aqt.operations", "aqt.overview", "aqt.deckbrowser", "aqt.qt", "aqt.utils")
+
+
+class _AddonDirectoryCollector:
+    """Coleta a pasta do addon como uma pasta comum, e não como pacote.
+
+    O __init__.py do addon importa o `aqt`; como pacote, o pytest o importaria fora do
+    Anki. Registrado como plugin (e não como hook deste conftest), vale também para a
+    pasta acima de tests/.
+    """
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collect_directory(self, path: Path, parent: Any) -> Any:
+        if path == Path(ADDON_DIR):
+            return pytest.Dir.from_parent(parent, path=path)
+        return None
+
+
+def pytest_configure(config: Any) -> None:
+    config.pluginmanager.register(_AddonDirectoryCollector(), "memorymosaic-addon-directory")
+
+
+def _forget_addon_modules() -> None:
+    for name in [name for name in sys.modules if name == "memorymosaic" or name.startswith("memorymosaic.")]:
+        del sys.modules[name]
+
+
+@pytest.fixture
+def pure_module() -> Callable[[str], Any]:
+    """Importa um módulo puro do addon (ex.: "tile_engine") sem executar o __init__.py."""
+    def load(name: str) -> Any:
+        if not isinstance(sys.modules.get("memorymosaic"), types.ModuleType) or hasattr(sys.modules["memorymosaic"], "__file__"):
+            _forget_addon_modules()
+            package = types.ModuleType("memorymosaic")
+            package.__path__ = [ADDON_DIR]
+            sys.modules["memorymosaic"] = package
+        return importlib.import_module(f"memorymosaic.{name}")
+    yield load
+    _forget_addon_modules()
+
+
+@pytest.fixture
+def make_collection(tmp_path: Any) -> Callable[..., SyntheticCollection]:
+    """Cria uma coleção sintética só com os cartões, notas e revisões indicados."""
+    collections = []
+
+    def make(cards: list[tuple] = (), reviews: list[tuple] = (), tags: dict[int, str] | None = None) -> SyntheticCollection:
+        path = str(tmp_path / f"collection_{len(collections)}.anki2")
+        create_collection_db(path, 0)
+        collection = SyntheticCollection(path)
+        connection = collection.connection
+        connection.executemany(f"INSERT INTO cards VALUES ({', '.join('?' * 18)})", cards)
+        notes = {row[1]: "" for row in cards}
+        notes.update({nid: f" {note_tags} " for nid, note_tags in (tags or {}).items()})
+        connection.executemany("INSERT INTO notes VALUES (?, ?)", list(notes.items()))
+        connection.executemany(f"INSERT INTO revlog VALUES ({', '.join('?' * 9)})", reviews)
+        connection.commit()
+        collections.append(collection)
+        return collection
+
+    yield make
+    for collection in collections:
+        collection.close()
+
+
+@pytest.fixture
+def load_addon() -> Callable[..., tuple[Any, Any]]:
+    """Importa o addon inteiro sobre uma coleção sintética; retorna (addon, mw)."""
+    def load(collection: SyntheticCollection, **config_overrides: Any) -> tuple[Any, Any]:
+        config = load_config(dict({"memorymosaic_default_deck_filter": ""}, **config_overrides))
+        mw = install_aqt_stand_in(collection, config)
+        _forget_addon_modules()
+        spec = importlib.util.spec_from_file_location(
+            "memorymosaic", os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR],
+        )
+        addon = importlib.util.module_from_spec(spec)
+        sys.modules["memorymosaic"] = addon
+        spec.loader.exec_module(addon)
+        return addon, mw
+
+    yield load
+    _forget_addon_modules()
+    for name in _AQT_MODULES:
+        sys.modules.pop(name, None)
@@ -0,0 +1,42 @@
+"""Funções auxiliares dos testes: linhas das tabelas da coleção sintética e config do addon."""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+from synthetic_collection import COLLECTION_CREATED_SECS, DAY_SECS, TODAY, SyntheticCollection
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_config(overrides: dict | None = None) -> dict:
+    """config.json do addon com alguns valores trocados."""
+    with open(os.path.join(ADDON_DIR, "config.json"), encoding="utf-8") as config_file:
+        config = json.load(config_file)
+    config.update(overrides or {})
+    return config
+
+
+def card_row(
+    cid: int, card_type: int = 2, queue: int | None = None, ivl: int = 30, due: int = TODAY + 10,
+    did: int = 1, factor: int = 2500, lapses: int = 0, nid: int | None = None,
+) -> tuple:
+    """Linha de `cards` (esquema de synthetic_collection.py); a fila segue o tipo, salvo indicação."""
+    queue = card_type if queue is None else queue
+    nid = cid if nid is None else nid
+    return (cid, nid, did, 0, 0, 0, card_type, queue, due, ivl, factor, 0, lapses, 0, 0, 0, 0, "")
+
+
+def review_row(cid: int, day: int, ease: int = 3, review_type: int = 1, ivl: int = 1, factor: int = 2500) -> tuple:
+    """Linha de `revlog` no `day` da coleção (dias desde a criação), ao meio-dia."""
+    review_ms = (COLLECTION_CREATED_SECS + day * DAY_SECS + DAY_SECS // 2) * 1000 + cid % 1000
+    return (review_ms, cid, 0, ease, ivl, 0, factor, 5000, review_type)
+
+
+def update_cards(collection: SyntheticCollection, sql: str, *args: Any) -> None:
+    """Altera cartões da coleção sintética (ex.: uma resposta no revisor) e avança `col.mod`."""
+    collection.connection.execute(sql, args)
+    collection.connection.commit()
+    collection.mod += 1
@@ -0,0 +1,87 @@
+"""Filtro de cartões (card_filter): a busca gerada contra a classificação dos tiles."""
+
+from __future__ import annotations
+
+import itertools
+
+from mosaic_testing import card_row
+
+# Filas possíveis para cada tipo de cartão no Anki (suspenso e enterrados valem para todos)
+_QUEUES_BY_TYPE = {0: (0,), 1: (1, 3), 2: (2,), 3: (1, 3)}
+_HIDDEN_QUEUES = (-1, -2, -3)
+_IVLS = (0, 1, 20, 21, 400)
+
+
+def _card_combinations():
+    for card_type, queues in _QUEUES_BY_TYPE.items():
+        for queue, ivl in itertools.product(queues + _HIDDEN_QUEUES, _IVLS):
+            yield card_type, queue, ivl
+
+
+def test_state_search_matches_classify_card(pure_module, make_collection):
+    card_filter = pure_module("card_filter")
+    card_data = pure_module("card_data")
+    tile_engine = pure_module("tile_engine")
+    state_categories = {
+        "new": tile_engine.CATEGORY_NEW,
+        "young": tile_engine.CATEGORY_YOUNG,
+        "mature": tile_engine.CATEGORY_MATURE,
+        "relearning": tile_engine.CATEGORY_RELEARNING,
+        "suspended": tile_engine.CATEGORY_SUSPENDED,
+    }
+    combinations = dict(enumerate(_card_combinations(), start=1))
+    collection = make_collection([
+        card_row(cid, card_type, queue, ivl) for cid, (card_type, queue, ivl) in combinations.items()
+    ])
+    day_learning_cids = card_data.load_day_learning_cids(collection.db)
+    assert day_learning_cids, "a coleção precisa ter cartões novos em aprendizado de vários dias"
+
+    for state in card_filter.FILTER_STATES:
+        found = set(collection.find_cards(card_filter.CardFilter(states=[state]).to_search(day_learning_cids)))
+        for cid, (card_type, queue, ivl) in combinations.items():
+            expected = tile_engine.classify_card(1, card_type, queue, ivl) == state_categories[state]
+            assert (cid in found) == expected, (state, card_type, queue, ivl)
+
+
+def test_states_partition_the_collection(pure_module, make_collection):
+    card_filter = pure_module("card_filter")
+    card_data = pure_module("card_data")
+    combinations = list(_card_combinations())
+    collection = make_collection([card_row(cid, *combination) for cid, combination in enumerate(combinations, start=1)])
+    day_learning_cids = card_data.load_day_learning_cids(collection.db)
+
+    counts = [
+        len(collection.find_cards(card_filter.CardFilter(states=[state]).to_search(day_learning_cids)))
+        for state in card_filter.FILTER_STATES
+    ]
+    assert sum(counts) == len(combinations)
+    everything = card_filter.CardFilter(states=card_filter.FILTER_STATES).to_search(day_learning_cids)
+    assert len(collection.find_cards(everything)) == len(combinations)
+
+
+def test_day_learning_cids_only_when_needed(pure_module):
+    card_filter = pure_module("card_filter")
+    assert not card_filter.CardFilter(states=["new", "mature", "suspended"]).uses_day_learning_cids()
+    assert card_filter.CardFilter(states=["young"]).uses_day_learning_cids()
+    assert card_filter.CardFilter(states=["relearning"]).uses_day_learning_cids()
+    # Sem cartões em aprendizado de vários dias, a busca não tem `cid:`
+    assert "cid:" not in card_filter.CardFilter(states=["young", "relearning"]).to_search()
+
+
+def test_criteria_are_combined(pure_module, make_collection):
+    card_filter = pure_module("card_filter")
+    collection = make_collection(
+        [
+            card_row(1, ivl=30, lapses=0, factor=2500),
+            card_row(2, ivl=30, lapses=4, factor=2500, did=2),
+            card_row(3, ivl=5, lapses=1, factor=1300),
+            card_row(4, card_type=0, ivl=0),
+        ],
+        tags={1: "prova", 2: "prova leitura", 3: "leitura"},
+    )
+    search = card_filter.combine_search(
+        'deck:"Default"', card_filter.CardFilter(tags=["prova", "leitura"], lapses_range=[None, 2]),
+    )
+    assert sorted(collection.find_cards(search)) == [1, 3]
+    assert collection.find_cards(card_filter.CardFilter(ivl_range=[10, None], ease_range=[2.0, 3.0]).to_search()) == [1, 2]
+    assert card_filter.combine_search("", card_filter.CardFilter()) == ""
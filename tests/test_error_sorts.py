@@ -0,0 +1,104 @@
+"""Ordenações por erro (render_engine.ERROR_SORT_VALUES) sobre o revlog da coleção sintética."""
+
+from __future__ import annotations
+
+import types
+
+import pytest
+
+from mosaic_testing import TODAY, card_row, load_config, review_row, update_cards
+
+# Com error_sort_recent_days = 30, os erros a partir deste dia são recentes; os testes acrescentam
+# respostas nos últimos dias (o id do revlog é o instante da resposta, sempre crescente)
+RECENT_DAY = TODAY - 29
+OLD_DAY = TODAY - 30
+
+_REVIEWS = [
+    # 1: sem respostas
+    # 2: 1 erro em 4 respostas, lapso antigo
+    review_row(2, OLD_DAY - 3), review_row(2, OLD_DAY - 2, ease=1), review_row(2, OLD_DAY - 1), review_row(2, OLD_DAY),
+    # 3: 1 erro em 2 respostas, recente e no aprendizado (não é lapso)
+    review_row(3, RECENT_DAY, ease=1, review_type=0), review_row(3, RECENT_DAY + 1),
+    # 4: 3 erros em 3 respostas, lapsos antigos
+    review_row(4, OLD_DAY - 2, ease=1), review_row(4, OLD_DAY - 1, ease=1), review_row(4, OLD_DAY, ease=1),
+    # 5: 2 erros em 4 respostas, lapsos recentes
+    review_row(5, OLD_DAY - 1), review_row(5, OLD_DAY), review_row(5, RECENT_DAY, ease=1), review_row(5, TODAY - 10, ease=1),
+    # 6: só um reagendamento manual (ease = 0), que não conta como resposta
+    review_row(6, TODAY - 10, ease=0, review_type=4),
+]
+
+
+def _view_state(collection, sort_order_key: str) -> dict:
+    return {
+        "search_query": "",
+        "deck_search": "",
+        "card_filter": None,
+        "sort_order_key": sort_order_key,
+        "day_cutoff": collection.sched.day_cutoff,
+        "collection_identity": (id(collection), collection.path),
+    }
+
+
+@pytest.mark.parametrize("sort_order_key,expected", (
+    # Empates (e cartões sem respostas) ficam na ordem de criação
+    ("failure_rate_desc", [4, 3, 5, 2, 1, 6]),
+    ("lapses_desc", [4, 5, 2, 1, 3, 6]),
+    ("recent_failures_desc", [5, 3, 1, 2, 4, 6]),
+))
+def test_error_sort_order(pure_module, make_collection, sort_order_key, expected):
+    render_engine = pure_module("render_engine")
+    collection = make_collection([card_row(cid) for cid in range(1, 7)], _REVIEWS)
+    config = load_config({"error_sort_recent_days": 30})
+    assert render_engine.find_sorted_cards(collection, config, _view_state(collection, sort_order_key)) == expected
+
+
+def _add_reviews(collection, reviews) -> None:
+    collection.connection.executemany("INSERT INTO revlog VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", reviews)
+    collection.connection.commit()
+
+
+def test_new_answers_update_only_the_answered_cards(pure_module, make_collection, monkeypatch):
+    render_engine = pure_module("render_engine")
+    collection = make_collection([card_row(cid) for cid in range(1, 7)], _REVIEWS)
+    config = load_config({"error_sort_recent_days": 30})
+    view_state = _view_state(collection, "lapses_desc")
+    assert render_engine.find_sorted_cards(collection, config, view_state)[0] == 4
+
+    # Quatro lapsos novos no cartão 1: só o revlog dele é agregado de novo
+    _add_reviews(collection, [review_row(1, day, ease=1) for day in (TODAY - 3, TODAY - 2, TODAY - 1, TODAY)])
+    aggregated = []
+    load_review_error_stats = render_engine.load_review_error_stats
+    monkeypatch.setattr(
+        render_engine, "load_review_error_stats",
+        lambda db, since, cids=None: aggregated.append(cids) or load_review_error_stats(db, since, cids),
+    )
+    assert render_engine.find_sorted_cards(collection, config, view_state)[0] == 1
+    assert aggregated == [[1]]
+    assert render_engine.get_review_error_stats(collection.db, config, view_state) == load_review_error_stats(
+        collection.db, (collection.sched.day_cutoff - 30 * 86_400) * 1000,
+    )
+    assert aggregated == [[1]] # Sem respostas novas: o cache é reaproveitado
+
+    # Entradas removidas (ex.: desfazer): clear_review_error_stats descarta o cache
+    collection.connection.execute("DELETE FROM revlog WHERE cid = 1")
+    render_engine.clear_review_error_stats()
+    assert render_engine.find_sorted_cards(collection, config, view_state)[0] == 4
+    assert aggregated == [[1], None]
+
+
+def test_answers_reorder_the_error_sorted_grid(make_collection, load_addon):
+    collection = make_collection([card_row(cid) for cid in range(1, 7)], _REVIEWS)
+    addon, _ = load_addon(
+        collection, memorymosaic_default_sort_order="lapses_desc", memorymosaic_default_view_mode="gradient",
+        gradient_ivl_normalize=False,
+    )
+    addon._render_memorymosaic_grid_html()
+    assert list(addon._session_last_render["all_cids"]) == [4, 5, 2, 1, 3, 6]
+
+    # Dois lapsos no cartão 6, respondidos no revisor
+    for day in (TODAY - 2, TODAY - 1):
+        _add_reviews(collection, [review_row(6, day, ease=1)])
+        update_cards(collection, "UPDATE cards SET lapses = lapses + 1 WHERE id = 6")
+        addon.on_reviewer_did_answer_card(None, types.SimpleNamespace(id=6), 1)
+    addon._render_memorymosaic_grid_html()
+    assert list(addon._session_last_render["all_cids"]) == [4, 5, 6, 2, 1, 3]
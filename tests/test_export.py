@@ -0,0 +1,119 @@
+"""Exportação do mosaico (mosaic_export): PNG e SVG com um tile por cartão, nas cores da grade."""
+
+from __future__ import annotations
+
+import struct
+import sys
+import xml.etree.ElementTree as ET
+import zlib
+
+import pytest
+
+from mosaic_testing import TODAY, card_row
+
+_CARDS = [
+    card_row(1, ivl=5), card_row(2, ivl=40, due=TODAY), card_row(3, card_type=0, ivl=0, due=1),
+    card_row(4, ivl=90), card_row(5, card_type=3, queue=1, ivl=1, due=0), card_row(6, ivl=15, due=TODAY - 2),
+    card_row(7, ivl=200),
+]
+# 7 tiles em 3 colunas: a última linha tem um tile e duas posições vazias
+_EXPORT_CONFIG = {"export_tile_size_px": 6, "export_tile_gap_px": 1, "export_columns": 3, "initial_card_load_count": 100}
+
+
+def _exported(make_collection, load_addon, tmp_path, export_format: str, **config):
+    """Exporta o filtro exibido; retorna (caminho, layout, [(cor, vencido)] esperados na ordem da grade)."""
+    addon, mw = load_addon(make_collection(_CARDS), **_EXPORT_CONFIG, **config)
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    snapshot = last_render["snapshot"]
+    tile_engine = sys.modules["memorymosaic.tile_engine"]
+    expected = [
+        (addon.tile_color(snapshot, row, last_render["config"], last_render["view_mode"], last_render["gradient_field"],
+                          last_render["today"], last_render["gradient_lut"]),
+         tile_engine.is_due_today(snapshot, row, last_render["today"]))
+        for row in range(len(snapshot))
+    ]
+    assert [due for _, due in expected].count(True) == 3
+
+    mosaic_export = sys.modules["memorymosaic.mosaic_export"]
+    path = tmp_path / f"mosaic.{export_format}"
+    progress = []
+    view_state = addon._resolve_render_view_state(None)
+    count = mosaic_export.export_mosaic(mw.col, view_state["config"], view_state, str(path), export_format,
+                                        lambda done, total: progress.append((done, total)))
+    assert count == len(_CARDS) and progress == [(len(_CARDS), len(_CARDS))]
+    return path, mosaic_export.ExportLayout(view_state["config"], count), expected
+
+
+def _read_png(path) -> tuple[int, int, list[bytes]]:
+    """(largura, altura, linhas de pixels RGB), conferindo o CRC de cada chunk."""
+    data = path.read_bytes()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    offset, chunks = 8, []
+    while offset < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[offset:offset + 8])
+        body = data[offset + 8:offset + 8 + length]
+        assert struct.unpack(">I", data[offset + 8 + length:offset + 12 + length])[0] == zlib.crc32(chunk_type + body)
+        chunks.append((chunk_type, body))
+        offset += 12 + length
+
+    assert [chunk_type for chunk_type, _ in chunks][0] == b"IHDR" and chunks[-1] == (b"IEND", b"")
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", chunks[0][1][:10])
+    assert (bit_depth, color_type) == (8, 2)
+    pixels = zlib.decompress(b"".join(body for chunk_type, body in chunks if chunk_type == b"IDAT"))
+    stride = 1 + 3 * width
+    assert len(pixels) == stride * height
+    lines = [pixels[y * stride:(y + 1) * stride] for y in range(height)]
+    assert all(line[0] == 0 for line in lines) # Sem filtro
+    return width, height, [line[1:] for line in lines]
+
+
+@pytest.mark.parametrize("view_mode", ("categorical", "gradient"))
+def test_png_has_one_tile_per_card_in_the_grid_colors(make_collection, load_addon, tmp_path, view_mode):
+    path, layout, expected = _exported(make_collection, load_addon, tmp_path, "png", memorymosaic_default_view_mode=view_mode)
+    width, height, lines = _read_png(path)
+    assert (width, height) == (layout.width, layout.height) == (3 * 7 - 1, 3 * 7 - 1)
+    tile_engine = sys.modules["memorymosaic.tile_engine"]
+    config = sys.modules["memorymosaic"]._get_addon_config()
+
+    def pixel(x: int, y: int) -> str:
+        return "#%02X%02X%02X" % tuple(lines[y][3 * x:3 * x + 3])
+
+    def rgb(color: str) -> str:
+        return "#%02X%02X%02X" % tile_engine.hex_to_rgb(color)
+
+    due_center = (layout.tile_size - layout.due_size) // 2 + layout.due_size // 2
+    for index, (color, due) in enumerate(expected):
+        x, y = (index % 3) * 7, (index // 3) * 7
+        assert pixel(x, y) == rgb(config["tile_border_color"])
+        assert pixel(x + 1, y + 1) == rgb(color)
+        assert pixel(x + due_center, y + due_center) == rgb(config["due_indicator_color"] if due else color)
+        if index % 3 < 2:
+            assert pixel(x + 6, y) == "#FFFFFF" # Espaço entre os tiles
+    assert pixel(7, 14) == pixel(19, 19) == "#FFFFFF" # Posições vazias da última linha
+
+
+def test_svg_has_one_rect_per_card_in_the_grid_colors(make_collection, load_addon, tmp_path):
+    path, layout, expected = _exported(make_collection, load_addon, tmp_path, "svg")
+    svg = ET.parse(path).getroot()
+    namespace = "{http://www.w3.org/2000/svg}"
+    assert (svg.get("width"), svg.get("height")) == (str(layout.width), str(layout.height))
+
+    background, *tiles = svg.iter(f"{namespace}rect")
+    assert background.get("fill") == "#FFFFFF"
+    assert [tile.get("fill") for tile in tiles] == [color for color, _ in expected]
+    assert [(float(tile.get("x")), float(tile.get("y"))) for tile in tiles] == [
+        ((index % 3) * 7 + 0.5, (index // 3) * 7 + 0.5) for index in range(len(expected))
+    ]
+    circles = list(svg.iter(f"{namespace}circle"))
+    assert [(float(circle.get("cx")), float(circle.get("cy"))) for circle in circles] == [
+        ((index % 3) * 7 + 3, (index // 3) * 7 + 3) for index, (_, due) in enumerate(expected) if due
+    ]
+
+
+def test_empty_filter_exports_nothing(make_collection, load_addon, tmp_path):
+    addon, mw = load_addon(make_collection([]), **_EXPORT_CONFIG)
+    view_state = addon._resolve_render_view_state(None)
+    path = tmp_path / "mosaic.png"
+    assert sys.modules["memorymosaic.mosaic_export"].export_mosaic(mw.col, view_state["config"], view_state, str(path), "png") == 0
+    assert not path.exists()
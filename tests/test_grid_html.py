@@ -0,0 +1,80 @@
+"""Montagem do HTML da grade: os dados vêm só da coleção recebida (a da QueryOp em segundo plano)."""
+
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from mosaic_testing import card_row
+
+
+class _UnavailableCollection:
+    """Coleção da thread principal, que a montagem em segundo plano não pode usar."""
+
+    def __getattr__(self, name: str) -> None:
+        raise AssertionError(f"mw.col.{name} usado fora da thread principal")
+
+
+def test_grid_html_uses_only_the_given_collection(make_collection, load_addon):
+    collection = make_collection([card_row(1), card_row(2)], tags={1: "Prova leitura", 2: "ancora"})
+    addon, mw = load_addon(collection)
+    view_state = addon._resolve_render_view_state()
+    mw.col = _UnavailableCollection()
+
+    page_html, render_state = addon._compute_memorymosaic_grid_html(view_state, collection)
+    assert sorted(render_state["all_cids"]) == [1, 2]
+    # Menu do filtro por tag, em ordem alfabética sem distinção de maiúsculas
+    assert page_html.index('value="ancora"') < page_html.index('value="leitura"') < page_html.index('value="Prova"')
+
+
+def test_closed_collection_shows_the_waiting_message(make_collection, load_addon):
+    collection = make_collection([card_row(1)])
+    addon, _ = load_addon(collection)
+    view_state = addon._resolve_render_view_state()
+    assert addon.compute_render_model(None, view_state["config"], view_state) is None
+    page_html, render_state = addon._compute_memorymosaic_grid_html(view_state, None)
+    assert render_state is None and "<p>" in page_html
+
+
+def test_engine_errors_are_not_taken_for_a_closed_collection(make_collection, load_addon, monkeypatch):
+    collection = make_collection([card_row(1), card_row(2)])
+    addon, _ = load_addon(collection, memorymosaic_default_sort_order="lapses_desc")
+    engine = sys.modules["memorymosaic.render_engine"]
+
+    def broken_sort_value(stats):
+        raise AttributeError("bug na ordenação")
+
+    monkeypatch.setitem(engine.ERROR_SORT_VALUES, "lapses_desc", broken_sort_value)
+    view_state = addon._resolve_render_view_state()
+    with pytest.raises(AttributeError, match="bug na ordenação"):
+        addon._compute_memorymosaic_grid_html(view_state, collection)
+
+
+class _UnavailableMainWindow:
+    """`mw` visto da thread da QueryOp, onde não pode ser consultado."""
+
+    def __getattr__(self, name: str) -> None:
+        raise AssertionError(f"mw.{name} usado fora da thread principal")
+
+
+def test_background_render_checks_only_the_generation_off_the_main_thread(make_collection, load_addon, monkeypatch):
+    collection = make_collection([card_row(1), card_row(2)])
+    addon, mw = load_addon(collection, memorymosaic_background_render=True)
+    background_op = addon.QueryOp
+
+    class _WorkerThreadQueryOp(background_op):
+        def __init__(self, parent, op, success):
+            def op_without_mw(col):
+                addon.mw = _UnavailableMainWindow()
+                try:
+                    return op(col)
+                finally:
+                    addon.mw = mw
+            super().__init__(parent, op_without_mw, success)
+
+    monkeypatch.setattr(addon, "QueryOp", _WorkerThreadQueryOp)
+    placeholder = addon._get_memorymosaic_page_html()
+    assert 'id="memorymosaic-root"' in placeholder
+    assert mw.evaluated_scripts[-1].startswith("MemoryMosaicInject.fill(")
+    assert sorted(addon._session_last_render["all_cids"]) == [1, 2]
@@ -0,0 +1,188 @@
+"""Atualização incremental da grade após respostas no revisor e operações na coleção."""
+
+from __future__ import annotations
+
+import json
+import types
+
+from mosaic_testing import TODAY, card_row, update_cards
+
+# Gradiente com escala de ivl fixa: no modo categórico, um estado sem entrada no sumário e,
+# na escala dinâmica, um ivl fora da faixa já forçariam a reconstrução
+_PATCHABLE_VIEW = {"memorymosaic_default_view_mode": "gradient", "gradient_ivl_normalize": False}
+
+
+def _answer(addon, collection, cid: int, sql: str, *args) -> None:
+    """Simula uma resposta no revisor: altera o cartão e o registra como alterado."""
+    update_cards(collection, sql, *args)
+    addon.on_reviewer_did_answer_card(None, types.SimpleNamespace(id=cid), 3)
+
+
+def _rerender(addon) -> bool:
+    """Exibe a grade de novo; retorna True se ela foi reaproveitada (atualização incremental)."""
+    last_render = addon._session_last_render
+    addon._render_memorymosaic_grid_html()
+    return addon._session_last_render is last_render
+
+
+def _tile_patches(mw) -> list[dict]:
+    """Patches enviados à página (MemoryMosaicLive.applyPatch) desde o início do teste."""
+    prefix = "MemoryMosaicLive.applyPatch("
+    return [json.loads(script[len(prefix):-2]) for script in mw.evaluated_scripts if script.startswith(prefix)]
+
+
+def test_answer_patches_only_the_reviewed_tile(make_collection, load_addon):
+    collection = make_collection([card_row(1, ivl=20), card_row(2, ivl=40), card_row(3, ivl=60)])
+    addon, mw = load_addon(collection, **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    assert last_render["due_today_count"] == 0
+
+    _answer(addon, collection, 2, "UPDATE cards SET ivl = 90, due = ? WHERE id = 2", TODAY)
+    assert _rerender(addon)
+    color, due = last_render["patched_tiles"][2]
+    assert list(last_render["patched_tiles"]) == [2] and due
+    assert last_render["due_today_count"] == 1
+    assert _tile_patches(mw) == [{"tiles": [[2, color, True]], "counts": {}, "dueCount": 1}]
+
+
+def test_answer_moves_the_card_between_summary_entries(make_collection, load_addon):
+    collection = make_collection([card_row(1, card_type=0, ivl=0), card_row(2, ivl=5), card_row(3, ivl=30)])
+    addon, mw = load_addon(collection, memorymosaic_default_view_mode="categorical", gradient_ivl_normalize=False)
+    config = addon._get_addon_config()
+    addon._render_memorymosaic_grid_html()
+    counts = dict(addon._session_last_render["color_counts"])
+
+    _answer(addon, collection, 1, "UPDATE cards SET type = 1, queue = 1, due = 0 WHERE id = 1") # Novo -> aprendizado
+    assert _rerender(addon)
+    counts[config["color_new"]] -= 1
+    counts[config["color_young_learn"]] += 1
+    assert addon._session_last_render["color_counts"] == counts
+    assert _tile_patches(mw)[-1]["counts"] == counts
+
+
+def test_render_without_answers_sends_no_patch(make_collection, load_addon):
+    collection = make_collection([card_row(1), card_row(2)])
+    addon, mw = load_addon(collection, **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    assert _rerender(addon)
+    assert _tile_patches(mw) == []
+
+
+def test_deleted_card_rebuilds(make_collection, load_addon):
+    collection = make_collection([card_row(1), card_row(2), card_row(3)])
+    addon, _ = load_addon(collection, **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+
+    _answer(addon, collection, 2, "DELETE FROM cards WHERE id = 2")
+    assert not _rerender(addon)
+    assert sorted(addon._session_last_render["all_cids"]) == [1, 3]
+
+
+def test_refused_patch_leaves_the_cached_state_untouched(make_collection, load_addon):
+    collection = make_collection([card_row(1, ivl=20), card_row(2, ivl=40), card_row(3, ivl=60)])
+    addon, _ = load_addon(collection, **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    snapshot = last_render["snapshot"]
+    row = snapshot.row_of(1)
+    before = (snapshot.row_values(row), dict(last_render["color_counts"]), last_render["due_today_count"])
+
+    # O cartão 1 poderia ser aplicado, mas o 3 foi apagado: nenhum dos dois é aplicado
+    _answer(addon, collection, 1, "UPDATE cards SET ivl = 90, due = ? WHERE id = 1", TODAY)
+    _answer(addon, collection, 3, "DELETE FROM cards WHERE id = 3")
+    assert not _rerender(addon)
+    assert (snapshot.row_values(row), last_render["color_counts"], last_render["due_today_count"]) == before
+    assert last_render["patched_tiles"] == {}
+
+
+def _state_filter_collection(make_collection):
+    return make_collection([
+        card_row(1, ivl=5),
+        card_row(2, ivl=8),
+        card_row(3, ivl=30),
+        card_row(4, card_type=0, ivl=0, due=1),
+    ])
+
+
+def test_answer_that_leaves_the_state_filter_rebuilds(make_collection, load_addon):
+    collection = _state_filter_collection(make_collection)
+    addon, _ = load_addon(collection, filter_states=["young"], **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    assert sorted(addon._session_last_render["all_cids"]) == [1, 2]
+
+    _answer(addon, collection, 1, "UPDATE cards SET ivl = 30 WHERE id = 1") # Passa a ser maduro
+    assert not _rerender(addon)
+    assert list(addon._session_last_render["all_cids"]) == [2]
+
+
+def test_answer_that_enters_the_state_filter_rebuilds(make_collection, load_addon):
+    collection = _state_filter_collection(make_collection)
+    addon, _ = load_addon(collection, filter_states=["young"], **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+
+    _answer(addon, collection, 4, "UPDATE cards SET type = 1, queue = 1, due = 0 WHERE id = 4") # Novo -> aprendizado
+    assert not _rerender(addon)
+    assert sorted(addon._session_last_render["all_cids"]) == [1, 2, 4]
+
+
+def test_day_learning_card_entering_the_state_filter_rebuilds(make_collection, load_addon):
+    collection = make_collection([card_row(1, card_type=3, queue=1, ivl=1, due=0), card_row(2, ivl=30)])
+    addon, _ = load_addon(collection, filter_states=["relearning"], **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    assert list(addon._session_last_render["all_cids"]) == [1]
+    assert "cid:" not in addon._session_last_render["key"][0] # Resolvidos no cálculo, não na chave
+
+    # Lapso com passo de dias: type=1, queue=3 conta como reaprendizado
+    _answer(addon, collection, 2, "UPDATE cards SET type = 1, queue = 3, due = ? WHERE id = 2", TODAY + 1)
+    assert not _rerender(addon)
+    assert sorted(addon._session_last_render["all_cids"]) == [1, 2]
+
+
+def test_incremental_render_skips_the_collection_watermark(make_collection, load_addon):
+    collection = make_collection([card_row(1, ivl=20), card_row(2, ivl=40)])
+    addon, _ = load_addon(collection, **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+
+    def unexpected_watermark():
+        raise AssertionError("watermark consultado na atualização incremental")
+
+    addon._get_collection_watermark = unexpected_watermark
+    _answer(addon, collection, 2, "UPDATE cards SET ivl = 60 WHERE id = 2")
+    assert _rerender(addon)
+
+
+def test_answer_inside_the_state_filter_is_patched(make_collection, load_addon):
+    collection = _state_filter_collection(make_collection)
+    addon, _ = load_addon(collection, filter_states=["young"], **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+
+    _answer(addon, collection, 2, "UPDATE cards SET ivl = 12 WHERE id = 2")
+    assert _rerender(addon)
+    assert list(addon._session_last_render["patched_tiles"]) == [2]
+
+
+def test_range_filter_rechecks_membership(make_collection, load_addon):
+    collection = _state_filter_collection(make_collection)
+    addon, _ = load_addon(collection, filter_lapses_range=[None, 0], **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+
+    _answer(addon, collection, 3, "UPDATE cards SET lapses = 1, type = 3, queue = 1, ivl = 1 WHERE id = 3")
+    assert not _rerender(addon)
+    assert sorted(addon._session_last_render["all_cids"]) == [1, 2, 4]
+
+
+def test_tag_edit_rebuilds_only_with_a_tag_filter(make_collection, load_addon):
+    tag_changes = types.SimpleNamespace(card=False, deck=False, tag=True, note_text=False)
+    collection = make_collection([card_row(1), card_row(2)], tags={1: "prova"})
+
+    addon, _ = load_addon(collection)
+    addon._render_memorymosaic_grid_html()
+    addon.on_operation_did_execute(tag_changes, None)
+    assert not addon._session_needs_full_rebuild
+
+    addon, _ = load_addon(collection, filter_tags=["prova"])
+    addon._render_memorymosaic_grid_html()
+    assert list(addon._session_last_render["all_cids"]) == [1]
+    addon.on_operation_did_execute(tag_changes, None)
+    assert addon._session_needs_full_rebuild
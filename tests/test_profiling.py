@@ -0,0 +1,24 @@
+"""Painel de medições: o histórico das renderizações medidas."""
+
+from __future__ import annotations
+
+import pytest
+
+from mosaic_testing import card_row
+
+
+@pytest.mark.parametrize("history_size,kept", ((0, 1), (-3, 1), (2, 2), (None, 3), ("2", 3)))
+def test_profile_history_size(make_collection, load_addon, history_size, kept):
+    collection = make_collection([card_row(1), card_row(2)])
+    addon, _ = load_addon(collection, memorymosaic_profiling=True, profiling_history_size=history_size)
+    config = addon._get_addon_config()
+    history = addon._get_profile_history(config)
+
+    for sort_order in ("ivl_asc", "ivl_desc", "id_asc"):
+        addon._session_sort_order_override = sort_order
+        addon._render_memorymosaic_grid_html()
+        # O histórico é o mesmo entre as renderizações: não é recriado a cada chamada
+        assert addon._get_profile_history(config) is history
+    assert [profile.profile_id for profile in history.entries] == [3 - kept + 1 + index for index in range(kept)]
+    if not isinstance(history_size, int):
+        assert history.max_entries == 10 # O padrão de config.json
@@ -0,0 +1,83 @@
+"""Cache de grades: LRU das grades calculadas, pela chave da renderização, config e coleção."""
+
+from __future__ import annotations
+
+from mosaic_testing import card_row, update_cards
+
+
+def _counting_computations(addon, monkeypatch) -> list:
+    """Registra cada grade calculada (as que não vieram do cache nem da atualização incremental)."""
+    computed = []
+    compute = addon._compute_memorymosaic_grid_html
+
+    def counted(view_state, col):
+        computed.append(view_state["sort_order_key"])
+        return compute(view_state, col)
+
+    monkeypatch.setattr(addon, "_compute_memorymosaic_grid_html", counted)
+    return computed
+
+
+def _show(addon, sort_order: str) -> str:
+    addon._session_sort_order_override = sort_order
+    return addon._render_memorymosaic_grid_html()
+
+
+def _collection(make_collection):
+    return make_collection([card_row(1, ivl=30), card_row(2, ivl=10), card_row(3, ivl=20)])
+
+
+def test_returning_to_a_grid_uses_the_cache(make_collection, load_addon, monkeypatch):
+    addon, _ = load_addon(_collection(make_collection))
+    computed = _counting_computations(addon, monkeypatch)
+
+    first_html = _show(addon, "ivl_asc")
+    _show(addon, "ivl_desc")
+    assert _show(addon, "ivl_asc") == first_html
+    assert computed == ["ivl_asc", "ivl_desc"]
+    stats = addon.get_render_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_least_recently_used_grid_is_evicted(make_collection, load_addon, monkeypatch):
+    addon, _ = load_addon(_collection(make_collection), render_cache_size=2)
+    computed = _counting_computations(addon, monkeypatch)
+
+    for sort_order in ("ivl_asc", "ivl_desc", "ivl_asc", "id_asc", "ivl_desc", "ivl_asc"):
+        _show(addon, sort_order)
+    # id_asc descartou ivl_desc (o menos usado); ivl_desc, por sua vez, descartou ivl_asc
+    assert computed == ["ivl_asc", "ivl_desc", "id_asc", "ivl_desc", "ivl_asc"]
+    assert addon.get_render_cache_stats()["entries"] == 2
+
+
+def test_collection_changes_miss_the_cache(make_collection, load_addon, monkeypatch):
+    collection = _collection(make_collection)
+    addon, _ = load_addon(collection)
+    computed = _counting_computations(addon, monkeypatch)
+
+    _show(addon, "ivl_asc")
+    _show(addon, "ivl_desc")
+    update_cards(collection, "UPDATE cards SET ivl = 40 WHERE id = 2") # Avança col.mod
+    _show(addon, "ivl_asc")
+    assert computed == ["ivl_asc", "ivl_desc", "ivl_asc"]
+
+
+def test_config_changes_miss_the_cache(make_collection, load_addon, monkeypatch):
+    addon, mw = load_addon(_collection(make_collection))
+    computed = _counting_computations(addon, monkeypatch)
+
+    _show(addon, "ivl_asc")
+    _show(addon, "ivl_desc")
+    mw.addonManager.getConfig(__name__)["color_new"] = "#123456"
+    _show(addon, "ivl_asc")
+    assert computed == ["ivl_asc", "ivl_desc", "ivl_asc"]
+
+
+def test_non_positive_size_disables_the_cache(make_collection, load_addon, monkeypatch):
+    addon, _ = load_addon(_collection(make_collection), render_cache_size=0)
+    computed = _counting_computations(addon, monkeypatch)
+
+    for sort_order in ("ivl_asc", "ivl_desc", "ivl_asc"):
+        _show(addon, sort_order)
+    assert computed == ["ivl_asc", "ivl_desc", "ivl_asc"]
+    assert addon.get_render_cache_stats()["entries"] == 0
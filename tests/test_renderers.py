@@ -0,0 +1,50 @@
+"""Renderizadores da grade: DOM ou canvas, escolhidos pelo config e pelo número de tiles."""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+
+import pytest
+
+from mosaic_testing import card_row, load_config
+
+
+@pytest.mark.parametrize("renderer,tile_count,expected", (
+    ("auto", 2, "dom"),
+    ("auto", 3, "canvas"), # A partir do limite
+    ("canvas", 1, "canvas"),
+    ("dom", 1000, "dom"),
+    ("webgl", 3, "canvas"), # Valor inválido: vale "auto"
+))
+def test_renderer_mode(pure_module, renderer, tile_count, expected):
+    render_engine = pure_module("render_engine")
+    config = load_config({"memorymosaic_renderer": renderer, "canvas_auto_threshold": 3})
+    assert render_engine.resolve_renderer_mode(config, tile_count) == expected
+
+
+def _page_tile_model(page_html: str, renderer_init: str) -> dict:
+    match = re.search(rf"MemoryMosaicPayload\.load\((.*?), {re.escape(renderer_init)}\);</script>", page_html)
+    return json.loads(match.group(1))
+
+
+@pytest.mark.parametrize("renderer,renderer_init", (("canvas", "MemoryMosaicCanvas.init"), ("dom", "MemoryMosaicDomGrid.init")))
+def test_tiles_travel_as_a_model_not_as_elements(make_collection, load_addon, renderer, renderer_init):
+    collection = make_collection([card_row(cid, ivl=cid * 10) for cid in range(1, 7)])
+    addon, _ = load_addon(collection, memorymosaic_renderer=renderer)
+    page_html = addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+
+    assert page_html.count('<canvas class="memorymosaic-canvas"') == (renderer == "canvas")
+    assert 'class="memorymosaic-tile"' not in page_html
+    # A posição de cada tile no payload leva ao cid (hover e memorymosaic_open_card: na página)
+    tile_model = _page_tile_model(page_html, renderer_init)
+    cids, colors, _ = sys.modules["memorymosaic.tile_payload"].decode_tile_payload(tile_model["payload"])
+    assert cids == list(last_render["all_cids"])
+    assert [tile_model["palette"][color] for color in colors] == [
+        addon.tile_color(last_render["snapshot"], row, last_render["config"], last_render["view_mode"],
+                         last_render["gradient_field"], last_render["today"], last_render["gradient_lut"])
+        for row in range(len(cids))
+    ]
+    assert ("hoverColor" in tile_model) == (renderer == "canvas")
@@ -0,0 +1,96 @@
+"""Linha do tempo (revlog_replay): estados reconstruídos do revlog, com e sem keyframes."""
+
+from __future__ import annotations
+
+import json
+import random
+
+import pytest
+
+from mosaic_testing import COLLECTION_CREATED_SECS, DAY_SECS, TODAY, card_row, review_row
+
+STEP_SECS = -600 # Intervalo negativo do revlog: passo de aprendizado em segundos
+
+
+def _cid(day: int, index: int) -> int:
+    """Cartão criado ao meio-dia do `day`; `index` diferencia os ids das revisões do mesmo dia."""
+    return (COLLECTION_CREATED_SECS + day * DAY_SECS + DAY_SECS // 2) * 1000 - 1000 + index
+
+
+def _replay(pure_module, collection, cids, keyframe_events=1_000_000, max_keyframes=1):
+    revlog_replay = pure_module("revlog_replay")
+    return revlog_replay.load_revlog_replay(
+        collection.db, cids, collection.sched.today, collection.sched.day_cutoff, keyframe_events, max_keyframes,
+    )
+
+
+def _state(snapshot, row: int) -> tuple:
+    return (snapshot.present[row], snapshot.type[row], snapshot.queue[row], snapshot.ivl[row], snapshot.lapses[row], snapshot.due[row])
+
+
+def test_replay_follows_a_card_history(pure_module, make_collection):
+    cid = _cid(10, 1)
+    collection = make_collection([card_row(cid)], [
+        review_row(cid, 10, review_type=0, ivl=STEP_SECS),          # Aprendizado
+        review_row(cid, 11, ivl=3),                                 # Formado: revisão em 3 dias
+        review_row(cid, 14, ease=1, ivl=STEP_SECS),                 # Lapso: reaprendizado
+        review_row(cid, 15, review_type=2, ivl=1),                  # Volta à revisão
+        review_row(cid, 20, ease=0, review_type=4, ivl=0),          # Esquecer: volta a ser novo
+    ])
+    replay = _replay(pure_module, collection, [cid])
+    assert replay.first_day == 10
+
+    # (present, type, queue, ivl, lapses, due) no fim de cada dia
+    expected = {
+        9: (0, 0, 0, 0, 0, 0),
+        10: (1, 1, 1, 0, 0, 10),
+        12: (1, 2, 2, 3, 0, 14),
+        14: (1, 3, 1, 3, 1, 14),
+        15: (1, 2, 2, 1, 1, 16),
+        20: (1, 0, 0, 0, 1, 0),
+        TODAY + 5: (1, 0, 0, 0, 1, 0),
+    }
+    # Para a frente e de volta: o estado não depende da posição anterior do replay
+    for day in list(expected) + list(reversed(expected)):
+        assert _state(replay.seek(day), 0) == expected[day], day
+
+
+def test_keyframes_give_the_same_states(pure_module, make_collection):
+    rng = random.Random(7)
+    cards, reviews = [], []
+    for index in range(1, 41):
+        created_day = rng.randrange(0, TODAY // 2)
+        cid = _cid(created_day, index)
+        cards.append(card_row(cid))
+        for day in sorted(rng.sample(range(created_day, TODAY + 1), rng.randrange(0, 12))):
+            reviews.append(rng.choice((
+                review_row(cid, day, review_type=0, ivl=STEP_SECS),
+                review_row(cid, day, ivl=rng.randrange(1, 100)),
+                review_row(cid, day, ease=1, ivl=STEP_SECS),
+                review_row(cid, day, review_type=2, ivl=rng.randrange(1, 10)),
+                review_row(cid, day, ease=0, review_type=4, ivl=0),
+                review_row(cid, day, review_type=3, ivl=0),
+            )))
+    collection = make_collection(cards, reviews)
+    cids = sorted(card[0] for card in cards)
+
+    with_keyframes = _replay(pure_module, collection, cids, keyframe_events=7, max_keyframes=4)
+    days = [rng.randrange(-5, TODAY + 5) for _ in range(60)] + [TODAY, 0, TODAY // 2]
+    for day in days:
+        reference = _replay(pure_module, collection, cids).seek(day)
+        snapshot = with_keyframes.seek(day)
+        assert [_state(snapshot, row) for row in range(len(cids))] == [_state(reference, row) for row in range(len(cids))], day
+        assert snapshot.factor == reference.factor
+    assert 0 < len(with_keyframes.keyframes) <= 4
+
+
+@pytest.mark.parametrize("step_days,expected", ((3, 3), (0, 1), (None, 7), ("2", 7)))
+def test_timelapse_step_days(make_collection, load_addon, step_days, expected):
+    collection = make_collection([card_row(1), card_row(2)], [review_row(1, TODAY - 5)])
+    addon, mw = load_addon(collection, timelapse_step_days=step_days)
+    addon._render_memorymosaic_grid_html()
+    addon._start_timelapse()
+
+    prefix = "MemoryMosaicTimeLapse.ready("
+    options = [json.loads(script[len(prefix):-2]) for script in mw.evaluated_scripts if script.startswith(prefix)]
+    assert [entry["stepDays"] for entry in options] == [expected]
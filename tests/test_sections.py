@@ -0,0 +1,137 @@
+"""Visualização em seções: mini-sumários agregados no SQLite e cartões lidos só ao abrir cada seção."""
+
+from __future__ import annotations
+
+import sys
+import types
+
+import pytest
+
+from mosaic_testing import TODAY, card_row, update_cards
+
+_CARDS = [
+    card_row(1, ivl=5, did=2),
+    card_row(2, ivl=40, due=TODAY),
+    card_row(3, card_type=0, ivl=0, due=1, did=2),
+    card_row(4, ivl=60),
+    card_row(5, card_type=3, queue=1, ivl=1, due=0, did=2),
+]
+_TAGS = {1: "prova leitura", 2: "leitura", 4: "prova"} # Cartões 3 e 5 sem tag
+# Gradiente com escala de ivl fixa, para que as respostas possam ser aplicadas tile a tile
+_PATCHABLE_VIEW = {"memorymosaic_default_view_mode": "gradient", "gradient_ivl_normalize": False}
+
+
+def _expected_summaries(collection, keys_of_card) -> dict:
+    """Mini-sumários montados cartão a cartão: {chave: ([contagem por categoria], vencidos)}."""
+    card_data = sys.modules["memorymosaic.card_data"]
+    tile_engine = sys.modules["memorymosaic.tile_engine"]
+    snapshot = card_data.load_card_snapshot(collection.db, [row[0] for row in _CARDS])
+    summaries = {}
+    for row, cid in enumerate(snapshot.cids):
+        category = tile_engine.classify_card(snapshot.present[row], snapshot.type[row], snapshot.queue[row], snapshot.ivl[row])
+        for key in keys_of_card(cid, snapshot.did[row]):
+            counts, due = summaries.setdefault(key, ([0] * tile_engine.CATEGORY_COUNT, [0]))
+            counts[category] += 1
+            due[0] += tile_engine.is_due_today(snapshot, row, TODAY)
+    return {key: (counts, due[0]) for key, (counts, due) in summaries.items()}
+
+
+def _section_summaries(sections) -> dict:
+    return {key: (sections.counts(index), sections.due_counts[index]) for index, key in enumerate(sections.keys)}
+
+
+def _open_section_tiles(addon, index: int) -> list[tuple[int, str]]:
+    """(cid, cor) dos tiles enviados à página ao abrir a seção."""
+    model = addon._open_section(index)
+    cids, colors, _ = sys.modules["memorymosaic.tile_payload"].decode_tile_payload(model["payload"])
+    return [(cid, model["palette"][color]) for cid, color in zip(cids, colors)]
+
+
+def test_deck_sections_are_summarized_without_reading_the_cards(make_collection, load_addon):
+    collection = make_collection(_CARDS, tags=_TAGS)
+    addon, _ = load_addon(collection, memorymosaic_default_sections="deck")
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    sections = last_render["sections"]
+
+    assert len(last_render["snapshot"]) == 0 and sections.rows == [None, None]
+    assert sections.keys == [1, 2] # Default, Idiomas
+    assert sections.sizes == [2, 3]
+    assert _section_summaries(sections) == _expected_summaries(collection, lambda cid, did: (did,))
+
+
+def test_tag_sections_count_each_tag_of_the_note(make_collection, load_addon):
+    collection = make_collection(_CARDS, tags=_TAGS)
+    addon, _ = load_addon(collection, memorymosaic_default_sections="tag")
+    addon._render_memorymosaic_grid_html()
+    sections = addon._session_last_render["sections"]
+
+    assert sections.keys == ["leitura", "prova", ""] # Sem tag por último
+    assert sections.sizes == [2, 2, 2]
+    assert _section_summaries(sections) == _expected_summaries(collection, lambda cid, did: _TAGS.get(cid, "").split() or [""])
+
+
+def test_opening_a_section_reads_only_its_cards(make_collection, load_addon):
+    collection = make_collection(_CARDS, tags=_TAGS)
+    addon, _ = load_addon(collection, memorymosaic_default_sections="tag")
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    all_cids = list(last_render["all_cids"])
+    tile_engine = sys.modules["memorymosaic.tile_engine"]
+
+    tiles = _open_section_tiles(addon, 0) # leitura: cartões 1 e 2
+    snapshot = last_render["snapshot"]
+    assert sorted(snapshot.cids) == [1, 2]
+    assert [cid for cid, _ in tiles] == [cid for cid in all_cids if cid in (1, 2)] # Na ordenação da grade
+    assert tiles == [
+        (cid, tile_engine.tile_color(
+            snapshot, snapshot.row_of(cid), last_render["config"], last_render["view_mode"], last_render["gradient_field"],
+            TODAY, last_render["gradient_lut"],
+        ))
+        for cid, _ in tiles
+    ]
+
+    # O cartão 1 já foi lido pela seção "leitura": não é repetido no instantâneo
+    _open_section_tiles(addon, 1) # prova: cartões 1 e 4
+    snapshot = last_render["snapshot"]
+    assert sorted(snapshot.cids) == [1, 2, 4]
+    assert sorted(last_render["sections"].sections_of(snapshot.row_of(1))) == [0, 1]
+
+
+def test_answer_in_an_open_section_patches_every_section_of_the_card(make_collection, load_addon):
+    collection = make_collection(_CARDS, tags=_TAGS)
+    addon, _ = load_addon(collection, memorymosaic_default_sections="tag", **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    _open_section_tiles(addon, 0)
+
+    update_cards(collection, "UPDATE cards SET ivl = 30, due = ? WHERE id = 1", TODAY) # Jovem -> maduro, vencido
+    addon.on_reviewer_did_answer_card(None, types.SimpleNamespace(id=1), 3)
+    addon._render_memorymosaic_grid_html()
+    assert addon._session_last_render is last_render
+    assert list(last_render["patched_tiles"]) == [1]
+    assert _section_summaries(last_render["sections"]) == _expected_summaries(
+        collection, lambda cid, did: _TAGS.get(cid, "").split() or [""],
+    )
+
+
+def test_answer_in_a_closed_section_rebuilds(make_collection, load_addon):
+    collection = make_collection(_CARDS, tags=_TAGS)
+    addon, _ = load_addon(collection, memorymosaic_default_sections="deck", **_PATCHABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    _open_section_tiles(addon, 0) # Default
+
+    update_cards(collection, "UPDATE cards SET ivl = 30 WHERE id = 1") # Idiomas, seção ainda fechada
+    addon.on_reviewer_did_answer_card(None, types.SimpleNamespace(id=1), 3)
+    addon._render_memorymosaic_grid_html()
+    assert addon._session_last_render is not last_render
+    assert _section_summaries(addon._session_last_render["sections"]) == _expected_summaries(collection, lambda cid, did: (did,))
+
+
+@pytest.mark.parametrize("open_count,expected", ((2, [0, 1]), (-1, []), (None, [0]), ("2", [0])))
+def test_first_sections_open_by_default(make_collection, load_addon, open_count, expected):
+    collection = make_collection(_CARDS, tags=_TAGS)
+    addon, _ = load_addon(collection, memorymosaic_default_sections="tag", sections_open_count=open_count)
+    addon._render_memorymosaic_grid_html()
+    assert addon._get_open_section_indices() == expected
@@ -0,0 +1,88 @@
+"""Mostrar Mais / Mostrar Todos: os novos tiles vão para a grade exibida em lotes, sem recarregar a página."""
+
+from __future__ import annotations
+
+import json
+
+from mosaic_testing import card_row
+
+_CARDS = [card_row(cid, ivl=cid * 10) for cid in range(1, 8)]
+# Gradiente com escala de ivl fixa: os novos tiles podem ser anexados sem recolorir a grade
+_STREAMABLE_VIEW = {
+    "memorymosaic_default_view_mode": "gradient", "gradient_ivl_normalize": False,
+    "initial_card_load_count": 3, "incremental_card_load_count": 2,
+}
+
+
+def _send_pycmd(addon, mw, message: str, refreshes: list) -> list[tuple[str, object]]:
+    """Envia o pycmd e retorna (função, argumento) de cada chamada a MemoryMosaicStream na página."""
+    mw.evaluated_scripts.clear()
+    mw.deckBrowser.refresh = lambda: refreshes.append(message)
+    assert addon.handle_memorymosaic_pycmd((False, None), message, None) == (True, None)
+
+    prefix = "MemoryMosaicStream."
+    calls = []
+    for script in mw.evaluated_scripts:
+        if script.startswith(prefix):
+            name, _, argument = script[len(prefix):-2].partition("(")
+            calls.append((name, json.loads(argument)))
+    return calls
+
+
+def _tiles_of_rows(addon, last_render, rows: range) -> list[list]:
+    snapshot = last_render["snapshot"]
+    return [
+        [snapshot.cids[row], addon.tile_color(snapshot, row, last_render["config"], last_render["view_mode"],
+                                              last_render["gradient_field"], last_render["today"], last_render["gradient_lut"]), False]
+        for row in rows
+    ]
+
+
+def test_show_more_streams_the_next_tiles_in_chunks(make_collection, load_addon, monkeypatch):
+    addon, mw = load_addon(make_collection(_CARDS), **_STREAMABLE_VIEW)
+    monkeypatch.setattr(addon, "_STREAM_CHUNK_TILES", 1)
+    addon._render_memorymosaic_grid_html()
+    first_render = addon._session_last_render
+    refreshes = []
+
+    calls = _send_pycmd(addon, mw, "memorymosaic_load_more", refreshes)
+    last_render = addon._session_last_render
+    assert refreshes == []
+    assert last_render is not first_render and last_render["html"] is None
+    assert len(first_render["snapshot"]) == 3 # O estado anterior (talvez no cache) não é alterado
+    assert list(last_render["snapshot"].cids) == list(last_render["all_cids"][:5])
+    assert calls == [
+        ("begin", {"shownBefore": 3}),
+        ("enqueue", _tiles_of_rows(addon, last_render, range(3, 4))),
+        ("enqueue", _tiles_of_rows(addon, last_render, range(4, 5))),
+        ("finish", {"remaining": 2, "showMoreText": addon.tr("pagination_show_more", count=2),
+                    "showAllText": addon.tr("pagination_show_all", count=7)}),
+    ]
+
+
+def test_show_all_streams_the_rest_and_hides_the_pagination(make_collection, load_addon):
+    addon, mw = load_addon(make_collection(_CARDS), **_STREAMABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    refreshes = []
+
+    calls = _send_pycmd(addon, mw, "memorymosaic_load_all", refreshes)
+    last_render = addon._session_last_render
+    assert refreshes == []
+    assert len(last_render["snapshot"]) == 7
+    assert calls == [
+        ("begin", {"shownBefore": 3}),
+        ("enqueue", _tiles_of_rows(addon, last_render, range(3, 7))),
+        ("finish", {"remaining": 0, "showMoreText": "", "showAllText": ""}),
+    ]
+
+
+def test_changed_grid_reloads_the_page_instead_of_streaming(make_collection, load_addon):
+    addon, mw = load_addon(make_collection(_CARDS), **_STREAMABLE_VIEW)
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    refreshes = []
+
+    addon._session_sort_order_override = "ivl_asc" # A grade exibida não corresponde mais à ordenação
+    assert _send_pycmd(addon, mw, "memorymosaic_load_more", refreshes) == []
+    assert refreshes == ["memorymosaic_load_more"]
+    assert addon._session_last_render is last_render
@@ -0,0 +1,61 @@
+"""Sumário da grade: contagens agregadas no SQLite para todo o filtro, independentes da paginação."""
+
+from __future__ import annotations
+
+import itertools
+
+from mosaic_testing import TODAY, card_row, load_config
+
+# Tipos e filas possíveis (inclusive suspenso e enterrados) e vencimentos ao redor de hoje
+_STATES = ((0, 0), (1, 1), (1, 3), (2, 2), (3, 1), (3, 3), (2, -1), (2, -2), (3, -3), (0, -1))
+_IVLS = (0, 5, 21, 400)
+_DUE_OFFSETS = (-2, 0, 3)
+
+
+def _varied_cards(repeat: int = 1) -> list[tuple]:
+    combinations = list(itertools.product(_STATES, _IVLS, _DUE_OFFSETS)) * repeat
+    return [
+        card_row(cid, card_type, queue, ivl, due=TODAY + offset)
+        for cid, ((card_type, queue), ivl, offset) in enumerate(combinations, start=1)
+    ]
+
+
+def _expected_summary(pure_module, collection, cids, config):
+    """Contagens cartão a cartão, pela classificação dos tiles (classify_card / is_due_today)."""
+    card_data = pure_module("card_data")
+    tile_engine = pure_module("tile_engine")
+    snapshot = card_data.load_card_snapshot(collection.db, cids)
+    color_counts = {}
+    due_today_count = 0
+    for row in range(len(snapshot)):
+        category = tile_engine.classify_card(snapshot.present[row], snapshot.type[row], snapshot.queue[row], snapshot.ivl[row])
+        color = config[tile_engine.CATEGORY_COLOR_KEYS[category]]
+        color_counts[color] = color_counts.get(color, 0) + 1
+        due_today_count += tile_engine.is_due_today(snapshot, row, TODAY)
+    return color_counts, due_today_count
+
+
+def test_grouped_summary_matches_the_tile_classification(pure_module, make_collection):
+    render_engine = pure_module("render_engine")
+    config = load_config()
+    # Mais cartões que um lote de parâmetros do SQLite: as contagens dos lotes são somadas
+    collection = make_collection(_varied_cards(repeat=10))
+    cids = sorted(collection.find_cards(""))
+    assert len(cids) > pure_module("card_data").SQL_PARAM_CHUNK_SIZE
+
+    summary = render_engine.load_filter_summary(collection.db, cids, config, TODAY)
+    assert summary == _expected_summary(pure_module, collection, cids, config)
+
+
+def test_paginated_grid_counts_the_whole_filter(pure_module, make_collection, load_addon):
+    collection = make_collection(_varied_cards())
+    addon, _ = load_addon(
+        collection, memorymosaic_default_view_mode="categorical", initial_card_load_count=10, incremental_card_load_count=10,
+    )
+    addon._render_memorymosaic_grid_html()
+    last_render = addon._session_last_render
+    assert len(last_render["snapshot"]) == 10 < len(last_render["all_cids"])
+
+    color_counts, due_today_count = _expected_summary(pure_module, collection, list(last_render["all_cids"]), last_render["config"])
+    assert last_render["color_counts"] == color_counts
+    assert last_render["due_today_count"] == due_today_count
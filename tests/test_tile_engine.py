@@ -0,0 +1,98 @@
+"""Motor de coloração (tile_engine): os caminhos NumPy e Python puro dão a mesma saída."""
+
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+from mosaic_testing import TODAY, load_config
+
+pytest.importorskip("numpy")
+
+GRADIENT_FIELDS = ("ivl", "factor", "lapses", "due")
+IVL_MIN, IVL_MAX = 10, 200
+
+
+def _edge_case_snapshot(card_data):
+    """Cartões nos casos de borda: suspensos, enterrados, fila 3, ivl nos limites e fora deles, apagados."""
+    rows = []
+    for card_type, queue in ((0, 0), (1, 1), (1, 3), (2, 2), (3, 1), (3, 3)):
+        for hidden_queue in (queue, -1, -2, -3):
+            for ivl in (0, IVL_MIN - 1, IVL_MIN, 21, IVL_MAX, IVL_MAX + 1, 5000):
+                due = TODAY + (ivl % 7) - 3 if queue != 1 else TODAY * 86_400
+                rows.append((card_type, hidden_queue, ivl, 1300 + ivl, ivl % 9, due, 1))
+    snapshot = card_data.CardSnapshot(range(1, len(rows) + 2))
+    for row, values in enumerate(rows):
+        snapshot.set_row(row, values)
+    # A última linha fica como cartão apagado (present = 0)
+    return snapshot
+
+
+def _lut(tile_engine, config, field, invert):
+    if field == "ivl":
+        min_val, max_val = IVL_MIN, IVL_MAX
+    else:
+        min_val, max_val = config[f"gradient_{field}_min"], config[f"gradient_{field}_max"]
+    return tile_engine.build_gradient_lut(config, min_val, max_val, invert, 256)
+
+
+@pytest.mark.parametrize("field,invert", list(itertools.product(GRADIENT_FIELDS, (False, True))))
+def test_gradient_coloring_paths_match(pure_module, field, invert):
+    tile_engine = pure_module("tile_engine")
+    snapshot = _edge_case_snapshot(pure_module("card_data"))
+    config = load_config({"show_due_indicator": True})
+    lut = _lut(tile_engine, config, field, invert)
+
+    python_result = tile_engine.compute_tile_coloring(snapshot, config, "gradient", field, TODAY, lut, use_numpy=False)
+    numpy_result = tile_engine.compute_tile_coloring(snapshot, config, "gradient", field, TODAY, lut, use_numpy=True)
+    for key in ("palette", "colors", "due", "counts"):
+        assert numpy_result[key] == python_result[key], key
+    assert python_result["due"], "o instantâneo precisa de cartões vencidos"
+
+
+def test_gradient_clamps_ivl_outside_the_range(pure_module):
+    tile_engine = pure_module("tile_engine")
+    card_data = pure_module("card_data")
+    config = load_config()
+    snapshot = card_data.CardSnapshot(range(4))
+    for row, ivl in enumerate((IVL_MIN - 1, IVL_MIN, IVL_MAX, IVL_MAX + 1)):
+        snapshot.set_row(row, (2, 2, ivl, 2500, 0, TODAY + 5, 1))
+    for invert in (False, True):
+        lut = _lut(tile_engine, config, "ivl", invert)
+        for use_numpy in (False, True):
+            result = tile_engine.compute_tile_coloring(snapshot, config, "gradient", "ivl", TODAY, lut, use_numpy=use_numpy)
+            colors = [result["palette"][index] for index in result["colors"]]
+            assert colors[0] == colors[1] == lut["palette"][0]
+            assert colors[2] == colors[3] == lut["palette"][-1]
+            assert colors[0] != colors[3]
+
+
+def test_categorical_coloring_paths_match(pure_module):
+    tile_engine = pure_module("tile_engine")
+    snapshot = _edge_case_snapshot(pure_module("card_data"))
+    config = load_config({"show_due_indicator": True})
+
+    python_result = tile_engine.compute_tile_coloring(snapshot, config, "categorical", "ivl", TODAY, None, use_numpy=False)
+    numpy_result = tile_engine.compute_tile_coloring(snapshot, config, "categorical", "ivl", TODAY, None, use_numpy=True)
+    for key in ("palette", "colors", "due", "counts"):
+        assert numpy_result[key] == python_result[key], key
+    # Reaprendizado: (type, queue) = (1, 3), (3, 1) e (3, 3); a fila 3 conta mesmo com type = 1
+    assert python_result["counts"][config["color_relearning_lapse"]] == 3 * 7
+    assert python_result["counts"][config["color_suspended_buried"]] == 6 * 3 * 7
+
+
+@pytest.mark.parametrize("gradient_field", (None,) + GRADIENT_FIELDS)
+@pytest.mark.parametrize("start,bin_size", ((0, 1), (0, 7), (5, 16), (3, 1000)))
+def test_bin_accumulator_paths_match(pure_module, gradient_field, start, bin_size):
+    tile_engine = pure_module("tile_engine")
+    snapshot = _edge_case_snapshot(pure_module("card_data"))
+    card_count = start + len(snapshot)
+
+    fields = []
+    for use_numpy in (False, True):
+        accumulator = tile_engine.BinAccumulator(card_count, bin_size, gradient_field, TODAY)
+        accumulator.add(start, snapshot, use_numpy=use_numpy)
+        fields.append({name: getattr(accumulator, name) for name in tile_engine.BinAccumulator.__slots__})
+    for name in tile_engine.BinAccumulator.__slots__:
+        assert fields[1][name] == fields[0][name], name
@@ -0,0 +1,49 @@
+"""Formato compacto do modelo de tiles (tile_payload): a codificação volta aos mesmos dados."""
+
+from __future__ import annotations
+
+import pytest
+
+_EPOCH_CID = 1_700_000_000_000 # cids são timestamps em milissegundos
+
+
+@pytest.mark.parametrize("compress", (False, True))
+@pytest.mark.parametrize("cids,delta_bytes", (
+    ([], 1),
+    ([_EPOCH_CID], 1),
+    ([_EPOCH_CID + offset for offset in range(0, 1200, 3)], 1),
+    ([_EPOCH_CID, _EPOCH_CID - 5, _EPOCH_CID + 90, _EPOCH_CID + 2], 1), # Fora de ordem: diferenças negativas
+    ([_EPOCH_CID, _EPOCH_CID + 128, _EPOCH_CID], 2),
+    ([_EPOCH_CID, _EPOCH_CID - 40_000, _EPOCH_CID + 86_400_000], 4),
+    ([1, _EPOCH_CID, 2], 8),
+))
+def test_round_trip(pure_module, cids, delta_bytes, compress):
+    tile_payload = pure_module("tile_payload")
+    colors = [row % 5 for row in range(len(cids))]
+    due_rows = [row for row in range(len(cids)) if row % 3 == 1]
+
+    payload = tile_payload.encode_tile_payload(cids, colors, due_rows, 5, compress)
+    assert (payload["count"], payload["deltaBytes"], payload["indexBytes"]) == (len(cids), delta_bytes, 1)
+    assert payload["compressed"] is compress
+    assert tile_payload.decode_tile_payload(payload) == (cids, colors, due_rows)
+
+
+@pytest.mark.parametrize("palette_size,index_bytes", ((256, 1), (257, 2), (4000, 2)))
+def test_palette_index_width(pure_module, palette_size, index_bytes):
+    tile_payload = pure_module("tile_payload")
+    cids = list(range(_EPOCH_CID, _EPOCH_CID + 600))
+    colors = [(row * 7) % palette_size for row in range(len(cids))]
+
+    payload = tile_payload.encode_tile_payload(cids, colors, [], palette_size, True)
+    assert payload["indexBytes"] == index_bytes
+    assert tile_payload.decode_tile_payload(payload) == (cids, colors, [])
+
+
+@pytest.mark.parametrize("tile_count", (1, 7, 8, 9, 17))
+def test_due_bitset_at_byte_boundaries(pure_module, tile_count):
+    tile_payload = pure_module("tile_payload")
+    cids = list(range(_EPOCH_CID, _EPOCH_CID + tile_count))
+    due_rows = sorted({0, tile_count - 1, min(7, tile_count - 1), min(8, tile_count - 1)})
+
+    payload = tile_payload.encode_tile_payload(cids, [0] * tile_count, due_rows, 1, False)
+    assert tile_payload.decode_tile_payload(payload)[2] == due_rows
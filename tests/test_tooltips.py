@@ -0,0 +1,24 @@
+"""Tooltips sob demanda: o LRU dos tooltips recentes tem o mesmo limite nos dois modos."""
+
+from __future__ import annotations
+
+import pytest
+
+from mosaic_testing import card_row
+
+
+@pytest.mark.parametrize("binning", ("off", "on"))
+def test_tooltip_lru_is_bounded(make_collection, load_addon, monkeypatch, binning):
+    collection = make_collection([card_row(cid, ivl=cid) for cid in range(1, 61)])
+    addon, _ = load_addon(collection, memorymosaic_binning=binning, binning_target_tiles=30)
+    monkeypatch.setattr(addon, "_TOOLTIP_LRU_MAX_ENTRIES", 5)
+    addon._render_memorymosaic_grid_html()
+    bins = addon._session_last_render["bins"]
+    assert (bins is not None) == (binning == "on")
+
+    keys = range(bins.bin_count) if bins is not None else range(1, 61)
+    for key in keys:
+        assert addon._get_tile_tooltip_lines(key)
+        assert len(addon._tooltip_lru) <= 5
+    # Os mais recentes ficam no LRU
+    assert list(addon._tooltip_lru) == list(keys)[-5:]
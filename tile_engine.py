@@ -0,0 +1,563 @@
+"""Motor de classificação e coloração dos tiles do Memory Mosaic.
+
+Converte as colunas de um `CardSnapshot` (ver card_data.py) em índices de
+paleta, posições com indicador de vencimento e contagens por cor. Há duas
+implementações com saída idêntica: uma vetorizada com NumPy, usada quando o
+NumPy pode ser importado, e uma em Python puro (regra a regra, por linha).
+Como `card_data`, este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError: # NumPy é opcional: sem ele, usa-se o caminho em Python puro
+    np = None
+
+HAS_NUMPY = np is not None
+
+# Categorias do modo categórico e a chave do config com a cor de cada uma
+CATEGORY_DEFAULT = 0
+CATEGORY_SUSPENDED = 1
+CATEGORY_NEW = 2
+CATEGORY_RELEARNING = 3
+CATEGORY_YOUNG = 4
+CATEGORY_MATURE = 5
+CATEGORY_COLOR_KEYS = (
+    "color_default_bg",
+    "color_suspended_buried",
+    "color_new",
+    "color_relearning_lapse",
+    "color_young_learn",
+    "color_mature",
+)
+
+# Intervalo (dias) a partir do qual um cartão em revisão é "maduro"
+MATURE_IVL_DAYS = 21
+
+# As mesmas regras de classify_card e is_due_today como expressões SQL sobre `cards`,
+# para contar cartões no SQLite sem carregá-los
+CATEGORY_SQL_CASE = (
+    f"CASE WHEN queue IN (-1, -2, -3) THEN {CATEGORY_SUSPENDED}"
+    f" WHEN type = 0 THEN {CATEGORY_NEW}"
+    f" WHEN queue = 3 OR type = 3 THEN {CATEGORY_RELEARNING}"
+    f" WHEN type = 1 THEN {CATEGORY_YOUNG}"
+    f" WHEN type = 2 AND ivl >= {MATURE_IVL_DAYS} THEN {CATEGORY_MATURE}"
+    f" WHEN type = 2 THEN {CATEGORY_YOUNG}"
+    f" ELSE {CATEGORY_DEFAULT} END"
+)
+DUE_TODAY_SQL = "queue IN (1, 2, 3) AND due <= ?" # Parâmetro: o dia de hoje
+
+def classify_card(present: int, card_type: int, queue: int, ivl: int) -> int:
+    """Categoria (CATEGORY_*) de um cartão, na ordem de prioridade das regras."""
+    if not present:
+        return CATEGORY_DEFAULT
+    # 1. Estados que anulam outros (suspenso/enterrado)
+    if queue in (-1, -2, -3):
+        return CATEGORY_SUSPENDED
+    # 2. Novo
+    if card_type == 0:
+        return CATEGORY_NEW
+    # 3. Reaprendizado/lapso (queue=3 ou type=3)
+    if queue == 3 or card_type == 3:
+        return CATEGORY_RELEARNING
+    # 4. Aprendizado
+    if card_type == 1:
+        return CATEGORY_YOUNG
+    # 5. Revisão: jovem ou maduro conforme o intervalo
+    if card_type == 2:
+        return CATEGORY_MATURE if ivl >= MATURE_IVL_DAYS else CATEGORY_YOUNG
+    return CATEGORY_DEFAULT
+
+
+def is_due_today(snapshot: Any, row: int, today: int) -> bool:
+    """True se o cartão está em aprendizado/revisão e vence hoje ou antes."""
+    return bool(snapshot.present[row]) and snapshot.queue[row] in (1, 2, 3) and snapshot.due[row] <= today
+
+
+def hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
+    """Converte cor hexadecimal para RGB."""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def rgb_to_hex(rgb: tuple[int, int, int]) -> str:
+    """Converte cor RGB para hexadecimal."""
+    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+
+
+def gradient_color(value: float, min_val: float, max_val: float, config: dict, invert_gradient: bool = False) -> str:
+    """Calcula a cor do gradiente para um valor entre o mínimo e o máximo."""
+    # Prevenir divisão por zero
+    if min_val == max_val:
+        return config.get("gradient_color_mid")
+        
+    # Normalizar o valor para [0, 1]
+    normalized = max(0, min(1, (value - min_val) / (max_val - min_val)))
+    
+    if invert_gradient:
+        normalized = 1.0 - normalized
+    
+    # Obter cores do gradiente do config
+    start_color = config.get("gradient_color_start")  # Amarelo
+    mid_color = config.get("gradient_color_mid")      # Verde
+    end_color = config.get("gradient_color_end")      # Azul
+    
+    # Converter para RGB para interpolação
+    start_rgb = hex_to_rgb(start_color)
+    mid_rgb = hex_to_rgb(mid_color)
+    end_rgb = hex_to_rgb(end_color)
+    
+    # Interpolação baseada na posição normalizada
+    if normalized <= 0.5:
+        # Entre start e mid (0.0 a 0.5)
+        normalized_adjusted = normalized * 2  # Ajusta para range 0-1
+        r = int(start_rgb[0] + (mid_rgb[0] - start_rgb[0]) * normalized_adjusted)
+        g = int(start_rgb[1] + (mid_rgb[1] - start_rgb[1]) * normalized_adjusted)
+        b = int(start_rgb[2] + (mid_rgb[2] - start_rgb[2]) * normalized_adjusted)
+    else:
+        # Entre mid e end (0.5 a 1.0)
+        normalized_adjusted = (normalized - 0.5) * 2  # Ajusta para range 0-1
+        r = int(mid_rgb[0] + (end_rgb[0] - mid_rgb[0]) * normalized_adjusted)
+        g = int(mid_rgb[1] + (end_rgb[1] - mid_rgb[1]) * normalized_adjusted)
+        b = int(mid_rgb[2] + (end_rgb[2] - mid_rgb[2]) * normalized_adjusted)
+    
+    # Converter de volta para hex
+    return rgb_to_hex((r, g, b))
+
+
+def build_gradient_lut(config: dict, min_val: float, max_val: float, invert_gradient: bool, max_stops: int) -> dict:
+    """Paleta pré-calculada (LUT) do gradiente para a faixa [min_val, max_val].
+
+    Uma cor por valor inteiro da faixa, quantizada em até `max_stops` cores para
+    faixas maiores, já com a ordem (asc/desc) aplicada. Ver `lut_color`.
+    """
+    if min_val == max_val:
+        palette = (config.get("gradient_color_mid"),)
+        scale = 0.0
+    else:
+        stops = min(int(abs(max_val - min_val)) + 1, max_stops)
+        step = (max_val - min_val) / (stops - 1)
+        palette = tuple(
+            gradient_color(min_val + i * step, min_val, max_val, config, invert_gradient=invert_gradient)
+            for i in range(stops)
+        )
+        scale = (stops - 1) / (max_val - min_val)
+    return {"min": min_val, "max": max_val, "palette": palette, "scale": scale, "mid_color": config.get("gradient_color_mid")}
+
+
+def lut_color(lut: dict, value: float) -> str:
+    """Cor de `value` na paleta do gradiente: apenas o cálculo do índice e uma consulta à tabela."""
+    palette = lut["palette"]
+    index = round((value - lut["min"]) * lut["scale"])
+    if index <= 0:
+        return palette[0]
+    if index >= len(palette):
+        return palette[-1]
+    return palette[index]
+
+
+def gradient_tile_color(snapshot: Any, row: int, field: str, config: dict, today: int, lut: dict | None) -> str:
+    """Cor do tile no modo gradiente do campo `field`."""
+    if not snapshot.present[row]:
+        return config.get("color_default_bg")
+    queue = snapshot.queue[row]
+    # Cartões suspensos/enterrados sempre têm a mesma cor
+    if queue in (-1, -2, -3):
+        return config.get("color_suspended_buried")
+    # Cartões novos usam a cor de 'novo' do config, mesmo no modo gradiente
+    if snapshot.type[row] == 0:
+        return config.get("color_new")
+    if lut is None:
+        # Campo não reconhecido, usar cor padrão
+        return config.get("color_default_bg")
+
+    if field == "factor":
+        value = snapshot.factor[row]
+    elif field == "ivl":
+        value = snapshot.ivl[row]
+    elif field == "lapses":
+        value = snapshot.lapses[row]
+    elif queue == 2: # field == "due": dias até o vencimento do cartão em revisão
+        value = max(0, snapshot.due[row] - today)
+    else:
+        # Cartões que não estão em revisão usam a cor do meio
+        return lut["mid_color"]
+    return lut_color(lut, value)
+
+
+def tile_color(snapshot: Any, row: int, config: dict, view_mode: str, gradient_field: str, today: int, lut: dict | None) -> str:
+    """Cor de um tile no modo de visualização atual (categórico ou gradiente)."""
+    if view_mode == "gradient":
+        return gradient_tile_color(snapshot, row, gradient_field, config, today, lut)
+    return config.get(CATEGORY_COLOR_KEYS[classify_card(
+        snapshot.present[row], snapshot.type[row], snapshot.queue[row], snapshot.ivl[row],
+    )])
+
+
+def ivl_range(snapshot: Any, use_numpy: bool = True) -> tuple[int, int] | None:
+    """(min, max) de ivl dos cartões que usam o gradiente (revisados, não suspensos), ou None."""
+    if use_numpy and HAS_NUMPY and len(snapshot):
+        columns = _numpy_columns(snapshot)
+        ivls = columns["ivl"][_gradient_mask(columns)]
+        if not len(ivls):
+            return None
+        return int(ivls.min()), int(ivls.max())
+
+    found = None
+    present, card_types, queues, ivls = snapshot.present, snapshot.type, snapshot.queue, snapshot.ivl
+    for row in range(len(snapshot)):
+        if present[row] and card_types[row] != 0 and queues[row] not in (-1, -2, -3):
+            ivl = ivls[row]
+            if found is None:
+                found = [ivl, ivl]
+            elif ivl < found[0]:
+                found[0] = ivl
+            elif ivl > found[1]:
+                found[1] = ivl
+    return None if found is None else (found[0], found[1])
+
+
+def compute_tile_coloring(
+    snapshot: Any,
+    config: dict,
+    view_mode: str,
+    gradient_field: str,
+    today: int,
+    lut: dict | None,
+    use_numpy: bool = True,
+) -> dict:
+    """Cores de todos os tiles do instantâneo.
+
+    Retorna {"palette": [cor, ...] na ordem da primeira ocorrência,
+    "colors": [índice na paleta por tile], "due": [linhas com indicador de vencimento],
+    "counts": {cor: quantidade}, na ordem da paleta}.
+    Usa o NumPy quando disponível e `use_numpy` é verdadeiro; a saída é a mesma nos dois caminhos.
+    """
+    if use_numpy and HAS_NUMPY and len(snapshot):
+        return _compute_tile_coloring_numpy(snapshot, config, view_mode, gradient_field, today, lut)
+    return _compute_tile_coloring_python(snapshot, config, view_mode, gradient_field, today, lut)
+
+
+def _compute_tile_coloring_python(snapshot: Any, config: dict, view_mode: str, gradient_field: str, today: int, lut: dict | None) -> dict:
+    palette_index_by_color: dict[str, int] = {}
+    color_counts: dict[str, int] = {}
+    colors: list[int] = []
+    show_due = config.get("show_due_indicator")
+    due_rows: list[int] = []
+    for row in range(len(snapshot)):
+        color = tile_color(snapshot, row, config, view_mode, gradient_field, today, lut)
+        color_index = palette_index_by_color.get(color)
+        if color_index is None:
+            color_index = palette_index_by_color[color] = len(palette_index_by_color)
+            color_counts[color] = 0
+        color_counts[color] += 1
+        colors.append(color_index)
+        if show_due and is_due_today(snapshot, row, today):
+            due_rows.append(row)
+    return {"palette": list(palette_index_by_color), "colors": colors, "due": due_rows, "counts": color_counts}
+
+
+def _numpy_columns(snapshot: Any) -> dict:
+    """Visões NumPy (sem cópia) das colunas do instantâneo."""
+    return {
+        "present": np.frombuffer(snapshot.present, dtype=np.uint8).astype(bool),
+        "type": np.frombuffer(snapshot.type, dtype=np.int8),
+        "queue": np.frombuffer(snapshot.queue, dtype=np.int8),
+        "ivl": np.frombuffer(snapshot.ivl, dtype=np.int32),
+        "factor": np.frombuffer(snapshot.factor, dtype=np.int32),
+        "lapses": np.frombuffer(snapshot.lapses, dtype=np.int32),
+        "due": np.frombuffer(snapshot.due, dtype=np.int64),
+    }
+
+
+def _suspended_mask(columns: dict) -> Any:
+    queue = columns["queue"]
+    return (queue >= -3) & (queue <= -1)
+
+
+def _gradient_mask(columns: dict) -> Any:
+    """Cartões coloridos pela escala do gradiente: presentes, não suspensos e não novos."""
+    return columns["present"] & ~_suspended_mask(columns) & (columns["type"] != 0)
+
+
+def _categories_numpy(columns: dict) -> Any:
+    """Categoria (CATEGORY_*) de cada linha; mesmas regras de classify_card."""
+    present, card_type, queue = columns["present"], columns["type"], columns["queue"]
+    return np.select(
+        [
+            ~present,
+            _suspended_mask(columns),
+            card_type == 0,
+            (queue == 3) | (card_type == 3),
+            card_type == 1,
+            (card_type == 2) & (columns["ivl"] >= MATURE_IVL_DAYS),
+            card_type == 2,
+        ],
+        [CATEGORY_DEFAULT, CATEGORY_SUSPENDED, CATEGORY_NEW, CATEGORY_RELEARNING, CATEGORY_YOUNG, CATEGORY_MATURE, CATEGORY_YOUNG],
+        default=CATEGORY_DEFAULT,
+    )
+
+
+def _compute_tile_coloring_numpy(snapshot: Any, config: dict, view_mode: str, gradient_field: str, today: int, lut: dict | None) -> dict:
+    columns = _numpy_columns(snapshot)
+    present, queue = columns["present"], columns["queue"]
+
+    # Cada tile recebe uma "chave" de cor; key_colors[chave] é a cor correspondente
+    if view_mode == "gradient":
+        keys, key_colors = _gradient_keys_numpy(columns, config, gradient_field, today, lut)
+    else:
+        keys = _categories_numpy(columns)
+        key_colors = [config.get(color_key) for color_key in CATEGORY_COLOR_KEYS]
+
+    # Paleta na ordem da primeira ocorrência, como no caminho em Python puro.
+    # Chaves diferentes podem ter a mesma cor (ex.: cor do meio do gradiente).
+    used_keys, first_rows = np.unique(keys, return_index=True)
+    key_counts = np.bincount(keys, minlength=len(key_colors))
+    key_to_palette = np.zeros(len(key_colors), dtype=np.int64)
+    palette_index_by_color: dict[str, int] = {}
+    color_counts: dict[str, int] = {}
+    for key in used_keys[np.argsort(first_rows)].tolist():
+        color = key_colors[key]
+        color_index = palette_index_by_color.get(color)
+        if color_index is None:
+            color_index = palette_index_by_color[color] = len(palette_index_by_color)
+            color_counts[color] = 0
+        key_to_palette[key] = color_index
+        color_counts[color] += int(key_counts[key])
+
+    due_rows: list[int] = []
+    if config.get("show_due_indicator"):
+        due_mask = present & ((queue == 1) | (queue == 2) | (queue == 3)) & (columns["due"] <= today)
+        due_rows = np.flatnonzero(due_mask).tolist()
+
+    return {
+        "palette": list(palette_index_by_color),
+        "colors": key_to_palette[keys].tolist(),
+        "due": due_rows,
+        "counts": color_counts,
+    }
+
+
+# Chaves especiais do modo gradiente; as chaves seguintes são os índices da LUT
+_GRADIENT_KEY_DEFAULT = 0
+_GRADIENT_KEY_SUSPENDED = 1
+_GRADIENT_KEY_NEW = 2
+_GRADIENT_KEY_MID = 3
+_GRADIENT_KEY_LUT_OFFSET = 4
+
+
+def _gradient_keys_numpy(columns: dict, config: dict, field: str, today: int, lut: dict | None) -> tuple[Any, list]:
+    present, queue = columns["present"], columns["queue"]
+    suspended = _suspended_mask(columns)
+    new = columns["type"] == 0
+
+    keys = np.full(len(present), _GRADIENT_KEY_DEFAULT, dtype=np.int64)
+    key_colors = [config.get("color_default_bg"), config.get("color_suspended_buried"), config.get("color_new")]
+    if lut is None:
+        key_colors.append(config.get("color_default_bg"))
+    else:
+        key_colors.append(lut["mid_color"])
+        key_colors.extend(lut["palette"])
+
+        colored = present & ~suspended & ~new
+        if field == "due":
+            values = np.maximum(columns["due"] - today, 0)
+            keys[colored & (queue != 2)] = _GRADIENT_KEY_MID
+            colored &= queue == 2
+        else:
+            values = columns[field].astype(np.int64)
+        # Mesmo cálculo de lut_color: arredondamento "half to even", como round()
+        indices = np.rint((values - lut["min"]) * lut["scale"])
+        indices = np.clip(indices, 0, len(lut["palette"]) - 1).astype(np.int64)
+        keys[colored] = indices[colored] + _GRADIENT_KEY_LUT_OFFSET
+
+    keys[present & new] = _GRADIENT_KEY_NEW
+    keys[present & suspended] = _GRADIENT_KEY_SUSPENDED
+    keys[~present] = _GRADIENT_KEY_DEFAULT
+    return keys, key_colors
+
+
+# Modo agrupado ("binned"): cada tile representa um grupo de cartões consecutivos
+# na ordenação atual. As estatísticas dos grupos são acumuladas em uma única
+# passada, lote a lote, sem manter o instantâneo de todos os cartões em memória.
+CATEGORY_COUNT = len(CATEGORY_COLOR_KEYS)
+
+
+def bin_size_for(card_count: int, target_tiles: int) -> int:
+    """Cartões por grupo para que `card_count` cartões caibam em até `target_tiles` tiles."""
+    return max(1, -(-card_count // max(1, target_tiles)))
+
+
+class BinAccumulator:
+    """Estatísticas por grupo de `bin_size` cartões consecutivos.
+
+    `add` recebe os instantâneos em ordem, cada um com a posição do seu primeiro
+    cartão na lista completa. Por grupo: contagem por categoria, vencidos hoje e,
+    com `gradient_field`, a soma e a quantidade dos valores do campo do gradiente
+    (mais os cartões que usam a cor do meio, no campo "due").
+    """
+
+    __slots__ = (
+        "bin_size", "bin_count", "gradient_field", "today",
+        "category_counts", "due_counts", "value_sums", "value_counts", "mid_counts", "ivl_min", "ivl_max",
+    )
+
+    def __init__(self, card_count: int, bin_size: int, gradient_field: str | None, today: int) -> None:
+        self.bin_size = bin_size
+        self.bin_count = -(-card_count // bin_size)
+        self.gradient_field = gradient_field
+        self.today = today
+        self.category_counts = [0] * (self.bin_count * CATEGORY_COUNT) # [grupo * CATEGORY_COUNT + categoria]
+        self.due_counts = [0] * self.bin_count
+        self.value_sums = [0.0] * self.bin_count
+        self.value_counts = [0] * self.bin_count
+        self.mid_counts = [0] * self.bin_count
+        self.ivl_min: int | None = None # Faixa de ivl dos cartões que usam o gradiente (escala dinâmica)
+        self.ivl_max: int | None = None
+
+    def add(self, start: int, snapshot: Any, use_numpy: bool = True) -> None:
+        """Acumula os cartões de `snapshot`, que ocupam as posições start, start + 1, ..."""
+        if use_numpy and HAS_NUMPY and len(snapshot):
+            self._add_numpy(start, snapshot)
+        else:
+            self._add_python(start, snapshot)
+
+    def _add_python(self, start: int, snapshot: Any) -> None:
+        field = self.gradient_field
+        today = self.today
+        present, card_types, queues, ivls = snapshot.present, snapshot.type, snapshot.queue, snapshot.ivl
+        for row in range(len(snapshot)):
+            bin_index = (start + row) // self.bin_size
+            self.category_counts[bin_index * CATEGORY_COUNT + classify_card(present[row], card_types[row], queues[row], ivls[row])] += 1
+            if is_due_today(snapshot, row, today):
+                self.due_counts[bin_index] += 1
+            if field is None or not present[row] or card_types[row] == 0 or queues[row] in (-1, -2, -3):
+                continue
+
+            ivl = ivls[row]
+            if self.ivl_min is None or ivl < self.ivl_min:
+                self.ivl_min = ivl
+            if self.ivl_max is None or ivl > self.ivl_max:
+                self.ivl_max = ivl
+            if field == "due":
+                if queues[row] != 2:
+                    self.mid_counts[bin_index] += 1
+                    continue
+                value = max(0, snapshot.due[row] - today)
+            else:
+                value = getattr(snapshot, field)[row]
+            self.value_sums[bin_index] += value
+            self.value_counts[bin_index] += 1
+
+    def _add_numpy(self, start: int, snapshot: Any) -> None:
+        columns = _numpy_columns(snapshot)
+        first_bin = start // self.bin_size
+        # Grupo de cada linha, relativo ao primeiro grupo do lote
+        bins = (np.arange(start, start + len(snapshot), dtype=np.int64) // self.bin_size) - first_bin
+        span = int(bins[-1]) + 1
+
+        category_counts = np.bincount(bins * CATEGORY_COUNT + _categories_numpy(columns), minlength=span * CATEGORY_COUNT)
+        offset = first_bin * CATEGORY_COUNT
+        for position, count in enumerate(category_counts.tolist()):
+            self.category_counts[offset + position] += count
+
+        queue = columns["queue"]
+        due_mask = columns["present"] & ((queue == 1) | (queue == 2) | (queue == 3)) & (columns["due"] <= self.today)
+        self._add_bin_values(self.due_counts, first_bin, np.bincount(bins[due_mask], minlength=span))
+
+        if self.gradient_field is None:
+            return
+        colored = _gradient_mask(columns)
+        if colored.any():
+            ivls = columns["ivl"][colored]
+            ivl_min, ivl_max = int(ivls.min()), int(ivls.max())
+            self.ivl_min = ivl_min if self.ivl_min is None else min(self.ivl_min, ivl_min)
+            self.ivl_max = ivl_max if self.ivl_max is None else max(self.ivl_max, ivl_max)
+        if self.gradient_field == "due":
+            values = np.maximum(columns["due"] - self.today, 0)
+            self._add_bin_values(self.mid_counts, first_bin, np.bincount(bins[colored & (queue != 2)], minlength=span))
+            colored &= queue == 2
+        else:
+            values = columns[self.gradient_field].astype(np.int64)
+        self._add_bin_values(self.value_counts, first_bin, np.bincount(bins[colored], minlength=span))
+        sums = np.bincount(bins[colored], weights=values[colored].astype(np.float64), minlength=span)
+        self._add_bin_values(self.value_sums, first_bin, sums)
+
+    @staticmethod
+    def _add_bin_values(target: list, first_bin: int, values: Any) -> None:
+        for position, value in enumerate(values.tolist()):
+            target[first_bin + position] += value
+
+    def bin_range(self, bin_index: int, card_count: int) -> tuple[int, int]:
+        """(primeira posição, posição final exclusiva) dos cartões do grupo."""
+        start = bin_index * self.bin_size
+        return start, min(card_count, start + self.bin_size)
+
+    def bin_categories(self, bin_index: int) -> list[int]:
+        """Contagem por categoria (índice CATEGORY_*) dos cartões do grupo."""
+        offset = bin_index * CATEGORY_COUNT
+        return self.category_counts[offset:offset + CATEGORY_COUNT]
+
+    def bin_mean(self, bin_index: int) -> float | None:
+        """Média do campo do gradiente no grupo, ou None se nenhum cartão do grupo tem valor."""
+        if not self.value_counts[bin_index]:
+            return None
+        return self.value_sums[bin_index] / self.value_counts[bin_index]
+
+    def ivl_range(self) -> tuple[int, int] | None:
+        """(min, max) de ivl dos cartões que usam o gradiente, como `ivl_range` do instantâneo."""
+        return None if self.ivl_min is None else (self.ivl_min, self.ivl_max)
+
+    def bin_color(self, bin_index: int, config: dict, view_mode: str, lut: dict | None, color_mode: str) -> str:
+        """Cor do tile do grupo.
+
+        Modo categórico: a cor da categoria mais frequente ("majority") ou a média das
+        cores ponderada pelas contagens ("blend"). Modo gradiente: a cor do valor médio
+        quando a maioria dos cartões do grupo usa o gradiente; senão, a cor fixa mais
+        frequente (novo, suspenso ou padrão).
+        """
+        categories = self.bin_categories(bin_index)
+        if view_mode == "gradient":
+            gradient_cards = self.value_counts[bin_index] + self.mid_counts[bin_index]
+            fixed_counts = (
+                (categories[CATEGORY_DEFAULT], "color_default_bg"),
+                (categories[CATEGORY_SUSPENDED], "color_suspended_buried"),
+                (categories[CATEGORY_NEW], "color_new"),
+            )
+            fixed_count, fixed_color_key = max(fixed_counts, key=lambda item: item[0])
+            if lut is not None and gradient_cards and gradient_cards >= fixed_count:
+                mean = self.bin_mean(bin_index)
+                return lut["mid_color"] if mean is None else lut_color(lut, mean)
+            return config.get(fixed_color_key)
+
+        if color_mode == "blend":
+            total = sum(categories)
+            mixed = [0.0, 0.0, 0.0]
+            for category, count in enumerate(categories):
+                if count:
+                    for channel, value in enumerate(hex_to_rgb(config.get(CATEGORY_COLOR_KEYS[category]))):
+                        mixed[channel] += value * count / total
+            return rgb_to_hex(tuple(int(round(channel)) for channel in mixed))
+        # Empate: vale a primeira categoria na ordem de CATEGORY_*
+        return config.get(CATEGORY_COLOR_KEYS[max(range(CATEGORY_COUNT), key=categories.__getitem__)])
+
+    def coloring(self, config: dict, view_mode: str, lut: dict | None, color_mode: str) -> dict:
+        """Cores dos tiles dos grupos, no mesmo formato de `compute_tile_coloring`."""
+        palette_index_by_color: dict[str, int] = {}
+        color_counts: dict[str, int] = {}
+        colors: list[int] = []
+        for bin_index in range(self.bin_count):
+            color = self.bin_color(bin_index, config, view_mode, lut, color_mode)
+            color_index = palette_index_by_color.get(color)
+            if color_index is None:
+                color_index = palette_index_by_color[color] = len(palette_index_by_color)
+                color_counts[color] = 0
+            color_counts[color] += 1
+            colors.append(color_index)
+        due_rows: list[int] = []
+        if config.get("show_due_indicator"):
+            due_rows = [bin_index for bin_index, count in enumerate(self.due_counts) if count]
+        return {"palette": list(palette_index_by_color), "colors": colors, "due": due_rows, "counts": color_counts}
@@ -0,0 +1,108 @@
+"""Formato binário compacto do modelo de tiles enviado à webview.
+
+Em vez de listas JSON (um cid de 13 dígitos por tile), os dados por tile vão
+em um único bloco binário codificado em base64, opcionalmente comprimido com
+zlib. O bloco tem três seções, nesta ordem:
+
+1. diferenças entre cids consecutivos (o primeiro cid vai no JSON), como
+   inteiros com sinal de 1, 2, 4 ou 8 bytes, a menor largura que comporta
+   todas as diferenças;
+2. índice de cor na paleta de cada tile, em 1 byte (até 256 cores) ou 2 bytes;
+3. bitset dos tiles com indicador de vencimento (bit `row % 8` do byte `row // 8`).
+
+Os inteiros são little-endian. O decodificador está em web/mosaic_payload.js.
+Este módulo não importa `aqt`.
+"""
+
+from __future__ import annotations
+
+import base64
+import sys
+import zlib
+from array import array
+from typing import Sequence
+
+PAYLOAD_FORMAT_VERSION = 1
+
+# Largura em bytes -> typecode do array com sinal correspondente
+_DELTA_TYPECODES = ((1, "b"), (2, "h"), (4, "i"), (8, "q"))
+
+
+def _little_endian_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pack_cid_deltas(cids: Sequence[int]) -> tuple[int, bytes]:
+    """(largura em bytes, diferenças entre cids consecutivos empacotadas)."""
+    deltas = [cids[i] - cids[i - 1] for i in range(1, len(cids))]
+    smallest = min(deltas, default=0)
+    largest = max(deltas, default=0)
+    for width, typecode in _DELTA_TYPECODES:
+        limit = 1 << (8 * width - 1)
+        if -limit <= smallest and largest < limit:
+            return width, _little_endian_bytes(array(typecode, deltas))
+    raise ValueError("Diferença entre cids fora do intervalo de 64 bits")
+
+
+def _pack_due_bitset(tile_count: int, due_rows: Sequence[int]) -> bytes:
+    bitset = bytearray((tile_count + 7) // 8)
+    for row in due_rows:
+        bitset[row >> 3] |= 1 << (row & 7)
+    return bytes(bitset)
+
+
+def encode_tile_payload(cids: Sequence[int], colors: Sequence[int], due_rows: Sequence[int], palette_size: int, compress: bool) -> dict:
+    """Codifica cids, índices de cor e indicadores de vencimento no formato compacto.
+
+    Retorna o dicionário que vai no JSON do modelo (campo "payload").
+    """
+    tile_count = len(cids)
+    delta_width, delta_bytes = _pack_cid_deltas(cids)
+    index_width = 1 if palette_size <= 256 else 2
+    color_bytes = _little_endian_bytes(array("B" if index_width == 1 else "H", colors))
+    data = b"".join((delta_bytes, color_bytes, _pack_due_bitset(tile_count, due_rows)))
+    if compress:
+        data = zlib.compress(data)
+    return {
+        "version": PAYLOAD_FORMAT_VERSION,
+        "count": tile_count,
+        "firstCid": cids[0] if tile_count else 0,
+        "deltaBytes": delta_width,
+        "indexBytes": index_width,
+        "compressed": compress,
+        "data": base64.b64encode(data).decode("ascii"),
+    }
+
+
+def decode_tile_payload(payload: dict) -> tuple[list[int], list[int], list[int]]:
+    """Inverso de `encode_tile_payload`: (cids, índices de cor, linhas com vencimento).
+
+    Usado para verificar o formato; a página usa o decodificador em JS.
+    """
+    data = base64.b64decode(payload["data"])
+    if payload["compressed"]:
+        data = zlib.decompress(data)
+    tile_count = payload["count"]
+    if not tile_count:
+        return [], [], []
+
+    offset = 0
+    deltas = array(dict(_DELTA_TYPECODES)[payload["deltaBytes"]])
+    deltas.frombytes(data[offset:offset + payload["deltaBytes"] * (tile_count - 1)])
+    offset += payload["deltaBytes"] * (tile_count - 1)
+    colors = array("B" if payload["indexBytes"] == 1 else "H")
+    colors.frombytes(data[offset:offset + payload["indexBytes"] * tile_count])
+    offset += payload["indexBytes"] * tile_count
+    if sys.byteorder == "big":
+        deltas.byteswap()
+        colors.byteswap()
+
+    cids = [payload["firstCid"]]
+    for delta in deltas:
+        cids.append(cids[-1] + delta)
+    bitset = data[offset:]
+    due_rows = [row for row in range(tile_count) if bitset[row >> 3] & (1 << (row & 7))]
+    return cids, colors.tolist(), due_rows
@@ -34,6 +34,11 @@ translations = {
         "all_decks": "Todos os cartões da coleção",
         "filter_subdecks": "incluindo subdecks",
         "showing": "Exibindo",
+        "filter_state": "Estado",
+        "filter_tag": "Tag",
+        "filter_all": "Todos",
+        "filter_from_config": "Do config",
+        "filter_criteria": "Critérios: {search}",
         
         # Tooltips
         "tooltip_card_id": "ID do Cartão: {cid}",
@@ -61,6 +66,9 @@ translations = {
         "sort_by_interval_asc": "Intervalo (Cresc.)",
         "sort_by_interval_desc": "Intervalo (Decresc.)",
         "sort_by_due_date": "Vencimento",
+        "sort_by_failure_rate": "Taxa de Erros",
+        "sort_by_lapses": "Lapsos",
+        "sort_by_recent_failures": "Erros Recentes",
         
         # Visualização - Novos
         "view_mode": "Modo de Visualização",
@@ -93,6 +101,43 @@ translations = {
         "cards_shown_of_total": "{count_shown} de {count_total} cartões",
         "pagination_show_more": "Mostrar mais {count}",
         "pagination_show_all": "Mostrar Todos ({count})",
+
+        # Modo agrupado
+        "binning_mode": "Tiles",
+        "binning_auto": "Automático",
+        "binning_off": "Um por cartão",
+        "binning_on": "Agrupados",
+        "binned_footer": "Cada tile agrupa {size} cartões consecutivos na ordenação atual ({tiles} tiles). Clique em um tile para ver os seus cartões.",
+        "bin_tooltip_range": "Cartões {first} a {last} de {total}",
+        "bin_tooltip_mean": "Média: {value}",
+        "bin_tooltip_click": "Clique para ver os cartões do grupo",
+        "bin_drilldown_footer": "Grupo: cartões {first} a {last} na ordenação atual",
+        "bin_drilldown_back": "Voltar aos grupos",
+
+        # Painel de medições
+        "profile_overlay_title": "Memory Mosaic - últimas renderizações (ms)",
+        "profile_overlay_cache": "Cache de grades: {hits} acertos, {misses} falhas ({rate:.0%}), {entries} entradas",
+
+        # Exportação
+        "export_button": "Exportar imagem",
+        "export_dialog_title": "Exportar o mosaico",
+        "export_progress": "Exportando o mosaico...",
+        "export_done": "Mosaico exportado: {count} cartões em {path}",
+        "export_error": "Erro ao exportar o mosaico: {error}",
+
+        # Linha do tempo
+        "timelapse_button": "Linha do tempo",
+        "timelapse_loading": "Lendo o histórico de revisões...",
+        "timelapse_play": "Reproduzir",
+        "timelapse_pause": "Pausar",
+        "timelapse_close": "Voltar a hoje",
+
+        # Seções
+        "sections_mode": "Seções",
+        "sections_none": "Grade única",
+        "sections_deck": "Por deck",
+        "sections_tag": "Por tag",
+        "sections_untagged": "(sem tag)",
     },
     "en": {
         # Titles and headers
@@ -112,6 +157,11 @@ translations = {
         "all_decks": "All cards in collection",
         "filter_subdecks": "including subdecks",
         "showing": "Showing",
+        "filter_state": "State",
+        "filter_tag": "Tag",
+        "filter_all": "All",
+        "filter_from_config": "From config",
+        "filter_criteria": "Criteria: {search}",
         
         # Tooltips
         "tooltip_card_id": "Card ID: {cid}",
@@ -139,6 +189,9 @@ translations = {
         "sort_by_interval_asc": "Interval (Asc.)",
         "sort_by_interval_desc": "Interval (Desc.)",
         "sort_by_due_date": "Due Date",
+        "sort_by_failure_rate": "Failure Rate",
+        "sort_by_lapses": "Lapses",
+        "sort_by_recent_failures": "Recent Failures",
         
         # Visualization - New
         "view_mode": "View Mode",
@@ -171,11 +224,85 @@ translations = {
         "cards_shown_of_total": "{count_shown} of {count_total} cards",
         "pagination_show_more": "Show {count} more",
         "pagination_show_all": "Show All ({count})",
+
+        # Binned mode
+        "binning_mode": "Tiles",
+        "binning_auto": "Automatic",
+        "binning_off": "One per card",
+        "binning_on": "Grouped",
+        "binned_footer": "Each tile groups {size} consecutive cards in the current order ({tiles} tiles). Click a tile to see its cards.",
+        "bin_tooltip_range": "Cards {first} to {last} of {total}",
+        "bin_tooltip_mean": "Mean: {value}",
+        "bin_tooltip_click": "Click to see the cards in this group",
+        "bin_drilldown_footer": "Group: cards {first} to {last} in the current order",
+        "bin_drilldown_back": "Back to groups",
+
+        # Profiling panel
+        "profile_overlay_title": "Memory Mosaic - latest renders (ms)",
+        "profile_overlay_cache": "Grid cache: {hits} hits, {misses} misses ({rate:.0%}), {entries} entries",
+
+        # Export
+        "export_button": "Export image",
+        "export_dialog_title": "Export the mosaic",
+        "export_progress": "Exporting the mosaic...",
+        "export_done": "Mosaic exported: {count} cards to {path}",
+        "export_error": "Error exporting the mosaic: {error}",
+
+        # Time-lapse
+        "timelapse_button": "Time-lapse",
+        "timelapse_loading": "Reading the review history...",
+        "timelapse_play": "Play",
+        "timelapse_pause": "Pause",
+        "timelapse_close": "Back to today",
+
+        # Sections
+        "sections_mode": "Sections",
+        "sections_none": "Single grid",
+        "sections_deck": "By deck",
+        "sections_tag": "By tag",
+        "sections_untagged": "(untagged)",
     }
 }
 
+# Catálogo do idioma ativo. O idioma é resolvido uma vez (por renderização, via
+# refresh_language(), ou na primeira tradução após invalidate_language()) em vez
+# de consultar mw.pm.meta a cada chamada de tr().
+_active_language = None
+_active_catalog = translations["en"]
+# Chave -> str.format já ligado ao modelo do idioma ativo
+_formatter_cache = {}
+
+def refresh_language():
+    """Relê o idioma do Anki e descarta os formatadores compilados se ele mudou."""
+    global _active_language, _active_catalog
+    lang = get_language()
+    if lang != _active_language:
+        _active_language = lang
+        _active_catalog = translations.get(lang, translations["en"])
+        _formatter_cache.clear()
+    return lang
+
+def invalidate_language():
+    """Força a releitura do idioma na próxima tradução (ex.: troca de perfil)."""
+    global _active_language
+    _active_language = None
+    _formatter_cache.clear()
+
+def formatter(key):
+    """Retorna o formatador da chave no idioma ativo, para laços que traduzem muitas vezes.
+
+    O resultado é o `str.format` do modelo: `formatter("tooltip_due")(due=10)`.
+    """
+    fmt = _formatter_cache.get(key)
+    if fmt is None:
+        if _active_language is None:
+            refresh_language()
+        fmt = _formatter_cache[key] = _active_catalog.get(key, key).format
+    return fmt
+
 def tr(key, **kwargs):
     """Traduz uma chave para o idioma atual com substituição de parâmetros opcional."""
-    lang = get_language()
-    text = translations.get(lang, translations["en"]).get(key, key)
-    return text.format(**kwargs) if kwargs else text 
\ No newline at end of file
+    if _active_language is None:
+        refresh_language()
+    text = _active_catalog.get(key, key)
+    return text.format(**kwargs) if kwargs else text
@@ -0,0 +1,300 @@
+/*
+ * Memory Mosaic - renderizador em <canvas>.
+ *
+ * Desenha a grade inteira em um único <canvas> a partir de um array compacto
+ * de índices de cor (um por tile) e de uma paleta. Apenas as linhas visíveis
+ * na área de rolagem são desenhadas; o canvas fica "grudado" (sticky) no topo
+ * do container e um espaçador dá a altura total da grade. O tamanho dos tiles
+ * é reajustado à largura do container (ver mosaic_fit.js).
+ * As coordenadas do mouse são convertidas de volta em cid (hit-testing) para
+ * o hover (tooltip sob demanda, ver mosaic_tooltip.js) e para o clique
+ * (onMemoryMosaicTileClick, que abre o cartão ou, no modo agrupado, o grupo).
+ * Cada container tem o seu renderizador (create): a grade principal (init) e,
+ * na visualização em seções, cada seção aberta (ver mosaic_sections.js).
+ */
+var MemoryMosaicCanvas = (function () {
+    "use strict";
+
+    var main = null; // Renderizador da grade principal (#memorymosaic-grid-container)
+
+    // Cria o renderizador de `model` em `container`, que deve conter o canvas e o espaçador
+    function create(container, model) {
+        var canvas = container.querySelector("canvas.memorymosaic-canvas");
+        var spacer = container.querySelector(".memorymosaic-canvas-spacer");
+        if (!canvas || !spacer) {
+            return null;
+        }
+
+        var dueFlags = new Uint8Array(model.cids.length);
+        for (var i = 0; i < model.due.length; i++) {
+            dueFlags[model.due[i]] = 1;
+        }
+
+        var state = {
+            model: model,
+            container: container,
+            canvas: canvas,
+            spacer: spacer,
+            ctx: canvas.getContext("2d"),
+            dueFlags: dueFlags,
+            cols: 1,
+            rows: 0,
+            pitch: 1,
+            offsetX: 0,
+            hoverIndex: -1,
+            indexByCid: null,
+            drawPending: false
+        };
+
+        function tileSpan() {
+            var m = state.model;
+            return m.tileSize + 2 * m.border;
+        }
+
+        function layout() {
+            var m = state.model;
+            MemoryMosaicFit.refit(m, state.container);
+            var span = tileSpan();
+            var pitch = span + m.gap;
+            var innerWidth = Math.max(span, state.container.clientWidth - 2 * m.padding);
+            var cols = Math.max(1, Math.floor((innerWidth + m.gap) / pitch));
+            var rows = Math.ceil(m.cids.length / cols);
+            var gridWidth = cols * pitch - m.gap;
+            var contentHeight = Math.max(0, rows * pitch - m.gap) + 2 * m.padding;
+            var viewHeight = Math.min(m.maxHeight, contentHeight);
+
+            state.cols = cols;
+            state.rows = rows;
+            state.pitch = pitch;
+            state.offsetX = m.padding + Math.max(0, Math.floor((innerWidth - gridWidth) / 2));
+
+            var cssWidth = state.container.clientWidth;
+            var dpr = window.devicePixelRatio || 1;
+            state.container.style.height = viewHeight + "px";
+            state.canvas.style.width = cssWidth + "px";
+            state.canvas.style.height = viewHeight + "px";
+            state.canvas.width = Math.round(cssWidth * dpr);
+            state.canvas.height = Math.round(viewHeight * dpr);
+            state.ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+            state.spacer.style.height = Math.max(0, contentHeight - viewHeight) + "px";
+            scheduleDraw();
+        }
+
+        function scheduleDraw() {
+            if (state.drawPending) {
+                return;
+            }
+            state.drawPending = true;
+            window.requestAnimationFrame(function () {
+                state.drawPending = false;
+                draw();
+            });
+        }
+
+        function draw() {
+            var m = state.model;
+            var ctx = state.ctx;
+            var viewHeight = parseFloat(state.canvas.style.height) || 0;
+            var scrollTop = state.container.scrollTop;
+            var span = tileSpan();
+            var pitch = state.pitch;
+            var total = m.cids.length;
+            var dueSize = m.dueSize;
+            var dueOffset = m.border + (m.tileSize - dueSize) / 2;
+
+            ctx.clearRect(0, 0, state.canvas.width, viewHeight);
+
+            var firstRow = Math.max(0, Math.floor((scrollTop - m.padding) / pitch));
+            var lastRow = Math.min(state.rows - 1, Math.floor((scrollTop + viewHeight - m.padding) / pitch));
+
+            for (var row = firstRow; row <= lastRow; row++) {
+                var y = m.padding + row * pitch - scrollTop;
+                var start = row * state.cols;
+                var end = Math.min(total, start + state.cols);
+                for (var index = start; index < end; index++) {
+                    var x = state.offsetX + (index - start) * pitch;
+                    ctx.fillStyle = m.borderColor;
+                    ctx.fillRect(x, y, span, span);
+                    ctx.fillStyle = m.palette[m.colors[index]];
+                    ctx.fillRect(x + m.border, y + m.border, m.tileSize, m.tileSize);
+                    if (state.dueFlags[index]) {
+                        ctx.fillStyle = m.dueColor;
+                        ctx.beginPath();
+                        ctx.arc(x + dueOffset + dueSize / 2, y + dueOffset + dueSize / 2, dueSize / 2, 0, 2 * Math.PI);
+                        ctx.fill();
+                    }
+                }
+            }
+
+            if (state.hoverIndex >= 0) {
+                var hoverRow = Math.floor(state.hoverIndex / state.cols);
+                var hoverX = state.offsetX + (state.hoverIndex - hoverRow * state.cols) * pitch;
+                var hoverY = m.padding + hoverRow * pitch - scrollTop;
+                ctx.strokeStyle = m.hoverColor;
+                ctx.lineWidth = 1;
+                ctx.strokeRect(hoverX + 0.5, hoverY + 0.5, span - 1, span - 1);
+            }
+        }
+
+        // Converte coordenadas do mouse (relativas ao canvas) no índice do tile, ou -1
+        function hitTest(clientX, clientY) {
+            var m = state.model;
+            var rect = state.canvas.getBoundingClientRect();
+            var x = clientX - rect.left - state.offsetX;
+            var y = clientY - rect.top + state.container.scrollTop - m.padding;
+            if (x < 0 || y < 0) {
+                return -1;
+            }
+            var col = Math.floor(x / state.pitch);
+            var row = Math.floor(y / state.pitch);
+            // Pontos no espaçamento (gap) entre tiles não pertencem a nenhum cartão
+            if (col >= state.cols || x - col * state.pitch >= tileSpan() || y - row * state.pitch >= tileSpan()) {
+                return -1;
+            }
+            var index = row * state.cols + col;
+            return index < m.cids.length ? index : -1;
+        }
+
+        function cidAt(event) {
+            var index = hitTest(event.clientX, event.clientY);
+            return index >= 0 ? state.model.cids[index] : null;
+        }
+
+        function onMouseMove(event) {
+            var index = hitTest(event.clientX, event.clientY);
+            if (index >= 0) {
+                MemoryMosaicTooltip.show(state.model.cids[index], event.clientX, event.clientY);
+            } else {
+                MemoryMosaicTooltip.hide();
+            }
+            if (index === state.hoverIndex) {
+                return;
+            }
+            state.hoverIndex = index;
+            state.canvas.style.cursor = index >= 0 ? "pointer" : "default";
+            scheduleDraw();
+        }
+
+        function onMouseLeave() {
+            state.hoverIndex = -1;
+            MemoryMosaicTooltip.hide();
+            scheduleDraw();
+        }
+
+        function onClick(event) {
+            var cid = cidAt(event);
+            if (cid !== null) {
+                onMemoryMosaicTileClick(cid); // Cartão ou, no modo agrupado, grupo de cartões
+            }
+        }
+
+        function paletteIndexOf(color) {
+            var palette = state.model.palette;
+            var paletteIndex = palette.indexOf(color);
+            if (paletteIndex < 0) {
+                palette.push(color);
+                paletteIndex = palette.length - 1;
+            }
+            return paletteIndex;
+        }
+
+        // Atualiza tiles já desenhados. `updates` = [[cid, cor, vencidoHoje], ...]
+        function updateTiles(updates) {
+            var m = state.model;
+            if (!state.indexByCid) {
+                state.indexByCid = new Map();
+                for (var i = 0; i < m.cids.length; i++) {
+                    state.indexByCid.set(m.cids[i], i);
+                }
+            }
+            for (var u = 0; u < updates.length; u++) {
+                var index = state.indexByCid.get(updates[u][0]);
+                if (index === undefined) {
+                    continue;
+                }
+                m.colors[index] = paletteIndexOf(updates[u][1]);
+                state.dueFlags[index] = updates[u][2] ? 1 : 0;
+            }
+            scheduleDraw();
+        }
+
+        // Acrescenta tiles ao final da grade (carregamento progressivo)
+        function appendTiles(tiles) {
+            var m = state.model;
+            var previousCount = m.cids.length;
+            var dueFlags = new Uint8Array(previousCount + tiles.length);
+            dueFlags.set(state.dueFlags);
+            for (var i = 0; i < tiles.length; i++) {
+                m.cids.push(tiles[i][0]);
+                m.colors.push(paletteIndexOf(tiles[i][1]));
+                dueFlags[previousCount + i] = tiles[i][2] ? 1 : 0;
+            }
+            state.dueFlags = dueFlags;
+            state.indexByCid = null;
+            layout();
+        }
+
+        function isActive() {
+            return document.body.contains(state.canvas);
+        }
+
+        layout();
+        container.addEventListener("scroll", scheduleDraw, { passive: true });
+        canvas.addEventListener("mousemove", onMouseMove);
+        canvas.addEventListener("mouseleave", onMouseLeave);
+        canvas.addEventListener("click", onClick);
+        MemoryMosaicFit.observeWidth(container, layout);
+
+        return {
+            layout: layout,
+            cidAt: cidAt,
+            updateTiles: updateTiles,
+            appendTiles: appendTiles,
+            isActive: isActive
+        };
+    }
+
+    function init(model) {
+        var container = document.getElementById("memorymosaic-grid-container");
+        if (!container) {
+            return;
+        }
+        main = create(container, model);
+    }
+
+    function layout() {
+        if (main) {
+            main.layout();
+        }
+    }
+
+    function cidAt(event) {
+        return main ? main.cidAt(event) : null;
+    }
+
+    function updateTiles(updates) {
+        if (main) {
+            main.updateTiles(updates);
+        }
+    }
+
+    function appendTiles(tiles) {
+        if (main) {
+            main.appendTiles(tiles);
+        }
+    }
+
+    function isActive() {
+        return main !== null && main.isActive();
+    }
+
+    return {
+        init: init,
+        create: create,
+        layout: layout,
+        cidAt: cidAt,
+        updateTiles: updateTiles,
+        appendTiles: appendTiles,
+        isActive: isActive
+    };
+})();
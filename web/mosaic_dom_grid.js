@@ -0,0 +1,251 @@
+/*
+ * Memory Mosaic - grade DOM virtualizada.
+ *
+ * O modelo completo dos tiles (cids, índices de cor na paleta e indicadores
+ * de vencimento) fica em arrays JS compactos. Apenas as linhas que cruzam a
+ * área visível do container (mais uma margem de OVERSCAN_ROWS) existem como
+ * elementos; ao rolar, as linhas que saem da vista são reaproveitadas para as
+ * que entram. O custo de memória e de layout no webview fica constante,
+ * independentemente do tamanho da coleção.
+ * Os tiles mantêm a classe "memorymosaic-tile" e o atributo data-cid, então
+ * os eventos delegados de mosaic_tooltip.js continuam funcionando. O tamanho
+ * dos tiles é reajustado à largura do container (ver mosaic_fit.js).
+ */
+var MemoryMosaicDomGrid = (function () {
+    "use strict";
+
+    var OVERSCAN_ROWS = 4;
+
+    var state = null;
+
+    function init(model) {
+        var container = document.getElementById("memorymosaic-grid-container");
+        if (!container) {
+            return;
+        }
+        var sizer = container.querySelector(".memorymosaic-dom-sizer");
+        if (!sizer) {
+            return;
+        }
+
+        var dueFlags = new Uint8Array(model.cids.length);
+        for (var i = 0; i < model.due.length; i++) {
+            dueFlags[model.due[i]] = 1;
+        }
+
+        state = {
+            model: model,
+            container: container,
+            sizer: sizer,
+            dueFlags: dueFlags,
+            cols: 1,
+            rows: 0,
+            pitch: 1,
+            offsetX: 0,
+            activeRows: new Map(), // índice da linha -> elemento
+            rowPool: [],
+            builtTileSize: model.tileSize, // tamanho dos elementos de tile já criados
+            indexByCid: null,
+            renderPending: false
+        };
+
+        layout();
+        container.addEventListener("scroll", scheduleRender, { passive: true });
+        MemoryMosaicFit.observeWidth(container, layout);
+    }
+
+    function tileSpan() {
+        var m = state.model;
+        return m.tileSize + 2 * m.border;
+    }
+
+    function layout() {
+        if (!state) {
+            return;
+        }
+        var m = state.model;
+        MemoryMosaicFit.refit(m, state.container);
+        var span = tileSpan();
+        var pitch = span + m.gap;
+        var innerWidth = Math.max(span, state.container.clientWidth - 2 * m.padding);
+        var cols = Math.max(1, Math.floor((innerWidth + m.gap) / pitch));
+        var rows = Math.ceil(m.cids.length / cols);
+        var gridWidth = cols * pitch - m.gap;
+        var contentHeight = Math.max(0, rows * pitch - m.gap) + 2 * m.padding;
+
+        state.cols = cols;
+        state.rows = rows;
+        state.pitch = pitch;
+        state.offsetX = m.padding + Math.max(0, Math.floor((innerWidth - gridWidth) / 2));
+        state.container.style.height = Math.min(m.maxHeight, contentHeight) + "px";
+        state.sizer.style.height = contentHeight + "px";
+
+        // Colunas ou posições podem ter mudado: todas as linhas são preenchidas de novo
+        state.activeRows.forEach(releaseRow);
+        state.activeRows.clear();
+        if (state.builtTileSize !== m.tileSize) {
+            // Tiles com o tamanho antigo não são reaproveitados
+            state.rowPool = [];
+            state.builtTileSize = m.tileSize;
+        }
+        render();
+    }
+
+    function scheduleRender() {
+        if (!state || state.renderPending) {
+            return;
+        }
+        state.renderPending = true;
+        window.requestAnimationFrame(function () {
+            state.renderPending = false;
+            render();
+        });
+    }
+
+    function render() {
+        var m = state.model;
+        var scrollTop = state.container.scrollTop;
+        var viewHeight = state.container.clientHeight;
+        var firstRow = Math.max(0, Math.floor((scrollTop - m.padding) / state.pitch) - OVERSCAN_ROWS);
+        var lastRow = Math.min(state.rows - 1, Math.floor((scrollTop + viewHeight - m.padding) / state.pitch) + OVERSCAN_ROWS);
+
+        state.activeRows.forEach(function (element, row) {
+            if (row < firstRow || row > lastRow) {
+                releaseRow(element);
+                state.activeRows.delete(row);
+            }
+        });
+        for (var row = firstRow; row <= lastRow; row++) {
+            if (!state.activeRows.has(row)) {
+                var element = acquireRow();
+                fillRow(element, row);
+                state.activeRows.set(row, element);
+            }
+        }
+    }
+
+    function acquireRow() {
+        var element = state.rowPool.pop();
+        if (!element) {
+            element = document.createElement("div");
+            element.style.cssText = "position: absolute; display: flex; gap: " + state.model.gap + "px;";
+        }
+        state.sizer.appendChild(element);
+        return element;
+    }
+
+    function releaseRow(element) {
+        state.sizer.removeChild(element);
+        state.rowPool.push(element);
+    }
+
+    function createTile() {
+        var m = state.model;
+        var tile = document.createElement("div");
+        tile.className = "memorymosaic-tile";
+        tile.style.cssText =
+            "position: relative; flex: none; width: " + m.tileSize + "px; height: " + m.tileSize + "px; " +
+            "border: " + m.border + "px solid " + m.borderColor + ";";
+        return tile;
+    }
+
+    function fillRow(element, row) {
+        var m = state.model;
+        var start = row * state.cols;
+        var count = Math.min(state.cols, m.cids.length - start);
+        while (element.childElementCount < count) {
+            element.appendChild(createTile());
+        }
+        while (element.childElementCount > count) {
+            element.removeChild(element.lastElementChild);
+        }
+        element.style.top = (m.padding + row * state.pitch) + "px";
+        element.style.left = state.offsetX + "px";
+        var tile = element.firstElementChild;
+        for (var index = start; index < start + count; index++) {
+            fillTile(tile, index);
+            tile = tile.nextElementSibling;
+        }
+    }
+
+    function fillTile(tile, index) {
+        var m = state.model;
+        tile.dataset.cid = m.cids[index];
+        tile.style.backgroundColor = m.palette[m.colors[index]];
+        var indicator = tile.firstElementChild;
+        if (state.dueFlags[index] && !indicator) {
+            indicator = document.createElement("div");
+            indicator.style.cssText =
+                "position: absolute; top: 50%; left: 50%; width: " + m.dueSize + "px; height: " + m.dueSize + "px; " +
+                "background-color: " + m.dueColor + "; border-radius: 50%; transform: translate(-50%, -50%); pointer-events: none;";
+            tile.appendChild(indicator);
+        } else if (!state.dueFlags[index] && indicator) {
+            tile.removeChild(indicator);
+        }
+    }
+
+    function paletteIndexOf(color) {
+        var palette = state.model.palette;
+        var paletteIndex = palette.indexOf(color);
+        if (paletteIndex < 0) {
+            palette.push(color);
+            paletteIndex = palette.length - 1;
+        }
+        return paletteIndex;
+    }
+
+    // Atualiza tiles do modelo. `updates` = [[cid, cor, vencidoHoje], ...]
+    function updateTiles(updates) {
+        if (!state) {
+            return;
+        }
+        var m = state.model;
+        if (!state.indexByCid) {
+            state.indexByCid = new Map();
+            for (var i = 0; i < m.cids.length; i++) {
+                state.indexByCid.set(m.cids[i], i);
+            }
+        }
+        for (var u = 0; u < updates.length; u++) {
+            var index = state.indexByCid.get(updates[u][0]);
+            if (index === undefined) {
+                continue;
+            }
+            m.colors[index] = paletteIndexOf(updates[u][1]);
+            state.dueFlags[index] = updates[u][2] ? 1 : 0;
+        }
+        // Só as linhas materializadas precisam ser redesenhadas; as demais leem o modelo ao entrar na vista
+        state.activeRows.forEach(fillRow);
+    }
+
+    // Acrescenta tiles ao final da grade (carregamento progressivo)
+    function appendTiles(tiles) {
+        if (!state) {
+            return;
+        }
+        var m = state.model;
+        var previousCount = m.cids.length;
+        var dueFlags = new Uint8Array(previousCount + tiles.length);
+        dueFlags.set(state.dueFlags);
+        for (var i = 0; i < tiles.length; i++) {
+            m.cids.push(tiles[i][0]);
+            m.colors.push(paletteIndexOf(tiles[i][1]));
+            dueFlags[previousCount + i] = tiles[i][2] ? 1 : 0;
+        }
+        state.dueFlags = dueFlags;
+        state.indexByCid = null;
+        layout();
+    }
+
+    function isActive() {
+        return state !== null && document.body.contains(state.sizer);
+    }
+
+    return {
+        init: init,
+        layout: layout,
+        updateTiles: updateTiles,
+        appendTiles: appendTiles,
+        isActive: isActive
+    };
+})();
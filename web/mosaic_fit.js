@@ -0,0 +1,81 @@
+/*
+ * Memory Mosaic - ajuste do tamanho dos tiles à área disponível.
+ *
+ * Mesmo algoritmo de grid_layout.py (solve_tile_size): busca binária pelo
+ * maior tamanho de tile, entre o mínimo e o padrão do config, com o qual todos
+ * os tiles cabem. A página refaz o cálculo quando a largura do container muda
+ * (ResizeObserver), sem uma nova renderização no Python.
+ */
+var MemoryMosaicFit = (function () {
+    "use strict";
+
+    function gridFits(tileCount, tileSize, availWidth, availHeight, border, gap) {
+        var pitch = tileSize + 2 * border + gap;
+        if (pitch <= 0) {
+            return false;
+        }
+        var cols = Math.floor((availWidth + gap) / pitch);
+        if (cols <= 0) {
+            return false;
+        }
+        var rows = Math.ceil(tileCount / cols);
+        return rows * pitch - gap <= availHeight;
+    }
+
+    function solveTileSize(tileCount, availWidth, availHeight, minSize, maxSize, border, gap) {
+        if (tileCount <= 0) {
+            return Math.max(minSize, maxSize);
+        }
+        if (maxSize <= minSize || !gridFits(tileCount, minSize, availWidth, availHeight, border, gap)) {
+            return minSize;
+        }
+        var low = minSize;
+        var high = maxSize;
+        while (low < high) {
+            var middle = Math.floor((low + high + 1) / 2);
+            if (gridFits(tileCount, middle, availWidth, availHeight, border, gap)) {
+                low = middle;
+            } else {
+                high = middle - 1;
+            }
+        }
+        return low;
+    }
+
+    // Ajusta model.tileSize/dueSize à largura atual do container; retorna true se mudou
+    function refit(model, container) {
+        var fit = model.fit;
+        if (!fit) {
+            return false;
+        }
+        var availWidth = container.clientWidth - 2 * model.padding - fit.widthMargin;
+        var tileSize = solveTileSize(model.cids.length, availWidth, fit.height, fit.minSize, fit.maxSize, model.border, model.gap);
+        if (tileSize === model.tileSize) {
+            return false;
+        }
+        model.tileSize = tileSize;
+        model.dueSize = fit.dueRatio === null ? 1 : Math.max(1, Math.floor(tileSize * fit.dueRatio));
+        return true;
+    }
+
+    // Chama `callback` quando a largura de `element` muda (ou a janela, sem ResizeObserver)
+    function observeWidth(element, callback) {
+        if (typeof ResizeObserver === "undefined") {
+            window.addEventListener("resize", callback);
+            return;
+        }
+        var lastWidth = element.clientWidth;
+        new ResizeObserver(function () {
+            if (element.clientWidth !== lastWidth) {
+                lastWidth = element.clientWidth;
+                callback();
+            }
+        }).observe(element);
+    }
+
+    return {
+        solveTileSize: solveTileSize,
+        refit: refit,
+        observeWidth: observeWidth
+    };
+})();
@@ -0,0 +1,33 @@
+/*
+ * Memory Mosaic - injeção da grade calculada em segundo plano.
+ *
+ * A página é exibida primeiro com um placeholder (#memorymosaic-root), e o
+ * Python injeta o HTML da grade quando o cálculo termina. Cada placeholder tem
+ * uma "geração"; resultados de gerações antigas (página já trocada, ordenação
+ * ou modo alterados) são ignorados.
+ */
+var MemoryMosaicInject = (function () {
+    "use strict";
+
+    function fill(generation, html) {
+        var root = document.getElementById("memorymosaic-root");
+        if (!root || root.dataset.generation !== String(generation)) {
+            return false;
+        }
+        root.innerHTML = html;
+        // Scripts inseridos via innerHTML não são executados: recria cada um, na ordem
+        var scripts = root.querySelectorAll("script");
+        for (var i = 0; i < scripts.length; i++) {
+            var original = scripts[i];
+            var replacement = document.createElement("script");
+            replacement.text = original.text;
+            original.parentNode.replaceChild(replacement, original);
+        }
+        document.body.style.cursor = "default";
+        return true;
+    }
+
+    return {
+        fill: fill
+    };
+})();
@@ -0,0 +1,47 @@
+/*
+ * Memory Mosaic - atualização incremental dos tiles.
+ *
+ * Ao voltar da revisão, o Python envia (via web.eval) apenas os cartões que
+ * mudaram: nova cor, indicador de vencimento e as contagens do sumário
+ * (por cor e vencidos hoje; na visualização em seções, também os mini-sumários
+ * das seções).
+ * O patch é aplicado na página existente, sem reconstruir a grade.
+ */
+var MemoryMosaicLive = (function () {
+    "use strict";
+
+    // patch = {tiles: [[cid, cor, vencidoHoje], ...], counts: {cor: n}, dueCount: n, sections: [[índice, contagens, vencidos], ...]}
+    function applyPatch(patch) {
+        if (typeof MemoryMosaicSections !== "undefined" && MemoryMosaicSections.isActive()) {
+            // Visualização em seções: tiles das seções abertas e mini-sumários (patch.sections)
+            MemoryMosaicSections.applyPatch(patch);
+        } else if (!document.getElementById("memorymosaic-grid-container")) {
+            return;
+        } else {
+            // A grade pode ainda estar sendo decodificada (ver mosaic_payload.js)
+            MemoryMosaicPayload.afterLoad(function () {
+                if (typeof MemoryMosaicCanvas !== "undefined" && MemoryMosaicCanvas.isActive()) {
+                    MemoryMosaicCanvas.updateTiles(patch.tiles);
+                } else if (typeof MemoryMosaicDomGrid !== "undefined" && MemoryMosaicDomGrid.isActive()) {
+                    MemoryMosaicDomGrid.updateTiles(patch.tiles);
+                }
+            });
+        }
+
+        var countElements = document.querySelectorAll(".memorymosaic-summary-count");
+        for (var c = 0; c < countElements.length; c++) {
+            var color = countElements[c].dataset.color;
+            if (Object.prototype.hasOwnProperty.call(patch.counts, color)) {
+                countElements[c].textContent = patch.counts[color];
+            }
+        }
+        var dueCountElement = document.getElementById("memorymosaic-due-count");
+        if (dueCountElement) {
+            dueCountElement.textContent = patch.dueCount;
+        }
+    }
+
+    return {
+        applyPatch: applyPatch
+    };
+})();
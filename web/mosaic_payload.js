@@ -0,0 +1,113 @@
+/*
+ * Memory Mosaic - decodificador do formato binário compacto dos tiles.
+ *
+ * O Python (tile_payload.py) envia cids, índices de cor e indicadores de
+ * vencimento em um bloco base64, opcionalmente comprimido com zlib. Aqui o
+ * bloco é convertido de volta nos arrays do modelo (cids, colors, due) usados
+ * pelos renderizadores. A descompressão usa DecompressionStream("deflate"),
+ * que é assíncrono; atualizações que chegam antes do fim da carga esperam
+ * por ela (afterLoad). As seções (mosaic_sections.js) usam só decode, sem
+ * passar pela carga da grade principal.
+ */
+var MemoryMosaicPayload = (function () {
+    "use strict";
+
+    var DELTA_ARRAY_TYPES = { 1: Int8Array, 2: Int16Array, 4: Int32Array, 8: BigInt64Array };
+
+    var loaded = false;
+    var pendingCallbacks = [];
+
+    function base64ToBytes(text) {
+        var binary = atob(text);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return bytes;
+    }
+
+    function inflate(bytes) {
+        var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+        return new Response(stream).arrayBuffer().then(function (buffer) {
+            return new Uint8Array(buffer);
+        });
+    }
+
+    // slice() copia a seção para um buffer próprio, alinhado ao tamanho do elemento
+    function section(bytes, offset, length, ArrayType) {
+        return new ArrayType(bytes.slice(offset, offset + length * ArrayType.BYTES_PER_ELEMENT).buffer);
+    }
+
+    function unpack(payload, bytes) {
+        var count = payload.count;
+        var cids = new Array(count);
+        var colors = new Array(count);
+        var due = [];
+        if (count === 0) {
+            return { cids: cids, colors: colors, due: due };
+        }
+
+        var deltas = section(bytes, 0, count - 1, DELTA_ARRAY_TYPES[payload.deltaBytes]);
+        var offset = payload.deltaBytes * (count - 1);
+        var indices = section(bytes, offset, count, payload.indexBytes === 1 ? Uint8Array : Uint16Array);
+        offset += payload.indexBytes * count;
+
+        var cid = payload.firstCid;
+        cids[0] = cid;
+        for (var i = 1; i < count; i++) {
+            cid += Number(deltas[i - 1]);
+            cids[i] = cid;
+        }
+        for (var c = 0; c < count; c++) {
+            colors[c] = indices[c];
+            if (bytes[offset + (c >> 3)] & (1 << (c & 7))) {
+                due.push(c);
+            }
+        }
+        return { cids: cids, colors: colors, due: due };
+    }
+
+    // Decodifica model.payload em model.cids/colors/due; a promessa devolve o próprio model
+    function decode(model) {
+        var payload = model.payload;
+        var bytes = base64ToBytes(payload.data);
+        var ready = payload.compressed ? inflate(bytes) : Promise.resolve(bytes);
+        return ready.then(function (raw) {
+            var tiles = unpack(payload, raw);
+            delete model.payload;
+            model.cids = tiles.cids;
+            model.colors = tiles.colors;
+            model.due = tiles.due;
+            return model;
+        });
+    }
+
+    // Decodifica o modelo da grade principal e chama init(model)
+    function load(model, init) {
+        loaded = false;
+        return decode(model).then(function () {
+            init(model);
+            loaded = true;
+            var callbacks = pendingCallbacks;
+            pendingCallbacks = [];
+            for (var i = 0; i < callbacks.length; i++) {
+                callbacks[i]();
+            }
+        });
+    }
+
+    // Executa `callback` quando a grade da página já tiver sido carregada
+    function afterLoad(callback) {
+        if (loaded) {
+            callback();
+        } else {
+            pendingCallbacks.push(callback);
+        }
+    }
+
+    return {
+        decode: decode,
+        load: load,
+        afterLoad: afterLoad
+    };
+})();
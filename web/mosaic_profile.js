@@ -0,0 +1,78 @@
+/*
+ * Memory Mosaic - medições da página (opção memorymosaic_profiling).
+ *
+ * Incluído antes dos demais scripts da grade, marca (performance.mark) o início
+ * deles, o fim da decodificação do payload, o fim do primeiro desenho e o
+ * primeiro quadro pintado depois dele. As durações (ms) vão para o Python via
+ * pycmd "memorymosaic_profile:", que as associa à última renderização; em
+ * seguida o painel com as últimas renderizações é pedido ao Python
+ * ("memorymosaic_profile_overlay") e exibido no canto da página.
+ */
+var MemoryMosaicProfile = (function () {
+    "use strict";
+
+    var OVERLAY_ID = "memorymosaic-profile-overlay";
+    var marks = {};
+
+    function mark(name) {
+        marks[name] = performance.now();
+        if (performance.mark) {
+            performance.mark("memorymosaic-" + name);
+        }
+    }
+
+    mark("scripts");
+
+    function showOverlay(lines) {
+        if (!lines || !lines.length) {
+            return;
+        }
+        var overlay = document.getElementById(OVERLAY_ID);
+        if (!overlay) {
+            overlay = document.createElement("pre");
+            overlay.id = OVERLAY_ID;
+            overlay.style.cssText = "position: fixed; right: 8px; bottom: 8px; z-index: 1000; max-width: 90%; max-height: 40%; " +
+                "overflow: auto; margin: 0; padding: 6px 8px; font: 11px monospace; color: #f0f0f0; " +
+                "background: rgba(0, 0, 0, 0.75); border-radius: 4px; cursor: pointer;";
+            // Clique esconde o painel até a próxima renderização
+            overlay.addEventListener("click", function () {
+                overlay.style.display = "none";
+            });
+            document.body.appendChild(overlay);
+        }
+        overlay.textContent = lines.join("\n");
+        overlay.style.display = "block";
+    }
+
+    function report() {
+        var page = {
+            scripts: marks.scripts,
+            decode: marks.decoded - marks.scripts,
+            init: marks.drawn - marks.decoded,
+            paint: marks.painted - marks.drawn
+        };
+        pycmd("memorymosaic_profile:" + JSON.stringify(page), function () {
+            pycmd("memorymosaic_profile_overlay", showOverlay);
+        });
+    }
+
+    // Envolve o init do renderizador (MemoryMosaicPayload.load) para medir o primeiro desenho
+    function timedInit(init) {
+        return function (model) {
+            mark("decoded");
+            init(model);
+            mark("drawn");
+            // O segundo requestAnimationFrame roda depois que o primeiro quadro foi pintado
+            requestAnimationFrame(function () {
+                requestAnimationFrame(function () {
+                    mark("painted");
+                    report();
+                });
+            });
+        };
+    }
+
+    return {
+        timedInit: timedInit
+    };
+})();
@@ -0,0 +1,205 @@
+/*
+ * Memory Mosaic - visualização em seções (por deck ou por tag).
+ *
+ * Cada seção tem um cabeçalho com o nome, o total de cartões e o mini-sumário
+ * (cartões por categoria e vencidos hoje), montado a partir do modelo enviado
+ * pelo Python. A grade de uma seção só é pedida ao Python
+ * ("memorymosaic_section_open:<índice>") quando ela é aberta pela primeira vez
+ * e é desenhada por um renderizador canvas próprio (MemoryMosaicCanvas.create);
+ * fechar a seção só a esconde. Como a página é recriada a cada renderização,
+ * as seções abertas ficam guardadas no Python ("memorymosaic_section_state:"),
+ * que as informa à página nova ("memorymosaic_sections_state").
+ */
+var MemoryMosaicSections = (function () {
+    "use strict";
+
+    var settings = null;
+    var sections = [];
+    // Patch cumulativo dos tiles (ver mosaic_live.js), aplicado também às seções abertas depois dele
+    var patchedTiles = [];
+
+    function swatch(color, withDueDot) {
+        var element = document.createElement("span");
+        element.style.cssText = "display: inline-block; width: 10px; height: 10px; margin-right: 3px; vertical-align: middle; " +
+            "position: relative; border: 1px solid #888; background-color: " + (withDueDot ? "#EEEEEE" : color) + ";";
+        if (withDueDot) {
+            var dot = document.createElement("span");
+            dot.style.cssText = "position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); " +
+                "width: 5px; height: 5px; border-radius: 50%; background-color: " + color + ";";
+            element.appendChild(dot);
+        }
+        return element;
+    }
+
+    function summaryItem(element, color, label, count, withDueDot) {
+        var item = document.createElement("span");
+        item.style.cssText = "display: inline-flex; align-items: center; white-space: nowrap;";
+        item.title = label;
+        item.appendChild(swatch(color, withDueDot));
+        item.appendChild(document.createTextNode(String(count)));
+        element.appendChild(item);
+    }
+
+    // Mini-sumário: só as categorias presentes na seção
+    function renderSummary(section) {
+        var element = section.summary;
+        element.textContent = "";
+        for (var category = 0; category < section.counts.length; category++) {
+            if (section.counts[category] > 0) {
+                summaryItem(element, settings.categories[category][0], settings.categories[category][1], section.counts[category], false);
+            }
+        }
+        if (settings.showDue && section.due > 0) {
+            summaryItem(element, settings.dueColor, settings.dueLabel, section.due, true);
+        }
+    }
+
+    function setOpen(section, opened) {
+        section.opened = opened;
+        section.body.style.display = opened ? "block" : "none";
+        section.arrow.textContent = opened ? "▾" : "▸";
+    }
+
+    function open(index) {
+        var section = sections[index];
+        if (!section || section.opened) {
+            return;
+        }
+        setOpen(section, true);
+        if (section.renderer || section.loading) {
+            pycmd("memorymosaic_section_state:" + index + ":1");
+            if (section.renderer) {
+                section.renderer.layout(); // A largura volta ao mostrar a seção
+            }
+            return;
+        }
+        // Primeira abertura: o Python envia os tiles da seção (e passa a lembrar que ela está aberta)
+        section.loading = true;
+        pycmd("memorymosaic_section_open:" + index, function (model) {
+            if (!model) {
+                section.loading = false;
+                return;
+            }
+            MemoryMosaicPayload.decode(model).then(function () {
+                section.loading = false;
+                section.body.innerHTML = '<canvas class="memorymosaic-canvas" style="display: block; position: sticky; top: 0px;"></canvas>' +
+                    '<div class="memorymosaic-canvas-spacer"></div>';
+                section.renderer = MemoryMosaicCanvas.create(section.body, model);
+                if (section.renderer && patchedTiles.length) {
+                    section.renderer.updateTiles(patchedTiles);
+                }
+            });
+        });
+    }
+
+    function close(index) {
+        var section = sections[index];
+        if (!section || !section.opened) {
+            return;
+        }
+        setOpen(section, false);
+        pycmd("memorymosaic_section_state:" + index + ":0");
+    }
+
+    function toggle(index) {
+        if (sections[index] && sections[index].opened) {
+            close(index);
+        } else {
+            open(index);
+        }
+    }
+
+    function createSection(root, index, data) {
+        var header = document.createElement("div");
+        header.className = "memorymosaic-section-header";
+        header.style.cssText = "display: flex; align-items: center; flex-wrap: wrap; gap: 4px 10px; padding: 4px 6px; " +
+            "cursor: pointer; border-bottom: 1px solid #e0e0e0; font-size: 0.9em; user-select: none;";
+        var arrow = document.createElement("span");
+        arrow.style.cssText = "width: 1em;";
+        var title = document.createElement("b");
+        title.textContent = data[0];
+        var total = document.createElement("span");
+        total.textContent = "(" + data[1] + ")";
+        var summary = document.createElement("span");
+        summary.style.cssText = "display: inline-flex; flex-wrap: wrap; gap: 2px 8px; margin-left: auto;";
+        header.appendChild(arrow);
+        header.appendChild(title);
+        header.appendChild(total);
+        header.appendChild(summary);
+        header.addEventListener("click", function () {
+            toggle(index);
+        });
+
+        var body = document.createElement("div");
+        body.className = "memorymosaic-section-body";
+        body.style.cssText = settings.containerStyle;
+        root.appendChild(header);
+        root.appendChild(body);
+
+        var section = {
+            arrow: arrow,
+            summary: summary,
+            body: body,
+            counts: data[2],
+            due: data[3],
+            opened: false,
+            loading: false,
+            renderer: null
+        };
+        setOpen(section, false);
+        renderSummary(section);
+        return section;
+    }
+
+    // settings = {sections: [[rótulo, total, contagens por categoria, vencidos], ...],
+    //             categories: [[cor, rótulo], ...], dueColor, dueLabel, showDue, containerStyle}
+    function init(sectionSettings) {
+        var root = document.getElementById("memorymosaic-sections");
+        if (!root) {
+            return;
+        }
+        settings = sectionSettings;
+        sections = [];
+        patchedTiles = [];
+        for (var i = 0; i < settings.sections.length; i++) {
+            sections.push(createSection(root, i, settings.sections[i]));
+        }
+        pycmd("memorymosaic_sections_state", function (openIndices) {
+            for (var j = 0; openIndices && j < openIndices.length; j++) {
+                open(openIndices[j]);
+            }
+        });
+    }
+
+    // patch = {tiles: [[cid, cor, vencidoHoje], ...], sections: [[índice, contagens, vencidos], ...], ...}
+    function applyPatch(patch) {
+        patchedTiles = patch.tiles;
+        for (var i = 0; i < sections.length; i++) {
+            if (sections[i].renderer) {
+                sections[i].renderer.updateTiles(patch.tiles);
+            }
+        }
+        var changed = patch.sections || [];
+        for (var c = 0; c < changed.length; c++) {
+            var section = sections[changed[c][0]];
+            if (section) {
+                section.counts = changed[c][1];
+                section.due = changed[c][2];
+                renderSummary(section);
+            }
+        }
+    }
+
+    function isActive() {
+        return settings !== null && document.getElementById("memorymosaic-sections") !== null;
+    }
+
+    return {
+        init: init,
+        open: open,
+        close: close,
+        toggle: toggle,
+        applyPatch: applyPatch,
+        isActive: isActive
+    };
+})();
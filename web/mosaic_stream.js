@@ -0,0 +1,75 @@
+/*
+ * Memory Mosaic - carregamento progressivo ("Mostrar Mais" / "Mostrar Todos").
+ *
+ * Em vez de recarregar a página, o Python envia os novos tiles em lotes via
+ * web.eval. Cada lote é acrescentado ao modelo da grade ativa (canvas ou DOM
+ * virtualizada), que só desenha o que está visível, e atualiza o "X de Y
+ * cartões" do rodapé. As contagens do sumário já cobrem todo o filtro e não mudam.
+ */
+var MemoryMosaicStream = (function () {
+    "use strict";
+
+    var active = false;
+    var shown = 0;
+
+    // streamSettings = {shownBefore}
+    function begin(streamSettings) {
+        active = true;
+        shown = streamSettings.shownBefore;
+        setPaginationEnabled(false);
+    }
+
+    // tiles = [[cid, cor, vencidoHoje], ...]
+    function enqueue(tiles) {
+        if (!active) {
+            return;
+        }
+        if (typeof MemoryMosaicCanvas !== "undefined" && MemoryMosaicCanvas.isActive()) {
+            MemoryMosaicCanvas.appendTiles(tiles);
+        } else if (typeof MemoryMosaicDomGrid !== "undefined" && MemoryMosaicDomGrid.isActive()) {
+            MemoryMosaicDomGrid.appendTiles(tiles);
+        } else {
+            return;
+        }
+        countTiles(tiles.length);
+    }
+
+    // Atualiza o "X de Y cartões" do rodapé
+    function countTiles(added) {
+        shown += added;
+        var shownElement = document.getElementById("memorymosaic-count-shown");
+        if (shownElement) {
+            shownElement.textContent = shown;
+        }
+    }
+
+    function setPaginationEnabled(enabled) {
+        var buttons = document.querySelectorAll("#memorymosaic-pagination-controls button");
+        for (var i = 0; i < buttons.length; i++) {
+            buttons[i].disabled = !enabled;
+        }
+    }
+
+    // pagination = {remaining, showMoreText, showAllText}
+    function finish(pagination) {
+        active = false;
+        document.body.style.cursor = "default";
+        var controls = document.getElementById("memorymosaic-pagination-controls");
+        if (!controls) {
+            return;
+        }
+        if (pagination.remaining <= 0) {
+            controls.parentNode.removeChild(controls);
+            return;
+        }
+        document.getElementById("memorymosaic-load-more").textContent = pagination.showMoreText;
+        document.getElementById("memorymosaic-load-all").textContent = pagination.showAllText;
+        setPaginationEnabled(true);
+    }
+
+    return {
+        begin: begin,
+        enqueue: enqueue,
+        finish: finish
+    };
+})();
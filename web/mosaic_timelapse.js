@@ -0,0 +1,164 @@
+/*
+ * Memory Mosaic - linha do tempo (estado dos cartões em datas passadas).
+ *
+ * O Python reconstrói o estado dos cartões a partir do revlog (revlog_replay.py).
+ * Aqui fica o painel acima da grade: um controle deslizante com os dias, do
+ * primeiro evento até hoje, e o botão de reprodução. Cada quadro é pedido via
+ * pycmd "memorymosaic_timelapse_frame:<dia>" e chega como um patch de tiles
+ * (só os que mudaram desde o quadro anterior), aplicado por MemoryMosaicLive.
+ * Enquanto um quadro está sendo calculado, só o último dia pedido fica na fila.
+ * Fechar o painel recarrega a grade com o estado atual.
+ */
+var MemoryMosaicTimeLapse = (function () {
+    "use strict";
+
+    var PANEL_ID = "memorymosaic-timelapse";
+    var BUTTON_STYLE = "padding: 2px 10px; margin: 0 4px; border-radius: 4px; border: 1px solid #ccc; background-color: #f0f0f0; cursor: pointer;";
+
+    var state = null;
+
+    function open() {
+        if (state) {
+            return;
+        }
+        document.body.style.cursor = "wait";
+        pycmd("memorymosaic_timelapse_start");
+    }
+
+    function createButton(text, onClick) {
+        var button = document.createElement("button");
+        button.textContent = text;
+        button.style.cssText = BUTTON_STYLE;
+        button.addEventListener("click", onClick);
+        return button;
+    }
+
+    // options = {firstDay, today, stepDays, frameIntervalMs, labels: {play, pause, close}}
+    function ready(options) {
+        document.body.style.cursor = "default";
+        var container = document.getElementById("memorymosaic-grid-container");
+        if (!container || state) {
+            return;
+        }
+        var panel = document.createElement("div");
+        panel.id = PANEL_ID;
+        panel.style.cssText = "display: flex; align-items: center; justify-content: center; margin: 6px auto; font-size: 0.9em;";
+
+        var slider = document.createElement("input");
+        slider.type = "range";
+        slider.min = options.firstDay;
+        slider.max = options.today;
+        slider.value = options.today;
+        slider.style.cssText = "flex: 1; max-width: 400px; margin: 0 8px;";
+        var dateLabel = document.createElement("span");
+        dateLabel.style.cssText = "min-width: 90px; text-align: left;";
+
+        state = {
+            options: options,
+            day: options.today,
+            playing: false,
+            busy: false,
+            pendingDay: null,
+            timer: null,
+            slider: slider,
+            dateLabel: dateLabel,
+            playButton: createButton(options.labels.play, togglePlay)
+        };
+        slider.addEventListener("input", function () {
+            setPlaying(false);
+            requestFrame(parseInt(slider.value, 10));
+        });
+
+        panel.appendChild(state.playButton);
+        panel.appendChild(slider);
+        panel.appendChild(dateLabel);
+        panel.appendChild(createButton(options.labels.close, close));
+        container.parentNode.insertBefore(panel, container);
+        requestFrame(options.today);
+    }
+
+    function requestFrame(day) {
+        if (!state) {
+            return;
+        }
+        if (state.busy) {
+            state.pendingDay = day;
+            return;
+        }
+        state.busy = true;
+        state.day = day;
+        pycmd("memorymosaic_timelapse_frame:" + day, function (frame) {
+            if (!state) {
+                return;
+            }
+            state.busy = false;
+            if (!frame) {
+                // A grade mudou desde que a linha do tempo foi aberta
+                close();
+                return;
+            }
+            MemoryMosaicLive.applyPatch(frame.patch);
+            state.dateLabel.textContent = frame.date;
+            if (state.pendingDay !== null) {
+                var nextDay = state.pendingDay;
+                state.pendingDay = null;
+                requestFrame(nextDay);
+            } else if (state.playing) {
+                state.timer = setTimeout(nextPlayFrame, state.options.frameIntervalMs);
+            }
+        });
+    }
+
+    function nextPlayFrame() {
+        state.timer = null;
+        if (!state.playing) {
+            return;
+        }
+        var day = Math.min(state.options.today, state.day + state.options.stepDays);
+        state.slider.value = day;
+        requestFrame(day);
+        if (day >= state.options.today) {
+            setPlaying(false);
+        }
+    }
+
+    function setPlaying(playing) {
+        state.playing = playing;
+        state.playButton.textContent = playing ? state.options.labels.pause : state.options.labels.play;
+        if (!playing && state.timer !== null) {
+            clearTimeout(state.timer);
+            state.timer = null;
+        }
+    }
+
+    function togglePlay() {
+        if (state.playing) {
+            setPlaying(false);
+            return;
+        }
+        setPlaying(true);
+        // Em hoje, a reprodução recomeça do primeiro dia
+        var day = state.day >= state.options.today ? state.options.firstDay : state.day;
+        state.slider.value = day;
+        requestFrame(day);
+    }
+
+    function close() {
+        if (!state) {
+            return;
+        }
+        setPlaying(false);
+        state = null;
+        var panel = document.getElementById(PANEL_ID);
+        if (panel) {
+            panel.parentNode.removeChild(panel);
+        }
+        document.body.style.cursor = "wait";
+        pycmd("memorymosaic_timelapse_stop");
+    }
+
+    return {
+        open: open,
+        ready: ready
+    };
+})();
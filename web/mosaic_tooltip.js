@@ -0,0 +1,133 @@
+/*
+ * Memory Mosaic - tooltips sob demanda.
+ *
+ * Em vez de um atributo `title` pré-montado em cada tile, o texto do tooltip
+ * é pedido ao Python (pycmd "memorymosaic_tooltip:<cid>") quando o ponteiro
+ * para sobre um tile, e exibido em um popover próprio.
+ */
+var MemoryMosaicTooltip = (function () {
+    "use strict";
+
+    var HOVER_DELAY_MS = 120;
+    var OFFSET_PX = 14;
+
+    var popover = null;
+    var pendingTimer = null;
+    var requestedCid = null;
+    var lastX = 0;
+    var lastY = 0;
+
+    function ensurePopover() {
+        if (popover && document.body.contains(popover)) {
+            return popover;
+        }
+        popover = document.createElement("div");
+        popover.id = "memorymosaic-tooltip";
+        popover.style.cssText = [
+            "position: fixed",
+            "z-index: 10000",
+            "display: none",
+            "pointer-events: none",
+            "white-space: pre",
+            "font-size: 12px",
+            "line-height: 1.35",
+            "padding: 6px 8px",
+            "border-radius: 4px",
+            "border: 1px solid #888",
+            "background: #fffff0",
+            "color: #222",
+            "box-shadow: 0 2px 6px rgba(0, 0, 0, 0.25)",
+            "text-align: left"
+        ].join(";");
+        document.body.appendChild(popover);
+        return popover;
+    }
+
+    function place() {
+        var element = ensurePopover();
+        var x = lastX + OFFSET_PX;
+        var y = lastY + OFFSET_PX;
+        var maxX = window.innerWidth - element.offsetWidth - 4;
+        var maxY = window.innerHeight - element.offsetHeight - 4;
+        if (x > maxX) {
+            x = Math.max(4, lastX - element.offsetWidth - OFFSET_PX);
+        }
+        if (y > maxY) {
+            y = Math.max(4, lastY - element.offsetHeight - OFFSET_PX);
+        }
+        element.style.left = x + "px";
+        element.style.top = y + "px";
+    }
+
+    // Mostra o tooltip do cartão `cid` perto de (clientX, clientY)
+    function show(cid, clientX, clientY) {
+        lastX = clientX;
+        lastY = clientY;
+        if (cid === requestedCid) {
+            if (popover && popover.style.display !== "none") {
+                place();
+            }
+            return;
+        }
+        requestedCid = cid;
+        if (pendingTimer !== null) {
+            clearTimeout(pendingTimer);
+        }
+        if (popover) {
+            popover.style.display = "none";
+        }
+        pendingTimer = setTimeout(function () {
+            pendingTimer = null;
+            pycmd("memorymosaic_tooltip:" + cid, function (lines) {
+                // Descarta respostas de um tile que já não está sob o ponteiro
+                if (requestedCid !== cid || !lines) {
+                    return;
+                }
+                var element = ensurePopover();
+                element.textContent = lines.join("\n");
+                element.style.display = "block";
+                place();
+            });
+        }, HOVER_DELAY_MS);
+    }
+
+    function hide() {
+        requestedCid = null;
+        if (pendingTimer !== null) {
+            clearTimeout(pendingTimer);
+            pendingTimer = null;
+        }
+        if (popover) {
+            popover.style.display = "none";
+        }
+    }
+
+    // Eventos delegados da grade DOM: um único listener no container em vez
+    // de `title`/`onclick` em cada tile
+    function bindDomGrid(container) {
+        if (!container) {
+            return;
+        }
+        container.addEventListener("mousemove", function (event) {
+            var tile = event.target.closest(".memorymosaic-tile");
+            if (tile) {
+                show(Number(tile.dataset.cid), event.clientX, event.clientY);
+            } else {
+                hide();
+            }
+        });
+        container.addEventListener("mouseleave", hide);
+        container.addEventListener("click", function (event) {
+            var tile = event.target.closest(".memorymosaic-tile");
+            if (tile) {
+                onMemoryMosaicTileClick(tile.dataset.cid);
+            }
+        });
+    }
+
+    return {
+        show: show,
+        hide: hide,
+        bindDomGrid: bindDomGrid
+    };
+})();